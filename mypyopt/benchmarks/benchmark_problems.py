@@ -0,0 +1,99 @@
+import math
+from typing import Callable, Dict, List, Optional
+
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.demos.pretend_energyplus.calibrate_walltemperatures import sim_pretend_energyplus
+from mypyopt.demos.pretend_energyplus.calibrate_walltemperatures import sum_sq_err_pretend_energyplus
+
+
+def sphere(x: List[float]) -> float:
+    return sum(v ** 2 for v in x)
+
+
+def rosenbrock(x: List[float]) -> float:
+    return sum(100 * (x[i + 1] - x[i] ** 2) ** 2 + (1 - x[i]) ** 2 for i in range(len(x) - 1))
+
+
+def rastrigin(x: List[float]) -> float:
+    return 10 * len(x) + sum(v ** 2 - 10 * math.cos(2 * math.pi * v) for v in x)
+
+
+def quadratic_fit(x: List[float]) -> float:
+    # the three coefficient quadratic fit from the unit tests, with the exact coefficients being 1, 2 and 3
+    x_values = [-5, -4, -3, -2, -1, 0, 1, 2, 3, 4, 5]
+    return sum((x[0] + x[1] * t + x[2] * t ** 2 - (1 + 2 * t + 3 * t ** 2)) ** 2 for t in x_values)
+
+
+def pretend_energyplus(x: List[float]) -> float:
+    return sum_sq_err_pretend_energyplus(sim_pretend_energyplus({'wall_resistance': x[0], 'min_outdoor_temp': x[1]}))
+
+
+class BenchmarkProblem:
+    """
+    This class describes an analytic test function along with the decision variable setup used to benchmark it
+    """
+    def __init__(self, name: str, function: Callable[[List[float]], float], minimum: float, maximum: float,
+                 initial_value: float, optimum: float = 0.0, dimensions: Optional[int] = None):
+        """
+        The constructor for this class
+
+        :param name: A short name for the problem used in the benchmark report
+        :param function: The test function, accepting a list of variable values and returning the objective
+        :param minimum: The lower bound of every decision variable
+        :param maximum: The upper bound of every decision variable
+        :param initial_value: The initial value of every decision variable
+        :param optimum: The known global minimum objective value, used to report the final error
+        :param dimensions: The fixed dimension count of the problem, or None if it can be run at any dimension count
+        """
+        self.name = name
+        self.function = function
+        self.minimum = minimum
+        self.maximum = maximum
+        self.initial_value = initial_value
+        self.optimum = optimum
+        self.dimensions = dimensions
+        self.evaluations = 0
+
+    def decision_variables(self, dimensions: int) -> List[DecisionVariable]:
+        """
+        Builds a fresh set of decision variables for one benchmark run
+
+        :param dimensions: The number of decision variables, ignored for problems with a fixed dimension count
+        :return: A list of DecisionVariable instances named x0, x1, ...
+        """
+        if self.dimensions is not None:
+            dimensions = self.dimensions
+        step = (self.maximum - self.minimum) / 20.0
+        return [DecisionVariable('x' + str(i), minimum=self.minimum, maximum=self.maximum,
+                                 initial_value=self.initial_value, initial_step_size=step,
+                                 convergence_criterion=0.0001) for i in range(dimensions)]
+
+    def f_of_x(self, parameter_hash: Dict[str, float]) -> List[float]:
+        """
+        The simulation callback for the benchmark, which counts evaluations and passes the point through as a list
+        """
+        self.evaluations += 1
+        return [parameter_hash['x' + str(i)] for i in range(len(parameter_hash))]
+
+    def objective(self, x: List[float]) -> float:
+        """
+        The objective callback for the benchmark
+        """
+        return self.function(x)
+
+
+def all_problems() -> List[BenchmarkProblem]:
+    """
+    Builds the standard set of benchmark problems
+
+    :return: A list of BenchmarkProblem instances
+    """
+    return [
+        BenchmarkProblem('sphere', sphere, -5.12, 5.12, 3.0),
+        BenchmarkProblem('rosenbrock', rosenbrock, -2.048, 2.048, -1.2),
+        BenchmarkProblem('rastrigin', rastrigin, -5.12, 5.12, 2.5),
+        BenchmarkProblem('quadratic', quadratic_fit, -5, 5, 0.5, dimensions=3),
+        # the measured data is noisy, so the best fit found by a tightly converged search stands in for the optimum
+        BenchmarkProblem('pretend_energyplus', pretend_energyplus, 0.5, 50, 10,
+                         optimum=pretend_energyplus([2.041123175381423, 19.984787505449443]), dimensions=2),
+    ]
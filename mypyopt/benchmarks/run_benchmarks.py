@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+import argparse
+from contextlib import redirect_stdout
+import json
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from mypyopt.benchmarks.benchmark_problems import BenchmarkProblem, all_problems
+from mypyopt.optimizer_differential_evolution import DifferentialEvolution
+from mypyopt.optimizer_heuristic_search import HeuristicSearch
+from mypyopt.optimizer_nelder_mead import NelderMeadSearch
+from mypyopt.optimizer_pattern_search import PatternSearch
+from mypyopt.optimizer_quasi_newton import QuasiNewtonSearch
+from mypyopt.optimizer_surrogate_search import SurrogateSearch
+from mypyopt.project_structure import ProjectStructure
+from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.stop_reason_enum import StopReasonEnum
+
+optimizers = {
+    'evolution': DifferentialEvolution,
+    'heuristic': HeuristicSearch,
+    'nelder_mead': NelderMeadSearch,
+    'pattern': PatternSearch,
+    'quasi_newton': QuasiNewtonSearch,
+    'surrogate': SurrogateSearch,
+}
+
+
+def run_benchmark(problem: BenchmarkProblem, optimizer_name: str, dimensions: int, output_dir: Path,
+                  max_iterations: int = 2000, seed: int = 1) -> Dict:
+    """
+    Runs a single optimizer on a single problem and measures it
+
+    :param problem: The BenchmarkProblem to solve
+    :param optimizer_name: One of the keys of the optimizers dictionary in this module
+    :param dimensions: The number of decision variables, ignored for problems with a fixed dimension count
+    :param output_dir: The project output directory for the run
+    :param max_iterations: The iteration limit of the run
+    :param seed: The random seed for stochastic optimizers
+    :return: A dictionary with the problem, optimizer, dimensions, evaluations, wall_time, callback_time,
+             overhead_per_evaluation, final_error, success, reason, and stop_reason of the run
+    """
+    dvs = problem.decision_variables(dimensions)
+    callback_time = [0.0]
+
+    def f_of_x(parameter_hash):
+        start = time.perf_counter()
+        result = problem.f_of_x(parameter_hash)
+        callback_time[0] += time.perf_counter() - start
+        return result
+
+    def objective(x):
+        start = time.perf_counter()
+        result = problem.objective(x)
+        callback_time[0] += time.perf_counter() - start
+        return result
+
+    project = ProjectStructure(max_iterations=max_iterations, project_name=problem.name, output_dir_path=output_dir,
+                               random_seed=seed)
+    problem.evaluations = 0
+    start = time.perf_counter()
+    searcher = optimizers[optimizer_name](project, dvs, f_of_x, objective)
+    response = searcher.search()
+    wall_time = time.perf_counter() - start
+
+    best = searcher.dvs.x_base.tolist()
+    evaluations = max(problem.evaluations, 1)
+    result = dict()
+    result['problem'] = problem.name
+    result['optimizer'] = optimizer_name
+    result['dimensions'] = len(dvs)
+    result['evaluations'] = problem.evaluations
+    result['wall_time'] = wall_time
+    result['callback_time'] = callback_time[0]
+    result['overhead_per_evaluation'] = (wall_time - callback_time[0]) / evaluations
+    result['final_error'] = problem.function(best) - problem.optimum
+    result['success'] = response.success
+    result['reason'] = ReturnStateEnum.enum_to_string(response.reason)
+    result['stop_reason'] = StopReasonEnum.enum_to_string(response.stop_reason)
+    return result
+
+
+def run(problem_names: Optional[List[str]] = None, optimizer_names: Optional[List[str]] = None,
+        dimension_counts: Optional[List[int]] = None, max_iterations: int = 2000, seed: int = 1) -> List[Dict]:
+    """
+    Runs every requested optimizer against every requested problem and dimension count
+
+    :param problem_names: The names of the problems to run, or None for all of them
+    :param optimizer_names: The names of the optimizers to run, or None for all of them
+    :param dimension_counts: The dimension counts to run each scalable problem at, defaults to 2, 5 and 10
+    :param max_iterations: The iteration limit of each run
+    :param seed: The random seed for stochastic optimizers
+    :return: A list of result dictionaries, as returned by run_benchmark
+    """
+    if dimension_counts is None:
+        dimension_counts = [2, 5, 10]
+    problems = [p for p in all_problems() if problem_names is None or p.name in problem_names]
+    output_dir = Path(tempfile.mkdtemp())
+    results = list()
+    try:
+        for problem in problems:
+            counts = [problem.dimensions] if problem.dimensions is not None else dimension_counts
+            for dimensions in counts:
+                for optimizer_name in optimizer_names or list(optimizers):
+                    results.append(run_benchmark(problem, optimizer_name, dimensions, output_dir, max_iterations, seed))
+    finally:
+        shutil.rmtree(str(output_dir), ignore_errors=True)
+    return results
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the MyPyOpt optimizers on standard test functions')
+    parser.add_argument('--problems', nargs='+', choices=[p.name for p in all_problems()])
+    parser.add_argument('--optimizers', nargs='+', choices=list(optimizers))
+    parser.add_argument('--dimensions', nargs='+', type=int, default=[2, 5, 10])
+    parser.add_argument('--max-iterations', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', type=Path, help='Write the JSON results here instead of to standard output')
+    options = parser.parse_args(args)
+    # the optimizers report their progress on standard output, which is kept clear for the JSON report
+    with redirect_stdout(sys.stderr):
+        results = run(options.problems, options.optimizers, options.dimensions, options.max_iterations, options.seed)
+    report = json.dumps(results, indent=2)
+    if options.output:
+        options.output.write_text(report)
+    else:
+        sys.stdout.write(report + '\n')
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
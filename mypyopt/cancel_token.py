@@ -0,0 +1,212 @@
+import os
+import threading
+from typing import Callable, Iterable, List, Optional
+
+from mypyopt.return_state_enum import ReturnStateEnum
+
+# inotify constants from <sys/inotify.h>
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+
+def _inotify_watch(path: str, found: Callable[[], None]) -> Optional[Callable[[], None]]:
+    """
+    Starts a thread that waits on inotify events for the directory containing path, calling found once the file
+    exists.  This is Linux only and uses the C library directly, so there is nothing extra to install.
+
+    :return: A function that stops the watch, or None if inotify is not available here
+    """
+    try:
+        import ctypes
+        import ctypes.util
+        import select
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (ImportError, OSError, AttributeError):  # pragma: no cover -- the tests run on Linux
+        return None
+    fd = inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+    if fd < 0:  # pragma: no cover -- only when out of inotify instances
+        return None
+    directory = os.path.dirname(path)
+    if inotify_add_watch(fd, directory.encode(), _IN_CREATE | _IN_MOVED_TO | _IN_CLOSE_WRITE) < 0:
+        os.close(fd)
+        return None
+    # the watch thread is woken through a pipe when it should stop
+    wake_read, wake_write = os.pipe()
+    stopped = threading.Event()
+
+    def watch() -> None:
+        try:
+            while not stopped.is_set():
+                # the events are only used to wake up, the file itself is checked rather than parsing event names
+                readable, _, _ = select.select([fd, wake_read], [], [])
+                if fd in readable:
+                    try:
+                        os.read(fd, 65536)
+                    except BlockingIOError:  # pragma: no cover -- select said there was something to read
+                        pass
+                    if os.path.exists(path):
+                        found()
+                        return
+        finally:
+            os.close(fd)
+            os.close(wake_read)
+
+    def stop() -> None:
+        if not stopped.is_set():
+            stopped.set()
+            try:
+                os.write(wake_write, b'x')
+            except OSError:
+                pass  # the watch thread already found the file and is gone
+            os.close(wake_write)
+
+    threading.Thread(target=watch, name='mypyopt-stop-file', daemon=True).start()
+    return stop
+
+
+class CancelToken:
+    """
+    This class is a thread-safe flag for cancelling a search from outside of it.  Any thread, a signal handler, or a
+    watcher on the stop file can cancel the token; searches check it between steps, which costs no more than reading
+    a flag, and evaluators waiting on parallel, distributed or asyncio evaluations are woken through the callbacks
+    registered on it, so that they give up on evaluations still in flight instead of waiting for them to finish.
+
+    A search that finds its token cancelled returns a SearchReturnType with the reason the token was cancelled with,
+    UserAborted unless another reason is given, and the best values found so far.  One token can be shared by several
+    searches to cancel all of them at once.  A cancelled token stays cancelled, so use a new token for a new search.
+    """
+
+    def __init__(self):
+        """
+        The constructor for this class, creating a token that is not cancelled
+        """
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = list()
+        self.reason = ReturnStateEnum.UserAborted
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Whether the token has been cancelled
+        """
+        return self._event.is_set()
+
+    def cancel(self, reason: int = ReturnStateEnum.UserAborted) -> None:
+        """
+        Cancels the token and calls the registered callbacks; cancelling a token again does nothing
+
+        :param reason: The ReturnStateEnum constant searches report when they stop because of this token
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, list()
+        for callback in callbacks:
+            callback()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the token is cancelled
+
+        :param timeout: The longest time to wait in seconds, or None to wait indefinitely
+        :return: True if the token was cancelled
+        """
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Registers a function to call, with no arguments, when the token is cancelled.  It is called from the thread
+        that cancels the token, or right away if the token is already cancelled, so it must be quick and thread-safe.
+
+        :param callback: The function to call
+        :return: A function that unregisters the callback again
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def watch_file(self, path: str, poll_interval: float = 1.0) -> Callable[[], None]:
+        """
+        Cancels the token, with the UserAborted reason, once a file appears.  On Linux the directory is watched with
+        inotify, so nothing happens until the file is created; elsewhere a background thread checks for the file every
+        poll_interval seconds.
+
+        :param path: The path of the file to watch for, resolved against the current working directory right away
+        :param poll_interval: The number of seconds between checks where inotify is not available
+        :return: A function that stops watching
+        """
+        path = os.path.abspath(path)
+
+        def found() -> None:
+            self.cancel(ReturnStateEnum.UserAborted)
+
+        stop = _inotify_watch(path, found)
+        if stop is not None:
+            # the file may have been created before the watch started
+            if os.path.exists(path):
+                found()
+            return stop
+
+        stopped = threading.Event()
+
+        def poll() -> None:
+            while not stopped.wait(poll_interval) and not self.cancelled:
+                if os.path.exists(path):
+                    found()
+
+        if os.path.exists(path):
+            found()
+        threading.Thread(target=poll, name='mypyopt-stop-file', daemon=True).start()
+        return stopped.set
+
+    def handle_signals(self, signals: Optional[Iterable[int]] = None) -> Callable[[], None]:
+        """
+        Cancels the token, with the UserAborted reason, when the process receives one of the given signals.  A second
+        signal after the token is cancelled is handed to the handler that was there before, so that pressing Ctrl-C
+        twice still interrupts a search that is stuck in a long evaluation.  Signal handlers can only be installed
+        from the main thread; from any other thread this does nothing.
+
+        :param signals: The signals to handle, SIGINT and SIGTERM if not given
+        :return: A function that restores the previous signal handlers
+        """
+        import signal
+        if threading.current_thread() is not threading.main_thread():
+            return lambda: None
+        if signals is None:
+            signals = [signal.SIGINT, signal.SIGTERM]
+        previous = dict()
+
+        def handler(signum, frame) -> None:
+            if not self.cancelled:
+                self.cancel(ReturnStateEnum.UserAborted)
+                return
+            signal.signal(signum, previous[signum])
+            if callable(previous[signum]):
+                previous[signum](signum, frame)
+            elif previous[signum] == signal.SIG_DFL:  # pragma: no cover -- this would end the test process
+                signal.raise_signal(signum)
+
+        for signum in signals:
+            previous[signum] = signal.signal(signum, handler)
+
+        def restore() -> None:
+            for s, h in previous.items():
+                if signal.getsignal(s) is handler:
+                    signal.signal(s, h)
+        return restore
@@ -0,0 +1,107 @@
+import json
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from mypyopt.exceptions import MyPyOptException
+
+if TYPE_CHECKING:  # pathlib is slow to import, so it is only imported once a checkpoint is used
+    from pathlib import Path
+
+
+class Checkpoint:
+    """
+    This class holds the state of an in-flight search at the end of an iteration, so that a search that was
+    interrupted can be resumed from where it left off instead of from the initial point
+    """
+
+    file_name = 'checkpoint.json'
+    """The name of the checkpoint file written inside each run directory"""
+
+    def __init__(self, iteration: int, j_base: Any, decision_variables: List[Dict[str, Any]],
+                 rng_state: Optional[Any] = None):
+        """
+        The constructor for this class
+
+        :param iteration: The last completed iteration number
+        :param j_base: The objective value at the current base point
+        :param decision_variables: A list of dictionaries, one per decision variable, each with the keys var_name,
+                                   x_base and delta_x
+        :param rng_state: The state of the optimizer random number generator, as returned by random.Random.getstate
+        """
+        self.iteration = iteration
+        self.j_base = j_base
+        self.decision_variables = decision_variables
+        self.rng_state = rng_state
+
+    def to_dictionary(self) -> dict:
+        """
+        Converts this checkpoint into a JSON friendly dictionary
+
+        :return: Dictionary of checkpoint information
+        """
+        d = dict()
+        d['iteration'] = self.iteration
+        d['j_base'] = self.j_base
+        d['decision_variables'] = self.decision_variables
+        d['rng_state'] = self.rng_state
+        return d
+
+    def write(self, run_dir: str) -> 'Path':
+        """
+        Writes this checkpoint into a run directory.  The file is written to a temporary name and then moved into place
+        so that a crash part way through a write never leaves a truncated checkpoint behind.
+
+        :param run_dir: The run directory to write the checkpoint file into
+        :return: The path to the checkpoint file
+        """
+        from pathlib import Path
+        checkpoint_path = Path(run_dir) / self.file_name
+        temporary_path = checkpoint_path.with_suffix('.tmp')
+        temporary_path.write_text(json.dumps(self.to_dictionary()))
+        os.replace(str(temporary_path), str(checkpoint_path))
+        return checkpoint_path
+
+    @staticmethod
+    def read(checkpoint_path: 'Path') -> 'Checkpoint':
+        """
+        Reads a checkpoint file
+
+        :param checkpoint_path: The path to a checkpoint file, or to a run directory containing one
+        :return: A Checkpoint instance
+        :raises MyPyOptException: If the checkpoint file does not exist or cannot be parsed
+        """
+        from pathlib import Path
+        checkpoint_path = Path(checkpoint_path)
+        if checkpoint_path.is_dir():
+            checkpoint_path = checkpoint_path / Checkpoint.file_name
+        try:
+            d = json.loads(checkpoint_path.read_text())
+            rng_state = d['rng_state']
+            if rng_state is not None:
+                rng_state = (rng_state[0], tuple(rng_state[1]), rng_state[2])
+            return Checkpoint(d['iteration'], d['j_base'], d['decision_variables'], rng_state)
+        except (OSError, ValueError, KeyError, IndexError, TypeError):
+            raise MyPyOptException("Couldn't read checkpoint file at " + str(checkpoint_path) + ", aborting...")
+
+    @staticmethod
+    def find_latest(output_dir: str, project_name: str) -> Optional['Path']:
+        """
+        Finds the most recently written checkpoint among the run directories of a project
+
+        :param output_dir: The root output directory of the project
+        :param project_name: The project name, which is part of each run directory name; only run directories named
+                             exactly timestamp_project_name_id are searched, so a project whose name merely starts or
+                             ends the same way is not mistaken for this one
+        :return: The path to the newest checkpoint file, or None if no run of this project has written one
+        """
+        import re
+        from pathlib import Path
+        run_dir_name = re.compile(r'\d{4}(-\d{2}){5}_' + re.escape(project_name) + r'_[0-9a-f]{8}')
+        if not os.path.isdir(output_dir):
+            return None
+        candidates = [Path(output_dir, name, Checkpoint.file_name) for name in os.listdir(output_dir)
+                      if run_dir_name.fullmatch(name)]
+        candidates = [p for p in candidates if p.is_file()]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda p: p.stat().st_mtime)
@@ -1,10 +1,50 @@
+from typing import Any
+
 from mypyopt.exceptions import MyPyOptException
 
 
+class _SetField:
+    """
+    An attribute of a DecisionVariable which is stored on the variable itself until the variable joins a
+    DecisionVariableSet, and in the array of the same name on the set from then on
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.slot = '_' + name
+
+    def __get__(self, dv, owner=None):
+        if dv is None:
+            return self
+        if dv._set is None:
+            return getattr(dv, self.slot)
+        return float(getattr(dv._set, self.name)[dv._index])
+
+    def __set__(self, dv, value):
+        if dv._set is None:
+            setattr(dv, self.slot, value)
+        else:
+            getattr(dv._set, self.name)[dv._index] = value
+
+
 class DecisionVariable:
     """
-    A structure for defining a single dimension in the optimization parameter space
+    A structure for defining a single dimension in the optimization parameter space.  Once an optimizer is created,
+    the bounds, convergence criterion, and search state of the variable live in the arrays of a DecisionVariableSet,
+    and this instance reads and writes its own element of them.
     """
+    __slots__ = ('var_name', 'value_initial', 'step_size_initial', '_set', '_index', '_value_minimum', '_value_maximum',
+                 '_convergence_criteria', '_x_base', '_x_new', '_delta_x')
+
+    array_fields = ('value_minimum', 'value_maximum', 'convergence_criteria', 'x_base', 'x_new', 'delta_x')
+    """The attributes stored in the arrays of a DecisionVariableSet"""
+
+    value_minimum = _SetField()
+    value_maximum = _SetField()
+    convergence_criteria = _SetField()
+    x_base = _SetField()
+    x_new = _SetField()
+    delta_x = _SetField()
+
     def __init__(self,
                  variable_name: str, minimum: float = -10000, maximum: float = 10000,
                  initial_value: float = 1, initial_step_size: float = 0.1, convergence_criterion: float = 0.001
@@ -23,6 +63,8 @@ class DecisionVariable:
         """
         if minimum > maximum or initial_step_size <= 0 or convergence_criterion <= 0:
             raise MyPyOptException("Invalid parameters in DV definition for DV with name: " + str(variable_name))
+        self._set = None
+        self._index = 0
         self.value_minimum = minimum
         self.value_maximum = maximum
         self.value_initial = initial_value
@@ -33,6 +75,17 @@ class DecisionVariable:
         self.x_new = initial_value
         self.delta_x = initial_step_size
 
+    def bind(self, decision_variable_set: Any, index: int) -> None:
+        """
+        Makes this variable a view onto one element of the arrays of a DecisionVariableSet; the set calls this after
+        copying the current values of the variable into its arrays
+
+        :param decision_variable_set: The DecisionVariableSet holding the values of this variable
+        :param index: The position of this variable in the arrays of the set
+        """
+        self._set = decision_variable_set
+        self._index = index
+
     def to_dictionary(self) -> dict:
         """
         Converts the meaningful parts of this decision variable into a dictionary for project summary reports
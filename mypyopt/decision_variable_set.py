@@ -0,0 +1,134 @@
+import collections
+import copy
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, Iterator, List
+
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.exceptions import MyPyOptException
+
+
+class ParameterView(Mapping):
+    """
+    A read-only mapping from decision variable names to the values of one point, backed by a numpy array rather than
+    a dictionary.  This is what the simulation callback receives as its parameter dictionary: indexing by name,
+    iterating, items() and dict(view) all work as they would on a dictionary, but building a point costs a single
+    array copy instead of one dictionary entry per decision variable.
+    """
+    __slots__ = ('_positions', 'array')
+
+    def __init__(self, positions: Dict[str, int], array: Any):
+        """
+        The constructor for this class
+
+        :param positions: A dictionary from each decision variable name to its position in the array, shared by all
+                          the points of a DecisionVariableSet
+        :param array: A one dimensional numpy array of the values of the point, owned by this view from here on
+        """
+        self._positions = positions
+        self.array = array
+
+    def __getitem__(self, name: str) -> float:
+        return self.array.item(self._positions[name])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __repr__(self) -> str:
+        return repr(self.to_dictionary())
+
+    def to_dictionary(self) -> Dict[str, float]:
+        """
+        Copies the point into a plain dictionary, which is faster than dict(view) for points with many variables
+
+        :return: A dictionary from decision variable name to value
+        """
+        return dict(zip(self._positions, self.array.tolist()))
+
+
+class DecisionVariableSet(Sequence):
+    """
+    This class holds the decision variables of an optimization with their bounds, convergence criteria, and search
+    state, x_base, x_new and delta_x, stored in contiguous numpy arrays of the same names, one element per variable.
+    The set holds its own copies of the DecisionVariable instances it is built from, which are views onto their element
+    of those arrays, so code that reads and writes individual variables of the set keeps working, while optimizers can
+    check bounds and convergence for all variables at once and hand out points as ParameterView instances without
+    building dictionaries.  The given instances are left as they are, so one list of decision variables can be used to
+    build several optimizers without their searches writing into each other's arrays.
+    """
+
+    def __init__(self, decision_variables: List[DecisionVariable]):
+        """
+        The constructor for this class, which copies the values of the given decision variables into the arrays
+
+        :param decision_variables: The DecisionVariable instances making up the parameter space, in order, which are
+                                   copied rather than bound to this set
+        :raises MyPyOptException: If two of the decision variables have the same name
+        """
+        import numpy as np
+        names = [dv.var_name for dv in decision_variables]
+        duplicate_names = [i for i, c in collections.Counter(names).items() if c > 1]
+        if duplicate_names:
+            raise MyPyOptException("Found duplicated names within decision variables, give each a unique name.")
+        self.names = names
+        self.positions = {name: i for i, name in enumerate(names)}
+        for field in DecisionVariable.array_fields:
+            setattr(self, field, np.array([getattr(dv, field) for dv in decision_variables], dtype=float))
+        self._variables = [copy.copy(dv) for dv in decision_variables]
+        for i, dv in enumerate(self._variables):
+            dv.bind(self, i)
+
+    def __getitem__(self, index):
+        return self._variables[index]
+
+    def __len__(self) -> int:
+        return len(self._variables)
+
+    def point(self, array: Any = None) -> ParameterView:
+        """
+        Creates a point for the simulation callback
+
+        :param array: The values of the point, in variable order; if not given, a copy of x_base is used
+        :return: A ParameterView of the point
+        """
+        return ParameterView(self.positions, self.x_base.copy() if array is None else array)
+
+    def perturbed(self, index: int) -> ParameterView:
+        """
+        Creates the point one step away from the base point along a single decision variable
+
+        :param index: The index of the decision variable to step by its delta_x
+        :return: A ParameterView of the point
+        """
+        array = self.x_base.copy()
+        array[index] += self.delta_x[index]
+        return ParameterView(self.positions, array)
+
+    def within_bounds(self, array: Any) -> Any:
+        """
+        Checks values against the bounds of every decision variable at once
+
+        :param array: An array of values in variable order, or a two dimensional array with one point per row
+        :return: A boolean array, True where the value lies within the bounds of its decision variable
+        """
+        return (array >= self.value_minimum) & (array <= self.value_maximum)
+
+    def converged(self) -> bool:
+        """
+        Checks whether the step size of every decision variable is within its convergence criterion
+
+        :return: True if all decision variables are converged
+        """
+        return bool((abs(self.delta_x) <= self.convergence_criteria).all())
+
+    def to_dictionary(self, array: Any) -> Dict[str, float]:
+        """
+        Converts values in variable order into a plain dictionary keyed by decision variable name, as reported in a
+        SearchReturnType
+
+        :param array: An array of values in variable order, such as x_base
+        :return: A dictionary from decision variable name to value
+        """
+        return dict(zip(self.names, array.tolist()))
@@ -8,6 +8,7 @@ import collections
 from mypyopt.project_structure import ProjectStructure
 from mypyopt.input_output import InputOutputManager
 from mypyopt.decision_variable import DecisionVariable
+from mypyopt.objectives import CalibrationObjective
 from mypyopt.optimizer_heuristic_search import HeuristicSearch
 
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
@@ -33,12 +34,8 @@ def sim_quadratic(parameter_hash):
     return [parameter_hash['a'] + parameter_hash['b'] * x + parameter_hash['c'] * (x ** 2) for x in x_values]
 
 
-# Squared Error expression
-def sum_sq_err_quadratic(sim_values):
-    x_values = [-5, -4, -3, -2, -1, 0, 1, 2, 3, 4, 5]
-    actual_values = [1 + 2 * x + 3 * (x ** 2) for x in x_values]
-    sqe = [(q - r) ** 2 for q, r in zip(actual_values, sim_values)]
-    return sum(sqe)
+# Squared Error expression, against the known polynomial evaluated once
+sum_sq_err_quadratic = CalibrationObjective([1 + 2 * x + 3 * (x ** 2) for x in [-5, -4, -3, -2, -1, 0, 1, 2, 3, 4, 5]])
 
 
 class MyApp(Tk):
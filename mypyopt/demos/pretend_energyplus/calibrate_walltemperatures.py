@@ -4,33 +4,45 @@ from pathlib import Path
 from mypyopt.project_structure import ProjectStructure
 from mypyopt.input_output import InputOutputManager
 from mypyopt.decision_variable import DecisionVariable
+from mypyopt.objectives import CalibrationObjective
 from mypyopt.optimizer_heuristic_search import HeuristicSearch
-from mypyopt.demos.pretend_energyplus.pretend_energyplus import pretend_e_plus
+from mypyopt.simulation_adapter import SimulationAdapter
+from mypyopt.demos.pretend_energyplus.pretend_energyplus import pretend_e_plus_files, pretend_e_plus_hourly
 
 this_dir = Path(__file__).resolve().parent
 
+# the template is read once, and each evaluation gets a reusable scratch directory to run in
+adapter = SimulationAdapter.from_file(this_dir / 'in_template.json', input_file_name='in.json')
 
-# Actual "simulation"
+
+def write_pretend_input(parameter_hash):
+    return adapter.render(parameter_hash)
+
+
+def run_pretend_energyplus(run_directory):
+    # pretend we are doing a subprocess call out to EnergyPlus.exe in the run directory
+    pretend_e_plus_files(str(run_directory))
+    return adapter.read_csv(run_directory / 'out.csv', ['Surface Inside Temperature [C]'])[0]
+
+
+# Actual "simulation", writing the input file into a scratch directory and reading back the csv output
 def sim_pretend_energyplus(parameter_hash):
-    resistance_value = parameter_hash['wall_resistance']
-    min_outdoor_temp = parameter_hash['min_outdoor_temp']
-    template_contents = (this_dir / 'in_template.json').read_text()
-    new_contents = template_contents.replace('{wall_resistance}',
-                                             str(resistance_value)).replace('{min_outdoor_temp}', str(min_outdoor_temp))
-    # pretend we are writing new_contents to a real IDF/EpJSON file
-    # pretend we are doing a subprocess call out to EnergyPlus.exe
-    csv_data = pretend_e_plus(new_contents)
-    surface_temps = [x[1] for x in csv_data]
-    return surface_temps
-
-
-# Squared Error expression
-def sum_sq_err_pretend_energyplus(sim_values):
-    measured_temps = [22.790, 22.519, 22.789, 22.736, 22.948, 22.827, 22.988, 22.921,
-                      23.204, 23.211, 23.351, 23.678, 24.236, 24.062, 24.319, 24.535,
-                      24.735, 23.987, 23.947, 23.436, 23.465, 23.094, 22.904, 22.532]
-    sqe = [(a - b) ** 2 for a, b in zip(measured_temps, sim_values)]
-    return sum(sqe)
+    return adapter.run(parameter_hash, run_pretend_energyplus)
+
+
+# The same "simulation", streaming each hour of results as it is calculated, so that the optimizer can stop
+# simulating a candidate as soon as its partial error is already worse than the best point so far
+def sim_pretend_energyplus_streaming(parameter_hash):
+    new_contents = write_pretend_input(parameter_hash)
+    for hour, surface_temp in pretend_e_plus_hourly(new_contents):
+        yield [surface_temp]
+
+
+# Squared Error expression, comparing the hours simulated so far with the measured data, which is loaded once
+measured_temps = [22.790, 22.519, 22.789, 22.736, 22.948, 22.827, 22.988, 22.921,
+                  23.204, 23.211, 23.351, 23.678, 24.236, 24.062, 24.319, 24.535,
+                  24.735, 23.987, 23.947, 23.436, 23.465, 23.094, 22.904, 22.532]
+sum_sq_err_pretend_energyplus = CalibrationObjective(measured_temps, 'sse')
 
 
 def run():
@@ -48,7 +60,7 @@ def run():
                            project_name='RunPretendEnergyPlus',
                            output_dir_path=Path(__file__).resolve().parent.parent.parent / 'projects', verbose=True
                            )
-    searcher = HeuristicSearch(sim, dvs, sim_pretend_energyplus, sum_sq_err_pretend_energyplus, io)
+    searcher = HeuristicSearch(sim, dvs, sim_pretend_energyplus_streaming, sum_sq_err_pretend_energyplus, io)
     searcher.search()
 
 
@@ -5,6 +5,7 @@ from pathlib import Path
 from mypyopt.project_structure import ProjectStructure
 from mypyopt.input_output import InputOutputManager
 from mypyopt.decision_variable import DecisionVariable
+from mypyopt.objectives import CalibrationObjective
 from mypyopt.optimizer_heuristic_search import HeuristicSearch
 from mypyopt.demos.wall_temperature.calculate_wall_temperature import calculate_wall_temp
 
@@ -15,12 +16,8 @@ def sim_wall_heat_transfer(parameter_hash):
     return [calculate_wall_temp(resistance_value)]
 
 
-# Squared Error expression
-def sum_sq_err_wall_heat_flux(sim_values):
-    measured_heat_flux = 0.5
-    simulated_heat_flux = sim_values[0]
-    sqe = (measured_heat_flux - simulated_heat_flux) ** 2
-    return sqe
+# Squared Error expression, against the single measured heat flux
+sum_sq_err_wall_heat_flux = CalibrationObjective([0.5], 'sse')
 
 
 def run():
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+
+import argparse
+import importlib
+import itertools
+from multiprocessing.managers import BaseManager
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import uuid
+
+from mypyopt.cancel_token import CancelToken
+from mypyopt.evaluator import Evaluator, aborted_evaluation, evaluate_point
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.return_state_enum import ReturnStateEnum
+
+# these only exist inside the broker server process, the driver and the workers reach them through proxies
+_task_queue: queue.Queue = queue.Queue()
+_result_queue: queue.Queue = queue.Queue()
+
+
+def _get_task_queue() -> queue.Queue:
+    return _task_queue
+
+
+def _get_result_queue() -> queue.Queue:
+    return _result_queue
+
+
+class _BrokerManager(BaseManager):
+    pass
+
+
+_BrokerManager.register('tasks', callable=_get_task_queue)
+_BrokerManager.register('results', callable=_get_result_queue)
+
+
+class DistributedEvaluator(Evaluator):
+    """
+    This class hands points out to worker processes through a work queue, so that the simulations of a large
+    calibration campaign can run on several machines.  The evaluator starts a small broker, a
+    multiprocessing.managers server holding a task queue and a result queue, and any number of workers attach to it
+    with run_worker, from this machine or any other that can reach the address and knows the authentication key.
+
+    Each worker announces the tasks it starts and sends a heartbeat while it runs them.  When a worker goes quiet for
+    longer than worker_timeout, the tasks it held are put back on the queue for another worker, as is a task that left
+    the queue and was not announced within worker_timeout, since the worker that took it died before starting it.  A
+    task whose callback raised is retried the same way, up to max_retries times before the evaluation is abandoned with
+    the UnsuccessfulOther state, which ends the search through its usual path.  Once any copy of a task handed out more
+    than once returns, the other copies still waiting on the queue are withdrawn.  Results are always returned in the
+    order the points were given.
+    """
+
+    def __init__(self, authkey: bytes, address: Tuple[str, int] = ('127.0.0.1', 0), workers: int = 1,
+                 worker_timeout: float = 30.0, task_timeout: Optional[float] = None, max_retries: int = 3,
+                 poll_interval: float = 0.1):
+        """
+        The constructor for the class, which starts the broker
+
+        :param authkey: The authentication key workers must present to attach to the broker; the queues carry pickled
+                        data, so use a secret key and only listen on networks the workers are trusted on
+        :param address: The host and port the broker listens on; the default only accepts workers on this machine and
+                        picks a free port, use something like ('0.0.0.0', 50000) to accept workers on other hosts
+        :param workers: The number of points to hand out at once, usually the number of attached workers
+        :param worker_timeout: The number of seconds without a message from a worker after which it is considered
+                               lost and its tasks are handed to another worker
+        :param task_timeout: An optional number of seconds a worker may spend on a task, counted from when it announced
+                             starting it, after which the task is handed out again; time spent waiting on the queue
+                             for a free worker does not count
+        :param max_retries: The number of times a task is handed out again before the evaluation is abandoned
+        :param poll_interval: The number of seconds to wait for each result before checking for lost workers
+        :raises MyPyOptException: If any of the timing or retry arguments are out of range
+        """
+        super().__init__(workers)
+        if workers < 1:
+            raise MyPyOptException("workers must be at least 1, aborting...")
+        if worker_timeout <= 0 or (task_timeout is not None and task_timeout <= 0) or poll_interval <= 0:
+            raise MyPyOptException("worker_timeout, task_timeout and poll_interval must be positive, aborting...")
+        if max_retries < 0:
+            raise MyPyOptException("max_retries must not be negative, aborting...")
+        self.worker_timeout = worker_timeout
+        self.task_timeout = task_timeout
+        self.max_retries = max_retries
+        self.poll_interval = poll_interval
+        self.retries = 0
+        self._task_ids = itertools.count()
+        self._last_seen: Dict[str, float] = dict()
+        self._manager = _BrokerManager(address=address, authkey=authkey)
+        self._manager.start()
+        self.address = self._manager.address
+        self._tasks = self._manager.tasks()
+        self._results = self._manager.results()
+
+    def evaluate(self, parameter_hashes: List[Dict[str, float]], bound: Optional[float] = None,
+                 cancel_token: Optional[CancelToken] = None) -> List[ObjectiveEvaluation]:
+        """
+        Puts the points on the task queue and waits for the workers to evaluate all of them
+
+        :param parameter_hashes: A list of parameter dictionaries, one for each point to evaluate
+        :param bound: An optional objective value above which the points are of no interest, handed to the workers
+                      with each task so that streaming simulations can be terminated early
+        :param cancel_token: An optional CancelToken; once it is cancelled, the tasks not yet taken by a worker are
+                             withdrawn from the queue, and the evaluations not yet done are returned as UserAborted
+                             within a poll interval, while the workers finish the tasks they already hold
+        :return: A list of ObjectiveEvaluation instances, one for each point; a point that could not be evaluated
+                 within max_retries retries has the UnsuccessfulOther state
+        """
+        evaluations: List[Optional[ObjectiveEvaluation]] = [None] * len(parameter_hashes)
+        attempts = [0] * len(parameter_hashes)
+        # task id to point index, kept for tasks that were handed out again in case the first result arrives after all
+        pending: Dict[int, int] = dict()
+        started: Dict[int, float] = dict()
+        owners: Dict[int, str] = dict()
+        # task id to when the task was put on the queue, or last found still waiting there, until it is announced,
+        # and the tasks found gone from the queue without being announced
+        queued: Dict[int, float] = dict()
+        taken = set()
+        retried = set()
+
+        def settle(index: int, evaluation: ObjectiveEvaluation) -> None:
+            evaluations[index] = evaluation
+            superseded = {t for t, i in pending.items() if i == index}
+            for t in superseded:
+                del pending[t]
+            # copies still on the queue would only keep the workers busy with a point that is done
+            self._withdraw(superseded)
+
+        def submit(index: int, reason: str = '') -> None:
+            if attempts[index] > self.max_retries:
+                message = 'Evaluation failed after ' + str(attempts[index]) + ' attempts: ' + reason
+                settle(index, ObjectiveEvaluation(ReturnStateEnum.UnsuccessfulOther, -999999, message))
+                return
+            attempts[index] += 1
+            task_id = next(self._task_ids)
+            pending[task_id] = index
+            queued[task_id] = time.monotonic()
+            self._tasks.put((task_id, parameter_hashes[index], bound))
+
+        def retry(task_id: int, reason: str) -> None:
+            retried.add(task_id)
+            index = pending[task_id]
+            if attempts[index] <= self.max_retries:
+                self.retries += 1
+            submit(index, reason)
+
+        for i in range(len(parameter_hashes)):
+            submit(i)
+        while pending:
+            if cancel_token is not None and cancel_token.cancelled:
+                self._withdraw(set(pending))
+                return [e if e is not None else aborted_evaluation() for e in evaluations]
+            try:
+                kind, worker_id, task_id, payload = self._results.get(timeout=self.poll_interval)
+                self._last_seen[worker_id] = time.monotonic()
+            except queue.Empty:
+                kind = task_id = None
+            if task_id in pending:
+                if kind == 'started':
+                    queued.pop(task_id, None)
+                    owners[task_id] = worker_id
+                    started[task_id] = time.monotonic()
+                elif kind == 'done':
+                    settle(pending[task_id], payload)
+                elif kind == 'error' and task_id not in retried:
+                    retry(task_id, payload)
+            now = time.monotonic()
+            for task_id in [t for t in pending if t not in retried]:
+                if task_id not in pending:
+                    # an earlier retry in this loop gave up on the point
+                    continue
+                worker_id = owners.get(task_id)
+                if worker_id is not None and now - self._last_seen[worker_id] > self.worker_timeout:
+                    retry(task_id, 'worker ' + worker_id + ' was lost')
+                elif task_id in started and self.task_timeout is not None and \
+                        now - started[task_id] > self.task_timeout:
+                    retry(task_id, 'no result within the task timeout')
+            unannounced = [t for t in pending if t in queued and t not in retried and
+                           now - queued[t] > self.worker_timeout]
+            if unannounced:
+                # a task gone from the queue has been taken by a worker, which gets worker_timeout from then to announce
+                # it, after which it is taken to have died before starting the task
+                waiting = self._withdraw(set()) if any(t not in taken for t in unannounced) else set()
+                for task_id in unannounced:
+                    if task_id not in pending:
+                        continue
+                    if task_id in waiting or task_id not in taken:
+                        queued[task_id] = now
+                        if task_id not in waiting:
+                            taken.add(task_id)
+                    else:
+                        del queued[task_id]
+                        retry(task_id, 'the worker that took the task was lost before starting it')
+        return evaluations
+
+    def _withdraw(self, task_ids: set) -> set:
+        """
+        Takes the given tasks back off the task queue, putting any other tasks found there back
+
+        :return: The ids of the tasks put back, which were still waiting for a worker
+        """
+        others = list()
+        while True:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task[0] not in task_ids:
+                others.append(task)
+        for task in others:
+            self._tasks.put(task)
+        return {task[0] for task in others}
+
+    def evaluates_in_batches(self) -> bool:
+        """
+        Handing points out one at a time would leave all but one worker idle, so the distributed evaluator always
+        prefers batches
+
+        :return: True
+        """
+        return True
+
+    def close(self) -> None:
+        """
+        Shuts down the broker; attached workers notice the lost connection and exit
+        """
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+def run_worker(address: Tuple[str, int], authkey: bytes, callback_f_of_x: Callable[[Dict[str, float]], Any],
+               callback_objective: Callable[[Any], List[float]], heartbeat_interval: float = 1.0,
+               poll_interval: float = 0.5) -> int:
+    """
+    Attaches to the broker of a DistributedEvaluator and evaluates tasks until the broker shuts down
+
+    :param address: The host and port of the broker
+    :param authkey: The authentication key of the broker
+    :param callback_f_of_x: The user simulation function
+    :param callback_objective: The user objective function
+    :param heartbeat_interval: The number of seconds between heartbeats, which must be well below the worker_timeout
+                               of the evaluator
+    :param poll_interval: The number of seconds to wait for each task before checking again
+    :return: The number of tasks this worker evaluated
+    """
+    manager = _BrokerManager(address=address, authkey=authkey)
+    manager.connect()
+    tasks = manager.tasks()
+    results = manager.results()
+    worker_id = socket.gethostname() + ':' + str(os.getpid()) + ':' + str(uuid.uuid4())[0:8]
+    stop = threading.Event()
+
+    def heartbeat() -> None:
+        while not stop.wait(heartbeat_interval):
+            try:
+                results.put(('heartbeat', worker_id, None, None))
+            except (EOFError, OSError):
+                return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    count = 0
+    try:
+        while True:
+            try:
+                task_id, parameter_hash, bound = tasks.get(timeout=poll_interval)
+            except queue.Empty:
+                continue
+            results.put(('started', worker_id, task_id, None))
+            try:
+                evaluation = evaluate_point(callback_f_of_x, callback_objective, parameter_hash, bound)
+            except Exception as e:
+                results.put(('error', worker_id, task_id, repr(e)))
+                continue
+            results.put(('done', worker_id, task_id, evaluation))
+            count += 1
+    except (EOFError, OSError):
+        # the broker shut down, which is how a campaign ends
+        return count
+    finally:
+        stop.set()
+
+
+def _load_callable(reference: str) -> Callable:
+    module_name, _, function_name = reference.partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Attach a worker to a MyPyOpt distributed evaluator')
+    parser.add_argument('--host', required=True, help='The host name or address of the broker')
+    parser.add_argument('--port', required=True, type=int, help='The port of the broker')
+    parser.add_argument('--authkey', default=os.environ.get('MYPYOPT_AUTHKEY'),
+                        help='The authentication key of the broker, defaults to the MYPYOPT_AUTHKEY variable')
+    parser.add_argument('--simulation', required=True, help='The simulation function, as module:function')
+    parser.add_argument('--objective', required=True, help='The objective function, as module:function')
+    options = parser.parse_args(args)
+    if not options.authkey:
+        parser.error('an authentication key is required')
+    run_worker((options.host, options.port), options.authkey.encode(), _load_callable(options.simulation),
+               _load_callable(options.objective))
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+import json
+from typing import TYPE_CHECKING, Dict, Optional
+
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.return_state_enum import ReturnStateEnum
+
+if TYPE_CHECKING:  # pathlib is slow to import and only needed for the annotations
+    from pathlib import Path
+
+
+class EvaluationCache:
+    """
+    This class memoizes objective evaluations keyed on the parameter values, so that returning to a point that was
+    already visited does not cost another simulation.  Recent evaluations are kept in an in-memory LRU, and they can
+    optionally be persisted to a SQLite database so that they survive across runs of the same project.  The objective
+    values are stored there as JSON, never pickled, so a database file shared with others cannot run code when read.
+    """
+    def __init__(self, max_entries: int = 1024, decimals: int = 10, database_path: Optional['Path'] = None):
+        """
+        The constructor for this class
+
+        :param max_entries: The maximum number of evaluations to keep in memory before dropping the least recently used
+        :param decimals: The number of decimal places each parameter value is rounded to when building the cache key,
+                         so points closer together than this tolerance are considered identical
+        :param database_path: An optional path to a SQLite database file, typically in the project output folder; if
+                              given, every evaluation is also stored there and looked up when not found in memory
+        :raises MyPyOptException: If the max entries argument is invalid
+        """
+        if max_entries < 1:
+            raise MyPyOptException("Evaluation cache must allow at least one entry, aborting...")
+        self.max_entries = max_entries
+        self.decimals = decimals
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._connection = None
+        if database_path is not None:
+            import sqlite3
+            self._connection = sqlite3.connect(str(database_path))
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS evaluations (key TEXT PRIMARY KEY, state INTEGER, value BLOB, message TEXT)'
+            )
+            self._connection.commit()
+
+    def key(self, parameter_hash: Dict[str, float]) -> str:
+        """
+        Builds the cache key for a point; the key does not depend on the order of the dictionary entries
+
+        :param parameter_hash: A dictionary of parameters with keys as the variable names, and current variable values
+        :return: A string key with every value rounded to the configured number of decimal places
+        """
+        # adding zero normalizes negative zero so that it shares a key with positive zero
+        return json.dumps(sorted((k, round(float(v), self.decimals) + 0.0) for k, v in parameter_hash.items()))
+
+    def get(self, parameter_hash: Dict[str, float]) -> Optional[ObjectiveEvaluation]:
+        """
+        Looks up a previous evaluation of a point, updating the hit and miss counters
+
+        :param parameter_hash: A dictionary of parameters with keys as the variable names, and current variable values
+        :return: The cached ObjectiveEvaluation, or None if this point has not been evaluated
+        """
+        key = self.key(parameter_hash)
+        evaluation = self._memory.get(key)
+        if evaluation is not None:
+            self._memory.move_to_end(key)
+        elif self._connection is not None:
+            row = self._connection.execute(
+                'SELECT state, value, message FROM evaluations WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None:
+                try:
+                    evaluation = ObjectiveEvaluation(row[0], json.loads(row[1]), row[2])
+                except (TypeError, ValueError):
+                    # a value that is not JSON, such as one pickled by an older version, is evaluated again
+                    evaluation = None
+                else:
+                    self._remember(key, evaluation)
+        if evaluation is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return evaluation
+
+    def put(self, parameter_hash: Dict[str, float], evaluation: ObjectiveEvaluation) -> None:
+        """
+        Stores an evaluation of a point.  Unexpected failures and aborted evaluations are not stored, since repeating
+        them could give a different answer.
+
+        :param parameter_hash: A dictionary of parameters with keys as the variable names, and current variable values
+        :param evaluation: The ObjectiveEvaluation found at this point
+        """
+        if evaluation.return_state not in (ReturnStateEnum.Successful, ReturnStateEnum.InfeasibleObj):
+            return
+        key = self.key(parameter_hash)
+        self._remember(key, evaluation)
+        if self._connection is not None:
+            # numpy values are written as the plain floats or lists of floats they hold
+            value = json.dumps(evaluation.value, default=lambda v: v.tolist())
+            self._connection.execute(
+                'INSERT OR REPLACE INTO evaluations (key, state, value, message) VALUES (?, ?, ?, ?)',
+                (key, evaluation.return_state, value, evaluation.message)
+            )
+            self._connection.commit()
+
+    def _remember(self, key: str, evaluation: ObjectiveEvaluation) -> None:
+        self._memory[key] = evaluation
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def close(self) -> None:
+        """
+        Closes the SQLite database, if one is in use; the in-memory entries remain available
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
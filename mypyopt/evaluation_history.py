@@ -0,0 +1,112 @@
+from array import array
+import json
+import os
+import sys
+from typing import Any, Dict, List
+
+from mypyopt.decision_variable_set import ParameterView
+
+
+class EvaluationHistory:
+    """
+    This class stores every objective evaluation of a run as fixed width rows of 64-bit floats in an append-only binary
+    file, history.bin, described by a small JSON header, history.json.  Each row holds the iteration number, the index
+    of the decision variable that was perturbed (-1 for points that are not tied to a single variable), the
+    ReturnStateEnum state, the objective value, and then the value of every decision variable.  Rows are buffered in
+    memory and appended in batches, and the file can be memory-mapped for analysis without parsing any text.
+    """
+
+    data_file_name = 'history.bin'
+    """The name of the binary data file written inside each run directory"""
+
+    header_file_name = 'history.json'
+    """The name of the header file describing the binary data file"""
+
+    leading_columns = ['iteration', 'variable_index', 'state', 'objective']
+    """The columns stored ahead of the decision variable values in each row"""
+
+    def __init__(self, run_dir: str, variable_names: List[str], buffer_size: int = 256):
+        """
+        The constructor for this class, which writes the header and an empty data file
+
+        :param run_dir: The run directory to write the history files into
+        :param variable_names: The decision variable names, in the order their values are stored in each row
+        :param buffer_size: The number of rows to hold in memory before appending them to the data file
+        """
+        self.variable_names = variable_names
+        self.buffer_size = buffer_size
+        self.row_count = 0
+        self._data_path = os.path.join(run_dir, self.data_file_name)
+        self._rows = array('d')
+        self._buffered = 0
+        header = dict()
+        header['columns'] = self.leading_columns + variable_names
+        header['variable_names'] = variable_names
+        header['dtype'] = '<f8'
+        with open(os.path.join(run_dir, self.header_file_name), 'w') as f:
+            f.write(json.dumps(header, indent=2))
+        open(self._data_path, 'wb').close()
+
+    def append(self, iteration: int, variable_index: int, parameter_hash: Dict[str, float], state: int,
+               objective: Any) -> None:
+        """
+        Adds one evaluation to the history
+
+        :param iteration: The iteration number the evaluation belongs to
+        :param variable_index: The index of the decision variable that was perturbed, or -1
+        :param parameter_hash: The point that was evaluated
+        :param state: The ReturnStateEnum state of the evaluation
+        :param objective: The objective value; values that are not scalar numbers are stored as NaN
+        """
+        try:
+            objective = float(objective)
+        except (TypeError, ValueError):
+            objective = float('nan')
+        self._rows.extend((iteration, variable_index, state, objective))
+        if isinstance(parameter_hash, ParameterView):
+            self._rows.extend(parameter_hash.array.tolist())
+        else:
+            self._rows.extend(parameter_hash[name] for name in self.variable_names)
+        self.row_count += 1
+        self._buffered += 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Appends all buffered rows to the data file
+        """
+        if self._buffered:
+            with open(self._data_path, 'ab') as f:
+                if sys.byteorder == 'big':  # pragma: no cover -- the file is always little endian
+                    self._rows.byteswap()
+                self._rows.tofile(f)
+            self._rows = array('d')
+            self._buffered = 0
+
+    @staticmethod
+    def load(run_dir: str) -> Dict[str, Any]:
+        """
+        Loads the history of a run as numpy arrays, memory-mapped from the data file rather than read into memory
+
+        :param run_dir: The run directory of a run
+        :return: A dictionary with the one dimensional arrays iteration, variable_index, state and objective, the
+                 two dimensional array x with one column per decision variable, and the list variable_names
+        """
+        import numpy as np
+        with open(os.path.join(run_dir, EvaluationHistory.header_file_name)) as f:
+            header = json.loads(f.read())
+        data_path = os.path.join(run_dir, EvaluationHistory.data_file_name)
+        width = len(header['columns'])
+        if os.path.getsize(data_path) == 0:
+            rows = np.zeros((0, width), dtype=header['dtype'])
+        else:
+            rows = np.memmap(data_path, dtype=header['dtype'], mode='r').reshape(-1, width)
+        history = dict()
+        history['iteration'] = rows[:, 0].astype(int)
+        history['variable_index'] = rows[:, 1].astype(int)
+        history['state'] = rows[:, 2].astype(int)
+        history['objective'] = rows[:, 3]
+        history['x'] = rows[:, len(EvaluationHistory.leading_columns):]
+        history['variable_names'] = header['variable_names']
+        return history
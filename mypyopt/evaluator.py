@@ -0,0 +1,259 @@
+from collections.abc import Iterator
+from functools import partial
+import numbers
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.return_state_enum import ReturnStateEnum
+
+if TYPE_CHECKING:
+    from mypyopt.cancel_token import CancelToken
+
+
+def evaluate_point(
+        callback_f_of_x: Callable[[Dict[str, float]], Any], callback_objective: Callable[[Any], List[float]],
+        parameter_hash: Dict[str, float], bound: Optional[float] = None
+) -> ObjectiveEvaluation:
+    """
+    Runs the simulation callback at a single point and passes the results through the objective callback.
+    This is a module level function so that it can be shipped to a process pool along with the user callbacks.
+
+    The simulation callback may also stream its results, by being a generator, or returning any other iterator, that
+    yields them a list at a time, for example a month of hourly values per list.  The objective callback is then
+    called on all the results received so far after each list, and if its value already exceeds the bound, the
+    simulation is closed without running the rest.  This relies on the objective never decreasing as results are
+    added, which holds for a sum of squared errors.  Since every call sees all of the results again, the cost of a
+    streamed evaluation grows with the square of the number of lists, so an objective callback may instead have an
+    accumulator method, as CalibrationObjective does, returning an object whose add method takes each list in turn
+    and returns the objective value over all of the results added so far.
+
+    :param callback_f_of_x: The user simulation function, which should return None if it failed
+    :param callback_objective: The user objective function, which accepts whatever the simulation function returned
+    :param parameter_hash: A dictionary of parameters with keys as the variable names, and current variable values
+    :param bound: An optional objective value above which the point is of no interest, so that a streaming
+                  simulation can be terminated as soon as its partial objective value exceeds it
+    :return: An ObjectiveEvaluation instance describing the outcome at this point
+    """
+    start = time.perf_counter()
+    simulation_results = callback_f_of_x(parameter_hash)
+    if isinstance(simulation_results, Iterator):
+        return _evaluate_stream(simulation_results, callback_objective, bound, start)
+    simulated = time.perf_counter()
+    # the sim function should return None if it failed (for now)
+    if has_results(simulation_results):
+        error_to_minimize = callback_objective(simulation_results)
+        evaluation = ObjectiveEvaluation(ReturnStateEnum.Successful, error_to_minimize)
+        evaluation.objective_seconds = time.perf_counter() - simulated
+    else:
+        evaluation = ObjectiveEvaluation(ReturnStateEnum.InfeasibleObj, -999999,
+                                         'Function f(x) failed, probably infeasible output')
+    evaluation.simulate_seconds = simulated - start
+    return evaluation
+
+
+def has_results(simulation_results: Any) -> bool:
+    """
+    Tells whether a simulation returned results, which a numpy array does unless it is empty, as it has no truth value
+
+    :param simulation_results: What the simulation callback returned
+    :return: True if there are results to pass to the objective callback
+    """
+    size = getattr(simulation_results, 'size', None)
+    if isinstance(size, int):
+        return size > 0
+    return bool(simulation_results)
+
+
+def _evaluate_stream(chunks: Iterator, callback_objective: Callable[[Any], List[float]], bound: Optional[float],
+                     start: float) -> ObjectiveEvaluation:
+    accumulator = getattr(callback_objective, 'accumulator', None)
+    accumulator = accumulator() if accumulator is not None else None
+    results: List[Any] = list()
+    count = 0
+    error_to_minimize = None
+    objective_seconds = 0.0
+    evaluation = None
+    try:
+        for chunk in chunks:
+            if chunk is None:
+                evaluation = ObjectiveEvaluation(ReturnStateEnum.InfeasibleObj, -999999,
+                                                 'Function f(x) failed part way through, probably infeasible output')
+                break
+            count += len(chunk)
+            if accumulator is None:
+                results.extend(chunk)
+                if bound is None:
+                    continue
+            received = time.perf_counter()
+            if accumulator is not None:
+                error_to_minimize = accumulator.add(chunk)
+            else:
+                error_to_minimize = callback_objective(results)
+            objective_seconds += time.perf_counter() - received
+            if bound is not None and isinstance(error_to_minimize, numbers.Real) and error_to_minimize > bound:
+                evaluation = ObjectiveEvaluation(ReturnStateEnum.Terminated, error_to_minimize,
+                                                 'Terminated after ' + str(count) + ' results, the partial '
+                                                 'objective value already exceeded ' + str(bound))
+                break
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+    if evaluation is None and not count:
+        evaluation = ObjectiveEvaluation(ReturnStateEnum.InfeasibleObj, -999999,
+                                         'Function f(x) failed, probably infeasible output')
+    if evaluation is None:
+        if error_to_minimize is None:
+            received = time.perf_counter()
+            error_to_minimize = callback_objective(results)
+            objective_seconds += time.perf_counter() - received
+        evaluation = ObjectiveEvaluation(ReturnStateEnum.Successful, error_to_minimize)
+    # the simulation time is everything outside of the objective callback, including closing the simulation
+    evaluation.objective_seconds = objective_seconds
+    evaluation.simulate_seconds = time.perf_counter() - start - objective_seconds
+    return evaluation
+
+
+def aborted_evaluation() -> ObjectiveEvaluation:
+    """
+    Creates the evaluation of a point that was given up on because the search was cancelled
+
+    :return: An ObjectiveEvaluation with the UserAborted state
+    """
+    return ObjectiveEvaluation(ReturnStateEnum.UserAborted, -999999, 'Evaluation was cancelled')
+
+
+class Evaluator:
+    """
+    This is a base class of an Evaluator, which runs the simulation and objective callbacks for an Optimizer.
+    Optimizers hand every point they need evaluated to their evaluator, so the place the work actually happens, in
+    this process, in a local worker pool, or on other machines entirely, can be swapped without touching the search.
+    """
+
+    def __init__(self, workers: int = 1):
+        """
+        The constructor for the class.
+
+        :param workers: The number of points the evaluator can work on at once, which optimizers use to decide how
+                        many points to gather into each call to evaluate
+        """
+        self.workers = workers
+
+    def evaluate(self, parameter_hashes: List[Dict[str, float]], bound: Optional[float] = None,
+                 cancel_token: Optional['CancelToken'] = None) -> List[ObjectiveEvaluation]:
+        """
+        Evaluates a batch of points.  The results must be returned in the same order as the points were given,
+        regardless of the order in which the individual evaluations finish.
+
+        :param parameter_hashes: A list of parameter dictionaries, one for each point to evaluate
+        :param bound: An optional objective value above which the points are of no interest, which evaluators pass
+                      on to evaluate_point so that streaming simulations can be terminated early
+        :param cancel_token: An optional CancelToken; once it is cancelled, evaluators stop waiting for the points
+                             still in flight and return them with the UserAborted state
+        :return: A list of ObjectiveEvaluation instances, one for each point
+        """
+        raise MyPyOptException(
+            "Tried to use evaluate() on the Evaluator base class; verify derived class overrides this method")
+
+    def evaluates_in_batches(self) -> bool:
+        """
+        Tells optimizers whether evaluating several points at once is cheaper than evaluating them one at a time
+
+        :return: True if points should be gathered into batches
+        """
+        return self.workers > 1
+
+    def close(self) -> None:
+        """
+        Releases any resources held by the evaluator; the base class holds none
+        """
+        pass
+
+
+class LocalEvaluator(Evaluator):
+    """
+    This class evaluates points on the local machine, either serially in this process or in a pool of worker threads
+    or processes.  It is the evaluator an Optimizer creates from the project settings when none is given.
+    """
+
+    def __init__(self, callback_f_of_x: Callable[[Dict[str, float]], Any],
+                 callback_objective: Callable[[Any], List[float]], workers: int = 1, executor: str = 'thread'):
+        """
+        The constructor for the class.
+
+        :param callback_f_of_x: The user simulation function, as passed to the Optimizer
+        :param callback_objective: The user objective function, as passed to the Optimizer
+        :param workers: The number of f(x) evaluations that may run concurrently; 1 evaluates serially
+        :param executor: The kind of worker pool used when workers is greater than 1, either 'thread' or 'process'
+        """
+        super().__init__(workers)
+        self.callback_f_of_x = callback_f_of_x
+        self.callback_objective = callback_objective
+        self.executor = executor
+        # the pool is only created, and concurrent.futures only imported, once there is work for it
+        self._pool: Optional[Any] = None
+        self._abandoned = False
+
+    def evaluate(self, parameter_hashes: List[Dict[str, float]], bound: Optional[float] = None,
+                 cancel_token: Optional['CancelToken'] = None) -> List[ObjectiveEvaluation]:
+        """
+        Evaluates a batch of points, concurrently if more than one worker is allowed.  When the cancel token is
+        cancelled, points that have not started are dropped and the search stops waiting on those that are running;
+        their workers are left to finish in the background, since a running thread or process cannot be stopped safely.
+
+        :param parameter_hashes: A list of parameter dictionaries, one for each point to evaluate
+        :param bound: An optional objective value above which the points are of no interest, see evaluate_point
+        :param cancel_token: An optional CancelToken to stop waiting on the evaluations
+        :return: A list of ObjectiveEvaluation instances, one for each point
+        """
+        if self.workers == 1 or len(parameter_hashes) <= 1:
+            evaluations = list()
+            for p in parameter_hashes:
+                if cancel_token is not None and cancel_token.cancelled:
+                    evaluations.append(aborted_evaluation())
+                else:
+                    evaluations.append(evaluate_point(self.callback_f_of_x, self.callback_objective, p, bound))
+            return evaluations
+        from concurrent import futures
+        if self._pool is None:
+            if self.executor == 'process':
+                self._pool = futures.ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = futures.ThreadPoolExecutor(max_workers=self.workers)
+        worker = partial(evaluate_point, self.callback_f_of_x, self.callback_objective, bound=bound)
+        if cancel_token is None:
+            return list(self._pool.map(worker, parameter_hashes))
+
+        # the waiting below ends as soon as either every evaluation is done or this future is, on cancellation
+        cancelled = futures.Future()
+        pending = [self._pool.submit(worker, p) for p in parameter_hashes]
+        remove_callback = cancel_token.add_callback(lambda: cancelled.done() or cancelled.set_result(None))
+        try:
+            waiting = set(pending)
+            while waiting and not cancelled.done():
+                done, _ = futures.wait(waiting | {cancelled}, return_when=futures.FIRST_COMPLETED)
+                waiting -= done
+        finally:
+            remove_callback()
+        evaluations = list()
+        for f in pending:
+            if f.done() and not f.cancelled():
+                evaluations.append(f.result())
+            else:
+                f.cancel()
+                self._abandoned = True
+                evaluations.append(aborted_evaluation())
+        return evaluations
+
+    def close(self) -> None:
+        """
+        Shuts down the worker pool, if one was started; it is recreated on demand if needed again
+        """
+        if self._pool is not None:
+            # evaluations abandoned on cancellation are not waited for; those that had not started were already
+            # cancelled by evaluate, which also keeps this working before Python 3.9 added cancel_futures
+            self._pool.shutdown(wait=not self._abandoned)
+            self._pool = None
+            self._abandoned = False
@@ -0,0 +1,242 @@
+from collections import deque
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from mypyopt.cancel_token import CancelToken
+from mypyopt.evaluator import Evaluator, aborted_evaluation, evaluate_point
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.return_state_enum import ReturnStateEnum
+
+
+def _serve(connection: Any, callback_f_of_x: Callable[[Dict[str, float]], Any],
+           callback_objective: Callable[[Any], List[float]], initializer: Optional[Callable[..., Any]],
+           initargs: Sequence[Any]) -> None:
+    """
+    The main loop of a worker process: runs the initializer once, then evaluates the points it is sent until it is
+    sent None or the evaluator goes away
+    """
+    if initializer is not None:
+        try:
+            initializer(*initargs)
+        except Exception as e:
+            connection.send(('failed', repr(e)))
+            return
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        parameter_hash, bound = task
+        connection.send(('started', None))
+        try:
+            connection.send(('done', evaluate_point(callback_f_of_x, callback_objective, parameter_hash, bound)))
+        except Exception as e:
+            connection.send(('error', repr(e)))
+
+
+class IsolatedEvaluator(Evaluator):
+    """
+    This class evaluates points in long-lived worker processes, each evaluation isolated from the search, so that a
+    simulation that hangs or crashes its interpreter costs one point rather than the whole run.  The workers are
+    started once and reused, so the cost of starting an interpreter, importing the simulation libraries and any setup
+    done by the initializer is paid once per worker rather than once per evaluation.
+
+    An evaluation that runs longer than the timeout has its worker killed, and comes back with the InfeasibleObj state,
+    so the search treats the point as a failed simulation and moves on.  A worker that exits while evaluating a point,
+    from a segmentation fault or a call to os._exit for example, comes back with the crash state, UnsuccessfulOther
+    by default, which ends the search cleanly with its log, history and checkpoints intact.  Either way the worker is
+    replaced before the next point is handed out.  An exception raised by the callbacks is reported as it would be
+    without isolation, by raising a MyPyOptException in the search.
+
+    Unlike threads, the worker processes can be stopped safely, so cancelling the search kills the workers that are
+    still evaluating.  The callbacks and initializer are sent to the workers, so they must be picklable, module level
+    functions for example.
+    """
+
+    def __init__(self, callback_f_of_x: Callable[[Dict[str, float]], Any],
+                 callback_objective: Callable[[Any], List[float]], workers: int = 1, timeout: Optional[float] = None,
+                 initializer: Optional[Callable[..., Any]] = None, initargs: Sequence[Any] = (),
+                 crash_state: int = ReturnStateEnum.UnsuccessfulOther, start_method: Optional[str] = None):
+        """
+        The constructor for the class.  The worker processes are started on the first call to evaluate.
+
+        :param callback_f_of_x: The user simulation function, as passed to the Optimizer
+        :param callback_objective: The user objective function, as passed to the Optimizer
+        :param workers: The number of worker processes, and so the number of points evaluated at once
+        :param timeout: The number of seconds an evaluation may run before its worker is killed, or None for no limit;
+                        the time a new worker spends in the initializer does not count
+        :param initializer: An optional function each worker calls once as it starts, for expensive setup such as
+                            loading weather data or a simulation library
+        :param initargs: The arguments the initializer is called with
+        :param crash_state: The ReturnStateEnum constant of an evaluation whose worker exited; use InfeasibleObj to
+                            have the search carry on past crashing points
+        :param start_method: The multiprocessing start method, such as 'fork' or 'spawn', or None for the default
+        :raises MyPyOptException: If the workers or timeout arguments are invalid
+        """
+        super().__init__(workers)
+        if workers < 1:
+            raise MyPyOptException("workers must be at least 1, aborting...")
+        if timeout is not None and timeout <= 0:
+            raise MyPyOptException("Evaluation timeout must be positive, use None for no timeout, aborting...")
+        self.callback_f_of_x = callback_f_of_x
+        self.callback_objective = callback_objective
+        self.timeout = timeout
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self.crash_state = crash_state
+        self.start_method = start_method
+        self.timeouts = 0
+        self.crashes = 0
+        # one process and connection per worker slot, None until the slot is started or after its worker was lost
+        self._processes: List[Any] = [None] * workers
+        self._connections: List[Any] = [None] * workers
+        self._wake: Optional[Any] = None
+
+    def _start(self, slot: int) -> None:
+        import multiprocessing
+        context = multiprocessing.get_context(self.start_method)
+        parent, child = context.Pipe()
+        process = context.Process(target=_serve, name='mypyopt-worker-' + str(slot), daemon=True,
+                                  args=(child, self.callback_f_of_x, self.callback_objective, self.initializer,
+                                        self.initargs))
+        process.start()
+        child.close()
+        self._processes[slot] = process
+        self._connections[slot] = parent
+
+    def _kill(self, slot: int) -> None:
+        process = self._processes[slot]
+        if process is not None:
+            process.kill()
+            process.join()
+            self._connections[slot].close()
+        self._processes[slot] = None
+        self._connections[slot] = None
+
+    def _send(self, slot: int, task: Any) -> None:
+        if self._processes[slot] is not None:
+            try:
+                self._connections[slot].send(task)
+                return
+            except OSError:
+                # the worker exited while it was idle, so it is replaced without losing the point
+                self._kill(slot)
+        self._start(slot)
+        try:
+            self._connections[slot].send(task)
+        except OSError:
+            # the new worker already exited, as it does when its initializer fails, which _check then reports
+            pass
+
+    def evaluate(self, parameter_hashes: List[Dict[str, float]], bound: Optional[float] = None,
+                 cancel_token: Optional[CancelToken] = None) -> List[ObjectiveEvaluation]:
+        """
+        Evaluates a batch of points on the worker processes, handing each worker a new point as it finishes one
+
+        :param parameter_hashes: A list of parameter dictionaries, one for each point to evaluate
+        :param bound: An optional objective value above which the points are of no interest, see evaluate_point
+        :param cancel_token: An optional CancelToken; once it is cancelled, the workers still evaluating are killed
+                             and the points not yet done are returned with the UserAborted state
+        :return: A list of ObjectiveEvaluation instances, one for each point
+        :raises MyPyOptException: If the callbacks or the initializer raised an exception
+        """
+        from multiprocessing.connection import wait
+        evaluations: List[Optional[ObjectiveEvaluation]] = [None] * len(parameter_hashes)
+        waiting = deque(range(len(parameter_hashes)))
+        # worker slot to the index of the point it is evaluating, and the time it must be done by once it started
+        busy: Dict[int, int] = dict()
+        deadlines: Dict[int, float] = dict()
+        wake_objects = list()
+        remove_callback = None
+        if cancel_token is not None:
+            if self._wake is None:
+                import multiprocessing
+                self._wake = multiprocessing.Pipe(duplex=False)
+            wake_objects.append(self._wake[0])
+            remove_callback = cancel_token.add_callback(lambda: self._wake[1].send(None))
+        try:
+            while waiting or busy:
+                if cancel_token is not None and cancel_token.cancelled:
+                    for slot in busy:
+                        self._kill(slot)
+                    break
+                for slot in range(self.workers):
+                    if waiting and slot not in busy:
+                        busy[slot] = waiting.popleft()
+                        self._send(slot, (parameter_hashes[busy[slot]], bound))
+                wait_seconds = None
+                if deadlines:
+                    wait_seconds = max(min(deadlines.values()) - time.monotonic(), 0.0)
+                connections = [self._connections[s] for s in busy]
+                wait(wake_objects + connections + [self._processes[s].sentinel for s in busy], wait_seconds)
+                for slot in list(busy):
+                    self._check(slot, parameter_hashes[busy[slot]], busy, deadlines, evaluations)
+        except BaseException:
+            # the other busy workers would send their results into the next call, so they are replaced
+            for slot in busy:
+                self._kill(slot)
+            raise
+        finally:
+            if remove_callback is not None:
+                remove_callback()
+            while self._wake is not None and self._wake[0].poll():
+                self._wake[0].recv()
+        return [e if e is not None else aborted_evaluation() for e in evaluations]
+
+    def _check(self, slot: int, parameter_hash: Dict[str, float], busy: Dict[int, int], deadlines: Dict[int, float],
+               evaluations: List[Optional[ObjectiveEvaluation]]) -> None:
+        """
+        Takes in any messages from a busy worker, and deals with it if it timed out or was lost
+        """
+        connection = self._connections[slot]
+        index = busy[slot]
+        try:
+            while connection.poll():
+                kind, payload = connection.recv()
+                if kind == 'started':
+                    if self.timeout is not None:
+                        deadlines[slot] = time.monotonic() + self.timeout
+                elif kind == 'done':
+                    evaluations[index] = payload
+                    del busy[slot]
+                    deadlines.pop(slot, None)
+                    return
+                else:
+                    self._kill(slot)
+                    what = 'The worker initializer' if kind == 'failed' else 'Evaluation at ' + str(parameter_hash)
+                    raise MyPyOptException(what + ' raised ' + payload)
+        except (EOFError, OSError):
+            # the worker closed its end of the pipe by exiting, give it a moment to be reaped
+            self._processes[slot].join(1.0)
+        if not self._processes[slot].is_alive():
+            exit_code = self._processes[slot].exitcode
+            self._kill(slot)
+            self.crashes += 1
+            evaluations[index] = ObjectiveEvaluation(self.crash_state, -999999, 'Worker process exited with code ' +
+                                                     str(exit_code) + ' during the evaluation')
+        elif slot in deadlines and time.monotonic() >= deadlines[slot]:
+            self._kill(slot)
+            self.timeouts += 1
+            evaluations[index] = ObjectiveEvaluation(ReturnStateEnum.InfeasibleObj, -999999,
+                                                     'Evaluation timed out after ' + str(self.timeout) + ' seconds')
+        else:
+            return
+        del busy[slot]
+        deadlines.pop(slot, None)
+
+    def close(self) -> None:
+        """
+        Stops the worker processes, killing any that do not exit promptly; they are started again if needed
+        """
+        for slot in range(self.workers):
+            if self._processes[slot] is None:
+                continue
+            try:
+                self._connections[slot].send(None)
+            except OSError:
+                pass
+            self._processes[slot].join(1.0)
+            self._kill(slot)
@@ -0,0 +1,182 @@
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import math
+import multiprocessing
+import os
+import random
+from typing import Any, Callable, Dict, List, Optional
+
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.optimizer_heuristic_search import HeuristicSearch
+from mypyopt.project_structure import ProjectStructure
+from mypyopt.search_return_type import SearchReturnType
+
+# the best objective value found by any start so far, shared by all the worker processes of a multi-start search
+_shared_best: Any = None
+
+
+def _initialize_worker(shared_best: Any) -> None:
+    global _shared_best
+    _shared_best = shared_best
+
+
+def _run_start(project_settings: ProjectStructure, decision_variables: List[Dict[str, Any]], start_index: int,
+               start_values: List[float], callback_f_of_x: Callable[[Dict[str, float]], Any],
+               callback_objective: Callable[[Any], float], cancel_after: Optional[int],
+               dominance_margin: float, absolute_margin: float) -> SearchReturnType:
+    """
+    Runs one HeuristicSearch from a starting point, sharing its progress through the shared best objective value and
+    stopping early once it is dominated.  This is a module level function so that it can be shipped to a process pool.
+    """
+    project = copy.copy(project_settings)
+    project.project_name = project_settings.project_name + '_start' + str(start_index)
+    project.parallel_workers = 1
+    dvs = [DecisionVariable(d['var_name'], d['value_minimum'], d['value_maximum'], x, d['step_size_initial'],
+                            d['convergence_criteria']) for d, x in zip(decision_variables, start_values)]
+    latest = [float('nan')]
+
+    def progress(iteration: int, objective_value: Any) -> None:
+        try:
+            latest[0] = float(objective_value)
+        except (TypeError, ValueError):
+            raise MyPyOptException("Multi-start search needs the objective function to return a single number.")
+        with _shared_best.get_lock():
+            _shared_best.value = min(_shared_best.value, latest[0])
+            best = _shared_best.value
+        if cancel_after is not None and iteration >= cancel_after and \
+                latest[0] - best > max(dominance_margin * abs(best), absolute_margin):
+            searcher.request_stop()
+
+    searcher = HeuristicSearch(project, dvs, callback_f_of_x, callback_objective, callback_progress=progress)
+    return searcher.search()
+
+
+class MultiStartSearch:
+    """
+    This class runs HeuristicSearch from many starting points at once, spread over the parameter space with a Latin
+    hypercube or Sobol design, to find a better minimum than a single local search would when the objective has more
+    than one basin.  The searches run in a pool of worker processes and share the best objective value found so far;
+    a search that is still far behind it after a number of iterations is dominated, and is cancelled to free its
+    worker for the remaining starts.  The first start is always the initial value of the decision variables.
+
+    The callbacks are shipped to the worker processes, so they must be picklable, module level functions for
+    example, and the objective callback must return a single number.  Each search writes its own run directory,
+    named after the project with the start number appended.  Which runs are cancelled depends on how the searches
+    interleave, so with more than one worker the results can differ from one run to the next.
+    """
+
+    def __init__(
+            self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
+            callback_f_of_x: Callable[[Dict[str, float]], Any], callback_objective: Callable[[Any], float],
+            starts: int = 8, sampling: str = 'lhs', workers: Optional[int] = None, cancel_after: Optional[int] = 20,
+            dominance_margin: float = 0.5, absolute_margin: float = 0.0
+    ):
+        """
+        The constructor for the class.
+
+        :param project_settings: A ProjectStructure instance, used for every search; parallel_workers is ignored
+                                 since the searches themselves run in parallel
+        :param decision_variable_array: An array of DecisionVariable instances defining the parameter space
+        :param callback_f_of_x: The user simulation function, as for HeuristicSearch
+        :param callback_objective: The user objective function, as for HeuristicSearch, returning a single number
+        :param starts: The number of searches to run, including the one from the initial values
+        :param sampling: How the other starting points are spread over the bounds, 'lhs' for a Latin hypercube or
+                         'sobol' for a scrambled Sobol sequence, which needs scipy to be installed
+        :param workers: The number of worker processes; defaults to the number of starts or of processors, whichever
+                        is smaller.  With 1 the searches run one after the other in this process.
+        :param cancel_after: The number of iterations a search runs before it can be cancelled as dominated, or None
+                             to never cancel searches
+        :param dominance_margin: A search is dominated when its objective value is worse than the shared best by more
+                                 than this fraction of the shared best, and by more than the absolute_margin
+        :param absolute_margin: The least amount, in the units of the objective, a search must be behind the shared
+                                best by to be dominated; as the shared best approaches zero, as a sum of squared errors
+                                does for a good calibration, the relative margin vanishes, and without this floor every
+                                search that is behind at all would be cancelled
+        :raises MyPyOptException: If any of the multi-start arguments are invalid
+        """
+        if starts < 1:
+            raise MyPyOptException("Multi-start search needs at least one start, aborting...")
+        if sampling not in ('lhs', 'sobol'):
+            raise MyPyOptException("Multi-start sampling must be 'lhs' or 'sobol', aborting...")
+        if workers is not None and workers < 1:
+            raise MyPyOptException("Multi-start workers must be at least 1, aborting...")
+        if (cancel_after is not None and cancel_after < 1) or dominance_margin < 0 or absolute_margin < 0:
+            raise MyPyOptException("Multi-start cancel_after must be at least 1, and dominance_margin and "
+                                   "absolute_margin must not be negative, aborting...")
+        self.project = project_settings
+        self.dvs = decision_variable_array
+        self.callback_f_of_x = callback_f_of_x
+        self.callback_objective = callback_objective
+        self.starts = starts
+        self.sampling = sampling
+        self.workers = workers if workers is not None else min(starts, os.cpu_count() or 1)
+        self.cancel_after = cancel_after
+        self.dominance_margin = dominance_margin
+        self.absolute_margin = absolute_margin
+        self.rng = random.Random(project_settings.random_seed)
+        self.start_points: List[List[float]] = list()
+        self.results: List[SearchReturnType] = list()
+
+    def starting_points(self) -> List[List[float]]:
+        """
+        Builds the starting points of the searches, the initial values of the decision variables followed by the
+        sampled design
+
+        :return: A list of starts lists of decision variable values
+        """
+        import numpy as np
+        # the design keeps one initial step away from the bounds, since the first step of a search must stay inside
+        step = np.array([dv.step_size_initial for dv in self.dvs], dtype=float)
+        lower = np.array([dv.value_minimum for dv in self.dvs], dtype=float)
+        upper = np.array([dv.value_maximum for dv in self.dvs], dtype=float)
+        inside = upper - lower > 2 * step
+        lower = np.where(inside, lower + step, lower)
+        upper = np.where(inside, upper - step, upper)
+        samples = self.starts - 1
+        dimensions = len(self.dvs)
+        seed = self.rng.getrandbits(64)
+        if samples == 0:
+            u = np.zeros((0, dimensions))
+        elif self.sampling == 'sobol':
+            try:
+                from scipy.stats import qmc
+            except ImportError:  # pragma: no cover -- scipy is installed wherever the tests run
+                raise MyPyOptException("Sobol starting points need scipy, install it or use 'lhs' sampling.")
+            sobol = qmc.Sobol(dimensions, scramble=True, seed=np.random.default_rng(seed))
+            u = sobol.random_base2(max(math.ceil(math.log2(samples)), 0))[:samples]
+        else:
+            generator = np.random.default_rng(seed)
+            strata = np.array([generator.permutation(samples) for _ in range(dimensions)], dtype=float).T
+            u = (strata + generator.random((samples, dimensions))) / samples
+        initial = [[dv.value_initial for dv in self.dvs]]
+        return initial + (lower + u * (upper - lower)).tolist()
+
+    def search(self) -> List[SearchReturnType]:
+        """
+        Runs all of the searches
+
+        :return: The SearchReturnType of every search, ranked from the lowest objective value to the highest, with
+                 searches that never produced an objective value last; the same results in the order of the starting
+                 points are kept in the results attribute, alongside the start_points attribute
+        """
+        self.start_points = self.starting_points()
+        definitions = [dv.to_dictionary() for dv in self.dvs]
+        arguments = [
+            (self.project, definitions, i, x, self.callback_f_of_x, self.callback_objective, self.cancel_after,
+             self.dominance_margin, self.absolute_margin) for i, x in enumerate(self.start_points)
+        ]
+        shared_best = multiprocessing.Value('d', math.inf)
+        if self.workers == 1:
+            _initialize_worker(shared_best)
+            self.results = [_run_start(*a) for a in arguments]
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_initialize_worker,
+                                     initargs=(shared_best,)) as pool:
+                self.results = [f.result() for f in [pool.submit(_run_start, *a) for a in arguments]]
+
+        def rank(r: SearchReturnType):
+            known = r.objective_value is not None and not math.isnan(r.objective_value)
+            return (0, r.objective_value) if known else (1, 0.0)
+
+        return sorted(self.results, key=rank)
@@ -8,6 +8,13 @@ class ObjectiveEvaluation:
     The objective function is generally intended to be minimized by the optimizer search() function,
     so it is often a sum of squares error between some known quantity and the current outputs
     """
+
+    simulate_seconds = 0.0
+    """The time spent in the simulation callback for this evaluation, where the evaluation measured it"""
+
+    objective_seconds = 0.0
+    """The time spent in the objective callback for this evaluation, where the evaluation measured it"""
+
     def __init__(self, state: int, value: Any, message: str = ''):
         """
         The constructor for the class
@@ -0,0 +1,229 @@
+import hashlib
+import os
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Union
+
+from mypyopt.exceptions import MyPyOptException
+
+if TYPE_CHECKING:  # pathlib is slow to import and only needed for the annotations
+    from pathlib import Path
+
+
+class CalibrationObjective:
+    """
+    This class is a ready made objective callback for calibrating a simulation against measured data, computing one
+    of the usual calibration metrics with numpy rather than a Python loop over the values:
+
+    - sse, the sum of squared errors
+    - rmse, the root mean squared error
+    - cv_rmse, the coefficient of variation of the root mean squared error, as a percentage of the mean of the
+      measured data, as in ASHRAE Guideline 14
+    - nmbe, the absolute value of the normalized mean bias error, as a percentage of the mean of the measured data, as
+      in ASHRAE Guideline 14
+
+    The errors of every metric are weighted by the optional weights, which broadcast against the measured data, so a
+    weight per row, per sensor column, or per value can be given, to balance sensors with different units for example.
+
+    The measured data, either a series or a table of rows by sensor columns, is loaded once, when the objective is
+    created, and the quantities that only depend on it, such as its mean, are worked out then too.  Measured data read
+    from a CSV file is cached next to it in numpy format and memory mapped from then on, and an array file is memory
+    mapped directly, so the data is not held once per worker process and large files open instantly.  The simulated
+    values are converted with numpy.asarray, which does not copy a float64 numpy array, so a simulation that returns one
+    pays nothing to hand its results over.
+
+    The simulated values may be shorter than the measured data, in which case they are compared with its first rows,
+    while the denominators of the means stay those of the whole measured data.  That lets the objective work with
+    streaming simulations, whose partial results are compared as they arrive, see evaluate_point in the evaluator
+    module: sse, rmse and cv_rmse only grow as results are added, so a partial value over the bound means the final
+    one is too, but nmbe can shrink again, so it should not be used with streaming simulations and a bound.  Streamed
+    results are taken in through accumulator, which keeps running totals, rather than by comparing all of the results
+    received so far again after every chunk.  The instance is called with the simulation results, and can be sent to
+    worker processes, which memory map the data files again rather than receiving a copy of the data.
+    """
+
+    metrics = ('sse', 'rmse', 'cv_rmse', 'nmbe')
+    """The names of the available metrics"""
+
+    def __init__(self, measured: Any, metric: str = 'sse', weights: Any = None, parameters: int = 1):
+        """
+        The constructor for this class
+
+        :param measured: The measured data, a sequence of values or rows of values, or a numpy array, which is used as
+                         it is without a copy if it is already a float64 array
+        :param metric: One of the names in metrics
+        :param weights: Optional weights for the errors, which must broadcast against the measured data
+        :param parameters: The number of calibrated parameters subtracted from the number of values in the
+                           denominators of cv_rmse and nmbe, 1 in ASHRAE Guideline 14; the other metrics ignore it
+        :raises MyPyOptException: If the metric is unknown, or the measured data or weights cannot be used
+        """
+        import numpy as np
+        if metric not in self.metrics:
+            raise MyPyOptException("Calibration metric must be one of " + ', '.join(self.metrics))
+        self.metric = metric
+        self.parameters = parameters
+        self.measured_path: Optional[str] = None
+        self._set_measured(np.asarray(measured, dtype=float), weights)
+
+    def _set_measured(self, measured: Any, weights: Any) -> None:
+        import numpy as np
+        if measured.ndim not in (1, 2) or not measured.size:
+            raise MyPyOptException("Measured data must be a non-empty series or table of values, aborting...")
+        self.measured = measured
+        self.weights = None if weights is None else np.asarray(weights, dtype=float)
+        if self.weights is not None:
+            try:
+                np.broadcast_to(self.weights, measured.shape)
+            except ValueError:
+                raise MyPyOptException("Calibration weights must broadcast against the measured data, aborting...")
+        self._weight_total = measured.size if weights is None else float(np.broadcast_to(self.weights,
+                                                                                         measured.shape).sum())
+        if self.metric in ('cv_rmse', 'nmbe'):
+            if self._weight_total - self.parameters <= 0:
+                raise MyPyOptException("There must be more measured values than calibrated parameters, aborting...")
+            weighted = measured if self.weights is None else measured * self.weights
+            mean = float(weighted.sum()) / self._weight_total
+            if mean == 0:
+                raise MyPyOptException("The " + self.metric + " metric is undefined for measured data with a zero "
+                                       "mean, aborting...")
+            self._scale = 100.0 / abs(mean)
+
+    @classmethod
+    def from_array_file(cls, path: Union[str, 'Path'], **kwargs) -> 'CalibrationObjective':
+        """
+        Creates an objective from measured data saved with numpy.save, which is memory mapped rather than read
+
+        :param path: The path of the .npy file
+        :param kwargs: Any other arguments of the constructor
+        :return: A new CalibrationObjective instance
+        """
+        import numpy as np
+        objective = cls(np.load(str(path), mmap_mode='r'), **kwargs)
+        objective.measured_path = os.path.abspath(str(path))
+        return objective
+
+    @classmethod
+    def from_csv(cls, path: Union[str, 'Path'], columns: Sequence[Union[int, str]], header_rows: int = 1,
+                 delimiter: str = ',', **kwargs) -> 'CalibrationObjective':
+        """
+        Creates an objective from columns of measured data in a CSV file.  The columns are read once, and saved next to
+        the file in numpy format, from where they are memory mapped, by this call and by later ones until the CSV file
+        changes.  If the cache cannot be written, the data is used from memory.
+
+        :param path: The path of the CSV file
+        :param columns: The columns to read, each either a zero based index or a name from the first header row; a
+                        single column gives a series and several give a table
+        :param header_rows: The number of rows before the data starts
+        :param delimiter: The delimiter between fields
+        :param kwargs: Any other arguments of the constructor
+        :return: A new CalibrationObjective instance
+        :raises MyPyOptException: If the CSV file cannot be read, see SimulationAdapter.read_csv
+        """
+        import numpy as np
+        from mypyopt.simulation_adapter import SimulationAdapter
+        path = os.path.abspath(str(path))
+        # the cache belongs to one way of reading the file, so reading other columns makes a different cache
+        key = hashlib.sha1(repr((list(columns), header_rows, delimiter)).encode()).hexdigest()[:12]
+        cache_path = path + '.' + key + '.npy'
+        if not (os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path)):
+            values = SimulationAdapter.read_csv(path, columns, header_rows, delimiter)
+            measured = np.array(values[0] if len(values) == 1 else values, dtype=float)
+            measured = measured if measured.ndim == 1 else measured.T.copy()
+            try:
+                np.save(cache_path, measured)
+            except OSError:
+                return cls(measured, **kwargs)
+        return cls.from_array_file(cache_path, **kwargs)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # a copy sent to a worker process maps the data file itself, rather than receiving the data
+        state = self.__dict__.copy()
+        if self.measured_path is not None:
+            state['measured'] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        import numpy as np
+        self.__dict__.update(state)
+        if self.measured_path is not None:
+            self.measured = np.load(self.measured_path, mmap_mode='r')
+
+    def __call__(self, simulated: Any) -> float:
+        """
+        Computes the metric of the simulation results against the measured data
+
+        :param simulated: The simulation results, in the shape of the measured data or its first rows
+        :return: The value of the metric
+        :raises MyPyOptException: If the simulation results do not match the measured data
+        """
+        return self._metric(self._total(simulated, 0))
+
+    def accumulator(self) -> 'CalibrationAccumulator':
+        """
+        Starts working out the metric over simulation results streamed a chunk at a time, see evaluate_point in the
+        evaluator module
+
+        :return: A new CalibrationAccumulator instance
+        """
+        return CalibrationAccumulator(self)
+
+    def _total(self, simulated: Any, first_row: int) -> float:
+        """
+        Sums the weighted squared errors, or for nmbe the weighted errors, of simulation results compared with the
+        measured data from first_row on
+        """
+        import numpy as np
+        simulated = np.asarray(simulated, dtype=float)
+        rows = first_row + len(simulated)
+        if rows > len(self.measured) or simulated.shape[1:] != self.measured.shape[1:]:
+            raise MyPyOptException('Simulation results of shape ' + str(simulated.shape) + ' from row ' +
+                                   str(first_row) + ' do not match measured data of shape ' + str(self.measured.shape))
+        errors = self.measured[first_row:rows] - simulated
+        weights = self.weights
+        if weights is not None and weights.ndim == self.measured.ndim and len(weights) > 1:
+            weights = weights[first_row:rows]
+        if self.metric == 'nmbe':
+            return float(errors.sum() if weights is None else (errors * weights).sum())
+        return float(np.vdot(errors, errors) if weights is None else (errors * errors * weights).sum())
+
+    def _metric(self, total: float) -> float:
+        """
+        Turns a total from _total into the value of the metric
+        """
+        import math
+        if self.metric == 'nmbe':
+            return abs(total) / (self._weight_total - self.parameters) * self._scale
+        if self.metric == 'sse':
+            return total
+        if self.metric == 'rmse':
+            return math.sqrt(total / self._weight_total)
+        return math.sqrt(total / (self._weight_total - self.parameters)) * self._scale
+
+
+class CalibrationAccumulator:
+    """
+    This class works out a CalibrationObjective over streamed simulation results a chunk at a time.  It keeps a running
+    total of the errors and the number of rows seen, so each chunk costs the same however many came before it, where
+    calling the objective on all of the results so far after every chunk costs time growing with the square of the
+    number of chunks.
+    """
+
+    def __init__(self, objective: CalibrationObjective):
+        """
+        The constructor for this class
+
+        :param objective: The objective to work out
+        """
+        self.objective = objective
+        self.rows = 0
+        self._total = 0.0
+
+    def add(self, chunk: Any) -> float:
+        """
+        Adds the next chunk of simulation results
+
+        :param chunk: The next rows of simulation results, in the shape of the measured data
+        :return: The value of the metric over all of the results added so far
+        :raises MyPyOptException: If the results run past the end of the measured data, or do not match its shape
+        """
+        self._total += self.objective._total(chunk, self.rows)
+        self.rows += len(chunk)
+        return self.objective._metric(self._total)
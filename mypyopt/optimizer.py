@@ -1,11 +1,33 @@
-from abc import abstractmethod
+from collections import deque
+import numbers
+import os
+import random
+import time
 from typing import Callable, Any, Dict, List, Optional
 
+from mypyopt.cancel_token import CancelToken
 from mypyopt.decision_variable import DecisionVariable
+from mypyopt.decision_variable_set import DecisionVariableSet, ParameterView
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluation_history import EvaluationHistory
+from mypyopt.evaluator import Evaluator, LocalEvaluator
 from mypyopt.exceptions import MyPyOptException
 from mypyopt.input_output import InputOutputManager
+from mypyopt.objective_evaluation import ObjectiveEvaluation
 from mypyopt.project_structure import ProjectStructure
+from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.run_log import RunLog
+from mypyopt.run_timers import RunTimers
 from mypyopt.search_return_type import SearchReturnType
+from mypyopt.stop_reason_enum import StopReasonEnum
+
+
+class _ObjectiveNotScalar(MyPyOptException):
+    """
+    Raised from deep within a search that needs a single number from the objective function when it gets something
+    else, and caught by Optimizer.search, which ends the search through _finish like any other failed search
+    """
+    pass
 
 
 class Optimizer:
@@ -15,22 +37,30 @@ class Optimizer:
 
     def __init__(
             self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
-            callback_f_of_x: Callable[[Dict[str, float]], Any],
-            callback_objective: Callable[[Any], List[float]],
+            callback_f_of_x: Optional[Callable[[Dict[str, float]], Any]],
+            callback_objective: Optional[Callable[[Any], List[float]]],
             input_output_worker: Optional[InputOutputManager] = None,
             callback_progress: Optional[Callable[[int, float], None]] = None,
-            callback_completed: Optional[Callable[[SearchReturnType], None]] = None
+            callback_completed: Optional[Callable[[SearchReturnType], None]] = None,
+            evaluation_cache: Optional[EvaluationCache] = None,
+            callback_batch: Optional[Callable[[Any], Any]] = None,
+            evaluator: Optional[Evaluator] = None, cancel_token: Optional[CancelToken] = None
     ):
         """
         The constructor for the class.
 
         :param project_settings: A ProjectStructure instance defining the high level project settings
-        :param decision_variable_array: An array of DecisionVariable instances defining the parameter space
+        :param decision_variable_array: An array of DecisionVariable instances defining the parameter space, which is
+                                        gathered into a DecisionVariableSet unless it already is one
         :param callback_f_of_x: A Python function that accepts a dictionary of parameters where each key is the name
                                 defined in the decision variable instance, and the value is the current value of that
-                                variable.  The function return value is completely user defined, and will be passed
-                                into the objective callback function.  A typical object would be an array of hourly
-                                output values, or possibly a hash of values.
+                                variable.  The dictionary is a read-only ParameterView, which can be turned into a
+                                plain dictionary with dict() if the function needs to modify it.  The function return
+                                value is completely user defined, and will be passed into the objective callback
+                                function.  A typical object would be an array of hourly output values, or possibly a
+                                hash of values.  The function may instead be a generator yielding its results a list
+                                at a time, so that searches can terminate simulations that are clearly worse than the
+                                best point so far, see evaluate_point in the evaluator module.
         :param callback_objective: A Python function that accepts a single argument.
                                    This argument is exactly what comes out of the simulation (f_of_x) function.
                                    The user can choose to return an array, a dict, whatever.
@@ -40,9 +70,35 @@ class Optimizer:
                                    iteration number and the latest objective value (for now -- will add more info later)
         :param callback_completed: An optional callback function that gets called at the end of the optimization search,
                                    with a SearchReturnType instance as the only argument
+        :param evaluation_cache: An optional EvaluationCache instance used to skip evaluations of previously visited
+                                 points; hits and misses are recorded in the full output log
+        :param callback_batch: An optional Python function that evaluates many points in one call, for fast analytic
+                               or surrogate models.  It accepts a numpy array of shape (n_points, n_vars), with the
+                               columns in the order of the decision variable array, and returns an array of n_points
+                               objective values; non-finite values are treated as failed evaluations.  When it is
+                               given, it is used instead of callback_f_of_x and callback_objective, which may be None.
+        :param evaluator: An optional Evaluator instance that runs the simulation and objective callbacks, such as a
+                          DistributedEvaluator handing points to workers on other machines, which then hold the
+                          callbacks themselves so callback_f_of_x and callback_objective may be None.  When it is not
+                          given, a LocalEvaluator is created from the callbacks and the project parallel settings,
+                          or an IsolatedEvaluator with the 'isolated' parallel executor.
+                          An evaluator that is given is left open at the end of the search, for the caller to close.
+        :param cancel_token: An optional CancelToken that stops the search when it is cancelled, for example from
+                             another thread, or shared with other searches to stop all of them at once; if not given,
+                             the search creates a fresh one as each run begins, so a stopped run does not stop the
+                             next one, while a token that is given stays cancelled.  While a search runs, the stop
+                             file of the input output manager, and with the project handle_signals setting SIGINT and
+                             SIGTERM, cancel the token.
+        :raises MyPyOptException: If neither the single point callbacks, the batch callback, nor an evaluator are given
         """
+        if callback_batch is None and evaluator is None and (callback_f_of_x is None or callback_objective is None):
+            raise MyPyOptException(
+                "Either callback_f_of_x and callback_objective, callback_batch, or an evaluator must be given.")
         self.project = project_settings
-        self.dvs = decision_variable_array
+        if isinstance(decision_variable_array, DecisionVariableSet):
+            self.dvs = decision_variable_array
+        else:
+            self.dvs = DecisionVariableSet(decision_variable_array)
         if input_output_worker:
             self.io = input_output_worker
         else:
@@ -51,20 +107,60 @@ class Optimizer:
         self.callback_objective = callback_objective
         self.callback_progress = callback_progress
         self.callback_completed = callback_completed
+        self.evaluation_cache = evaluation_cache
+        self.callback_batch = callback_batch
+        self.rng = random.Random(self.project.random_seed)
+        self.log: Optional[RunLog] = None
+        self.history: Optional[EvaluationHistory] = None
+        self.run_dir: Optional[str] = None
+        self._owns_evaluator = evaluator is None
+        if evaluator is None and self.project.parallel_executor == 'isolated':
+            from mypyopt.isolated_evaluator import IsolatedEvaluator
+            evaluator = IsolatedEvaluator(callback_f_of_x, callback_objective, self.project.parallel_workers,
+                                          self.project.evaluation_timeout)
+        elif evaluator is None:
+            evaluator = LocalEvaluator(callback_f_of_x, callback_objective, self.project.parallel_workers,
+                                       self.project.parallel_executor)
+        self.evaluator = evaluator
+        self._owns_cancel_token = cancel_token is None
+        self.cancel_token = cancel_token if cancel_token is not None else CancelToken()
+        self._stop_watching_functions: List[Callable[[], None]] = list()
+        self.timers = RunTimers()
+        self._progress_takes_timers: Optional[bool] = None
+        self._recent_objective_values: deque = deque()
 
-    @abstractmethod
     def search(self) -> SearchReturnType:
         """
         This is the main driver function for the optimization.
         It walks the parameter space finding a minimum objective function.
-        Requirements: call callback_progress and callback_completed as needed
-        Call f(x) with a hash of parameter names and values
+        Derived classes implement _search, which this runs, releasing the stop file watcher and the signal handlers of
+        the run however it ends; a derived class with its own driver, such as HeuristicSearch, overrides this instead.
+        An objective function that does not return a single number to a search that needs one ends the search with the
+        UnsuccessfulOther reason, and any other exception is raised once the run log, evaluation history and worker
+        pool have been released.
+        """
+        try:
+            return self._search()
+        except _ObjectiveNotScalar as e:
+            self.log.write(True, 'Optimization ended unexpectedly, check all inputs and outputs')
+            self.log.write(True, 'Error message: ' + str(e))
+            return self._finish(SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther))
+        except BaseException:
+            self._abandon_run()
+            raise
+        finally:
+            self._stop_watching()
+
+    def _search(self) -> SearchReturnType:
+        """
+        The search itself, which derived classes implement.
+        Requirements: open the run with _open_run, end it with _finish, and call f(x) with a hash of parameter names
+        and values, through f_of_x or evaluate_points
         """
         raise MyPyOptException(
-            "Tried to use search() on the Optimizer base class; verify derived class overrides this method")
+            "Tried to use _search() on the Optimizer base class; verify derived class overrides this method")
 
-    @abstractmethod
-    def f_of_x(self, parameter_hash: Dict[str, float]):
+    def f_of_x(self, parameter_hash: Dict[str, float]) -> ObjectiveEvaluation:
         """
         This function calls the "f_of_x" callback function, getting outputs for the current parameter space;
         then passes those outputs into the objective function callback as an array, which usually returns the sum-sq-err
@@ -72,5 +168,420 @@ class Optimizer:
 
         :param parameter_hash: A dictionary of parameters with keys as the variable names, and current variable values
         """
-        raise MyPyOptException(
-            "Tried to use f_of_x() on the Optimizer base class; verify derived class overrides this method")
+        if self.callback_batch is not None:
+            return self.evaluate_batch([parameter_hash])[0]
+        return self.evaluator.evaluate([parameter_hash], cancel_token=self.cancel_token)[0]
+
+    def _open_run(self) -> None:
+        """
+        Sets up the output of a new search, called by derived classes as their search begins rather than from their
+        constructor, so that creating an optimizer never touches the file system.  The timestamped folder for this
+        particular run is created inside the project output directory, along with the project information, run log
+        and evaluation history; if the project does not write output, the run log only prints to the console.
+
+        :raises MyPyOptException: If the output or run directory cannot be created
+        """
+        if self._owns_cancel_token:
+            self.cancel_token = CancelToken()
+        self.timers = RunTimers()
+        self.timers.start(self.project.profile_cpu, self.project.profile_memory)
+        self._recent_objective_values = deque(maxlen=(self.project.stall_iterations or 0) + 1)
+        if not self.project.write_output:
+            self.run_dir = None
+            self.log = RunLog(None, timers=self.timers)
+            self.history = None
+            self._start_watching()
+            return
+
+        # set up the folder for this particular run inside the root project folder
+        import json
+        import time
+        import uuid
+        timestamp = time.strftime('%Y-%m-%d-%H-%M-%S')
+        self.run_dir = os.path.join(self.project.output_dir, timestamp + "_" + self.project.project_name +
+                                    "_" + str(uuid.uuid4())[0:8])
+
+        try:
+            os.makedirs(self.run_dir)
+        except OSError:
+            raise MyPyOptException("Couldn't create project folder, check permissions, aborting...")
+
+        # output optimization information, so we don't have to look in the source
+        project_info_file_name = os.path.join(self.run_dir, 'project_info.json')
+        with open(project_info_file_name, 'w') as f:
+            project_info = dict()
+            project_info['project_name'] = self.project.project_name
+            project_info['timestamp'] = timestamp
+            project_info['decision_variables'] = [d.to_dictionary() for d in self.dvs]
+            f.write(json.dumps(project_info, indent=2))
+
+        # remove any previous files and open clean versions of the log files
+        self.log = RunLog(self.run_dir, timers=self.timers)
+        self.history = EvaluationHistory(self.run_dir, self.dvs.names)
+        if os.path.exists(self.io.stopFile):  # pragma: no cover -- stop file usage is possibly slated for failure
+            try:
+                os.remove(self.io.stopFile)
+            except OSError:  # pragma: no cover -- not trying to catch this
+                raise MyPyOptException("Found stop file, but couldn't remove it, check permissions, aborting...")
+        self._start_watching()
+
+    def _start_watching(self) -> None:
+        """
+        Starts the sources of cancellation for a run: a watcher for the stop file, whose path is resolved against the
+        current working directory as the run starts, and the signal handlers if the project asks for them
+        """
+        self._stop_watching()
+        self._stop_watching_functions.append(self.cancel_token.watch_file(self.io.stopFile))
+        if self.project.handle_signals:
+            self._stop_watching_functions.append(self.cancel_token.handle_signals())
+
+    def _stop_watching(self) -> None:
+        """
+        Stops the stop file watcher and restores the signal handlers of a run; calling this again does nothing
+        """
+        while self._stop_watching_functions:
+            self._stop_watching_functions.pop()()
+
+    def _cancelled(self, values: Optional[Dict[str, float]], objective_value: Any) -> SearchReturnType:
+        """
+        Ends a search whose cancel token was cancelled
+
+        :param values: The best values found so far
+        :param objective_value: The objective value at the best values
+        :return: The SearchReturnType, with the reason the token was cancelled with
+        """
+        if self.cancel_token.reason == ReturnStateEnum.UserAborted:
+            self.log.write(True, 'Search was aborted by the user, by the stop file or a signal; stopping now...')
+        else:
+            self.log.write(True, 'Search was asked to stop; stopping now...')
+        return self._finish(SearchReturnType(False, self.cancel_token.reason, values, objective_value))
+
+    def _initial_point(self, point: Dict[str, float], evaluation: ObjectiveEvaluation) -> Optional[SearchReturnType]:
+        """
+        Records the evaluation of the initial point, which gates the whole search, and ends the search if the point
+        could not be evaluated, either because the search was cancelled or because the point is infeasible or invalid
+
+        :param point: The initial point
+        :param evaluation: The evaluation of the initial point
+        :return: The SearchReturnType to end the search with, or None if the search can begin
+        """
+        if self.cancel_token.cancelled and not evaluation.return_state == ReturnStateEnum.Successful:
+            return self._cancelled(None, None)
+        self.record_evaluation(0, -1, point, evaluation, evaluation.value)
+        if not evaluation.return_state == ReturnStateEnum.Successful:
+            return self._invalid_initial_point()
+        return None
+
+    def _invalid_initial_point(self) -> SearchReturnType:
+        """
+        Ends a search whose initial point is infeasible or invalid
+
+        :return: The SearchReturnType, with the InvalidInitialPoint reason
+        """
+        self.log.write(True, 'Initial point is infeasible or invalid, cannot begin iterations.  Aborting...')
+        return self._finish(SearchReturnType(False, ReturnStateEnum.InvalidInitialPoint))
+
+    @staticmethod
+    def _scalar(evaluation: ObjectiveEvaluation, name: str, failed: float = float('inf')) -> float:
+        """
+        Gives the objective value of an evaluation as a single number, for the searches that need one
+
+        :param evaluation: The evaluation
+        :param name: The name of the search, for the error message
+        :param failed: The value given to an evaluation that was not successful
+        :return: The objective value
+        :raises MyPyOptException: If the objective value of a successful evaluation is not a single number, which
+                                  search catches to end the search
+        """
+        if not evaluation.return_state == ReturnStateEnum.Successful:
+            return failed
+        try:
+            return float(evaluation.value)
+        except (TypeError, ValueError):
+            raise _ObjectiveNotScalar(name + " needs the objective function to return a single number, got " +
+                                      repr(evaluation.value))
+
+    def stopping_rule(self, objective_value: Any) -> Optional[int]:
+        """
+        Checks the stopping rules of the project, which derived classes do once at the end of each iteration, after
+        reporting progress
+
+        :param objective_value: The best objective value at the end of the iteration
+        :return: The StopReasonEnum constant of the first rule that says to stop, or None to keep going
+        """
+        if isinstance(objective_value, numbers.Real):
+            if self.project.target_objective is not None and objective_value <= self.project.target_objective:
+                return StopReasonEnum.TargetReached
+            if self.project.stall_iterations is not None:
+                window = self._recent_objective_values
+                window.append(objective_value)
+                if len(window) == window.maxlen:
+                    allowed = max(self.project.stall_absolute_tolerance,
+                                  self.project.stall_relative_tolerance * abs(window[0]))
+                    if window[0] - objective_value <= allowed:
+                        return StopReasonEnum.Stalled
+        if self.project.evaluation_budget is not None:
+            if self.timers.counts['evaluate'] >= self.project.evaluation_budget:
+                return StopReasonEnum.EvaluationBudget
+        if self.project.time_budget is not None and self.timers.total >= self.project.time_budget:
+            return StopReasonEnum.TimeBudget
+        return None
+
+    def _stopped(self, stop_reason: int, values: Dict[str, float], objective_value: Any) -> SearchReturnType:
+        """
+        Ends a search that one of the stopping rules stopped; reaching the target or stalling counts as a success,
+        while running out of budget does not
+
+        :param stop_reason: The StopReasonEnum constant returned by stopping_rule
+        :param values: The best values found so far
+        :param objective_value: The objective value at those values
+        :return: The SearchReturnType of the search
+        """
+        self.log.write(True, '*******Stopped: ' + StopReasonEnum.enum_to_string(stop_reason) + '*******')
+        if stop_reason in (StopReasonEnum.TargetReached, StopReasonEnum.Stalled):
+            r = SearchReturnType(True, ReturnStateEnum.Successful, values, objective_value, stop_reason)
+        else:
+            r = SearchReturnType(False, ReturnStateEnum.BudgetExhausted, values, objective_value, stop_reason)
+        return self._finish(r)
+
+    def _finish(self, r: SearchReturnType) -> SearchReturnType:
+        """
+        Wraps up a search, writing any summary information, calling the completed callback, and releasing the log
+        files and any worker pool.  The timing summary of the run is added to the SearchReturnType and written into
+        the run directory.
+
+        :param r: The final SearchReturnType for the search
+        :return: The same SearchReturnType, for convenience
+        """
+        if r.stop_reason is None:
+            if r.reason == ReturnStateEnum.Successful:
+                r.stop_reason = StopReasonEnum.Converged
+            elif r.reason in (ReturnStateEnum.Cancelled, ReturnStateEnum.UserAborted):
+                r.stop_reason = StopReasonEnum.Cancelled
+            else:
+                r.stop_reason = StopReasonEnum.Failed
+        if self.evaluation_cache is not None:
+            self.log.write(self.project.verbose, 'Evaluation cache: ' + str(self.evaluation_cache.hits) +
+                           ' hits, ' + str(self.evaluation_cache.misses) + ' misses')
+        self.timers.stop()
+        # the log no longer adds to the timers, so the summary written below matches the one returned
+        self.log.timers = None
+        r.timings = self.timers.summary()
+        self.log.write(self.project.verbose, 'Timings: total=' + format(r.timings['total_seconds'], '.3f') + 's, ' +
+                       ', '.join(p + '=' + format(t['seconds'], '.3f') + 's' for p, t in r.timings['phases'].items()) +
+                       ', optimizer=' + format(r.timings['optimizer_seconds'], '.3f') + 's')
+        if self.run_dir is not None:
+            self.timers.write(self.run_dir)
+        self._stop_watching()
+        self.report_completed(r)
+        self.log.close()
+        if self.history is not None:
+            self.history.flush()
+        self.shutdown_executor()
+        return r
+
+    def _abandon_run(self) -> None:
+        """
+        Releases the log files and any worker pool of a search that is ending with an exception, so that the run log
+        and evaluation history written so far are kept and no worker processes are left behind
+        """
+        self.timers.stop()
+        if self.log is not None:
+            self.log.close()
+        if self.history is not None:
+            self.history.flush()
+        self.shutdown_executor()
+
+    def request_stop(self) -> None:
+        """
+        Asks a running search to stop, returning a SearchReturnType with the Cancelled reason and the best values
+        found so far.  This cancels the cancel token of the search, so any evaluations in flight are given up on, and
+        any other searches sharing the token stop as well.  This is safe to call from a progress callback or from
+        another thread.
+        """
+        self.cancel_token.cancel(ReturnStateEnum.Cancelled)
+
+    def report_progress(self, iteration: int, objective_value: Any) -> None:
+        """
+        Calls the progress callback function, if one was given.  A progress callback that accepts a third argument
+        is also given the RunTimers instance of the run, whose summary method reports the time spent so far.
+
+        :param iteration: The iteration number that was just completed
+        :param objective_value: The latest objective function value
+        """
+        if self.callback_progress:
+            start = time.perf_counter()
+            self.callback_progress(*self._progress_arguments(iteration, objective_value))
+            self.timers.add('callbacks', time.perf_counter() - start)
+
+    def _progress_arguments(self, iteration: int, objective_value: Any) -> tuple:
+        if self._progress_takes_timers is None:
+            import inspect
+            try:
+                parameters = inspect.signature(self.callback_progress).parameters.values()
+            except (TypeError, ValueError):  # pragma: no cover -- some builtins have no signature
+                parameters = []
+            positional = [p for p in parameters if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+            self._progress_takes_timers = len(positional) >= 3 or any(p.kind == p.VAR_POSITIONAL for p in parameters)
+        if self._progress_takes_timers:
+            return iteration, objective_value, self.timers
+        return iteration, objective_value
+
+    def report_completed(self, search_return: SearchReturnType) -> None:
+        """
+        Calls the completed callback function, if one was given
+
+        :param search_return: The final SearchReturnType of the search
+        """
+        if self.callback_completed:
+            start = time.perf_counter()
+            self.callback_completed(search_return)
+            self.timers.add('callbacks', time.perf_counter() - start)
+
+    def record_evaluation(self, iteration: int, variable_index: int, parameter_hash: Dict[str, float],
+                          evaluation: ObjectiveEvaluation, j_base: Any) -> None:
+        """
+        Adds an objective evaluation to the evaluation records of the run log and to the evaluation history
+
+        :param iteration: The iteration number the evaluation belongs to, 0 for the initial point
+        :param variable_index: The index of the decision variable that was perturbed, or -1 if there is none
+        :param parameter_hash: The point that was evaluated
+        :param evaluation: The ObjectiveEvaluation at the point
+        :param j_base: The best objective value known when the evaluation was made
+        """
+        if self.log:
+            self.log.record(iteration=iteration,
+                            variable=None if variable_index < 0 else self.dvs[variable_index].var_name,
+                            point=parameter_hash, objective=evaluation.value, state=evaluation.return_state,
+                            j_base=j_base)
+        if self.history:
+            start = time.perf_counter()
+            self.history.append(iteration, variable_index, parameter_hash, evaluation.return_state, evaluation.value)
+            self.timers.add('history', time.perf_counter() - start)
+
+    def evaluate_points(self, parameter_hashes: List[Dict[str, float]],
+                        bound: Optional[float] = None) -> List[ObjectiveEvaluation]:
+        """
+        Evaluates a batch of points, concurrently if the project allows more than one parallel worker.
+        The results are always returned in the same order as the points were given, regardless of the order in which
+        the individual evaluations finish, so that derived classes can process them deterministically.
+        Points found in the evaluation cache, if there is one, are not evaluated again.
+
+        :param parameter_hashes: A list of parameter dictionaries, one for each point to evaluate
+        :param bound: An optional objective value above which the points are of no interest to the search; a
+                      streaming simulation whose partial objective value exceeds it is terminated, and its evaluation
+                      has the Terminated state and the partial objective value
+        :return: A list of ObjectiveEvaluation instances, one for each point
+        """
+        results, to_run = self._cache_lookup(parameter_hashes)
+        start = time.perf_counter()
+        evaluations = self._run_points([parameter_hashes[i] for i in to_run], bound)
+        self.record_evaluation_times(evaluations, time.perf_counter() - start)
+        return self._cache_store(parameter_hashes, results, to_run, evaluations)
+
+    def _cache_lookup(self, parameter_hashes: List[Dict[str, float]]):
+        """
+        Finds any of the points in the evaluation cache
+
+        :param parameter_hashes: A list of parameter dictionaries
+        :return: A tuple of the list of cached evaluations, with None for points that were not found, and the list
+                 of indices of the points that still need to be evaluated
+        """
+        results: List[Optional[ObjectiveEvaluation]] = [None] * len(parameter_hashes)
+        if self.evaluation_cache is None:
+            return results, list(range(len(parameter_hashes)))
+        start = time.perf_counter()
+        to_run = list()
+        for i, parameter_hash in enumerate(parameter_hashes):
+            results[i] = self.evaluation_cache.get(parameter_hash)
+            if results[i] is None:
+                to_run.append(i)
+            if self.log:
+                self.log.write(False, ('cache miss: ' if results[i] is None else 'cache hit: ') + str(parameter_hash))
+        self.timers.add('cache', time.perf_counter() - start)
+        return results, to_run
+
+    def _cache_store(self, parameter_hashes: List[Dict[str, float]], results: List[Optional[ObjectiveEvaluation]],
+                     to_run: List[int], evaluations: List[ObjectiveEvaluation]) -> List[ObjectiveEvaluation]:
+        """
+        Fills in the evaluations of the points that were not cached, and adds them to the evaluation cache
+
+        :return: The complete list of evaluations
+        """
+        start = time.perf_counter()
+        for i, evaluation in zip(to_run, evaluations):
+            # a terminated evaluation only bounds the objective value from below, so it is not worth keeping
+            if self.evaluation_cache is not None and evaluation.return_state != ReturnStateEnum.Terminated:
+                self.evaluation_cache.put(parameter_hashes[i], evaluation)
+            results[i] = evaluation
+        if self.evaluation_cache is not None:
+            self.timers.add('cache', time.perf_counter() - start)
+        return results
+
+    def record_evaluation_times(self, evaluations: List[ObjectiveEvaluation], seconds: float) -> None:
+        """
+        Adds the time spent waiting for a batch of evaluations to the run timers, along with the simulation and
+        objective times the evaluations measured themselves
+
+        :param evaluations: The ObjectiveEvaluation instances of the batch
+        :param seconds: The time spent waiting for the batch
+        """
+        if not evaluations:
+            return
+        self.timers.add('evaluate', seconds, len(evaluations))
+        self.timers.add('simulate', sum(e.simulate_seconds for e in evaluations), len(evaluations))
+        self.timers.add('objective', sum(e.objective_seconds for e in evaluations), len(evaluations))
+
+    def evaluates_in_batches(self) -> bool:
+        """
+        Tells derived classes whether evaluating several points at once is cheaper than evaluating them one at a time,
+        which is the case with a batch callback or an evaluator with more than one worker
+
+        :return: True if points should be gathered into batches for evaluate_points
+        """
+        return self.callback_batch is not None or self.evaluator.evaluates_in_batches()
+
+    def evaluate_batch(self, parameter_hashes: List[Dict[str, float]]) -> List[ObjectiveEvaluation]:
+        """
+        Evaluates a batch of points with a single call to the batch callback function
+
+        :param parameter_hashes: A list of parameter dictionaries, one for each point to evaluate
+        :return: A list of ObjectiveEvaluation instances, one for each point
+        :raises MyPyOptException: If the batch callback does not return one value per point
+        """
+        import numpy as np
+        if all(isinstance(p, ParameterView) for p in parameter_hashes):
+            x = np.array([p.array for p in parameter_hashes], dtype=float).reshape(-1, len(self.dvs))
+        else:
+            names = self.dvs.names
+            x = np.array([[p[name] for name in names] for p in parameter_hashes], dtype=float).reshape(-1, len(names))
+        values = np.asarray(self.callback_batch(x), dtype=float).reshape(-1)
+        if values.shape[0] != x.shape[0]:
+            raise MyPyOptException("Batch callback returned " + str(values.shape[0]) + " values for " +
+                                   str(x.shape[0]) + " points, aborting...")
+        evaluations = list()
+        for value in values.tolist():
+            if np.isfinite(value):
+                evaluations.append(ObjectiveEvaluation(ReturnStateEnum.Successful, value))
+            else:
+                evaluations.append(ObjectiveEvaluation(ReturnStateEnum.InfeasibleObj, -999999,
+                                                       'Batch callback returned a non-finite objective value'))
+        return evaluations
+
+    def _run_points(self, parameter_hashes: List[Dict[str, float]],
+                    bound: Optional[float] = None) -> List[ObjectiveEvaluation]:
+        if not parameter_hashes:
+            return []
+        if self.callback_batch is not None:
+            return self.evaluate_batch(parameter_hashes)
+        if bound is None and (len(parameter_hashes) == 1 or not self.evaluator.evaluates_in_batches()):
+            return [self.f_of_x(p) for p in parameter_hashes]
+        return self.evaluator.evaluate(parameter_hashes, bound, self.cancel_token)
+
+    def shutdown_executor(self) -> None:
+        """
+        Shuts down the worker pool of the evaluator created by this optimizer, if it started one; the pool is
+        recreated on demand if needed again.  An evaluator passed in to the constructor is left for the caller to close.
+        """
+        if self._owns_evaluator:
+            self.evaluator.close()
@@ -0,0 +1,193 @@
+from typing import Callable, Any, Dict, List, Optional, Tuple
+
+from mypyopt.cancel_token import CancelToken
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluator import Evaluator
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.input_output import InputOutputManager
+from mypyopt.optimizer import Optimizer
+from mypyopt.project_structure import ProjectStructure
+from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.search_return_type import SearchReturnType
+from mypyopt.stop_reason_enum import StopReasonEnum
+
+
+class DifferentialEvolution(Optimizer):
+    """
+    This class implements differential evolution, a population based global search for objectives with more than one
+    basin.  Every point of a generation can be evaluated independently, so each generation is handed to the evaluator
+    in a single call, and runs on all of the parallel workers, or through the batch callback, at once.  The process is:
+
+    1. Evaluate a first generation made of the initial point and a Latin hypercube design spread across the decision
+       variable bounds
+
+    2. For each member of the population, build a mutant by adding a scaled difference of two other random members to
+       a third, either a random member or the best one depending on the strategy, and cross it over with the member,
+       taking each decision variable from the mutant with the crossover probability
+
+    3. Evaluate all of the trial points together; each trial replaces its member if its objective value is no worse
+
+    4. Continue until the population has collapsed, with the spread of every decision variable across the population
+       below its convergence criterion, or maximum iterations generations have been run
+
+    The mutation scale is drawn afresh for each generation between the two mutation values, which helps the search
+    keep moving.  A component of a trial that falls outside the bounds of its decision variable is placed halfway
+    between the member and the bound it crossed.  Since the first generation spans the whole range between each
+    variable minimum and maximum, those bounds should describe the plausible region of the parameter space.  The
+    decision variables x_base and delta_x are kept at the best point and the spread of the population.
+    """
+
+    strategies = ('rand1bin', 'best1bin')
+    """The mutation strategies: rand1bin mutates around a random member, which explores more, and best1bin around the
+    best member, which converges faster but is more likely to settle in a local minimum"""
+
+    def __init__(
+            self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
+            callback_f_of_x: Optional[Callable[[Dict[str, float]], Any]],
+            callback_objective: Optional[Callable[[Any], float]],
+            input_output_worker: Optional[InputOutputManager] = None,
+            callback_progress: Optional[Callable[[int, float], None]] = None,
+            callback_completed: Optional[Callable[[SearchReturnType], None]] = None,
+            evaluation_cache: Optional[EvaluationCache] = None,
+            callback_batch: Optional[Callable[[Any], Any]] = None,
+            evaluator: Optional[Evaluator] = None, cancel_token: Optional[CancelToken] = None,
+            population_size: Optional[int] = None, mutation: Tuple[float, float] = (0.5, 1.0),
+            crossover: float = 0.9, strategy: str = 'rand1bin'
+    ):
+        """
+        The constructor for the class, the arguments match HeuristicSearch except for the following
+
+        :param callback_objective: As for HeuristicSearch, but it must return a single number
+        :param callback_progress: As for HeuristicSearch, called once per generation with the best objective value
+        :param population_size: The number of members in the population, and so the number of evaluations in each
+                                generation; defaults to five times the number of decision variables, and at least 8.
+                                A multiple of the number of parallel workers keeps all of them busy.
+        :param mutation: The range the scale of the difference added to each mutant is drawn from in each generation
+        :param crossover: The probability of taking each decision variable of a trial from the mutant
+        :param strategy: One of the names in strategies
+        :raises MyPyOptException: If the evolution arguments are invalid
+        """
+        super().__init__(project_settings, decision_variable_array, callback_f_of_x, callback_objective,
+                         input_output_worker, callback_progress, callback_completed, evaluation_cache,
+                         callback_batch, evaluator, cancel_token)
+        if population_size is None:
+            population_size = max(5 * len(self.dvs), 8)
+        if population_size < 4:
+            raise MyPyOptException("Differential evolution needs a population of at least 4, aborting...")
+        if not 0 < mutation[0] <= mutation[1] <= 2:
+            raise MyPyOptException("Differential evolution mutation must be an increasing range within (0, 2].")
+        if not 0 <= crossover <= 1:
+            raise MyPyOptException("Differential evolution crossover must be a probability between 0 and 1.")
+        if strategy not in self.strategies:
+            raise MyPyOptException("Differential evolution strategy must be one of " + ', '.join(self.strategies))
+        self.population_size = population_size
+        self.mutation = mutation
+        self.crossover = crossover
+        self.strategy = strategy
+
+    def _search(self) -> SearchReturnType:
+        """
+        This is the main driver function for the optimization.
+        It evolves a population across the parameter space towards a minimum objective function.
+        """
+        import numpy as np
+
+        self._open_run()
+        self.log.write(True, '\n*******Optimization Beginning*******')
+
+        lower = self.dvs.value_minimum
+        upper = self.dvs.value_maximum
+        dimensions = len(self.dvs)
+        generator = np.random.default_rng(self.rng.getrandbits(64))
+
+        # the first generation is the starting point along with a Latin hypercube design; the initial point gates it
+        samples = self.population_size - 1
+        strata = np.array([generator.permutation(samples) for _ in range(dimensions)], dtype=float).T
+        design = lower + (strata + generator.random((samples, dimensions))) / samples * (upper - lower)
+        population = np.vstack([self.dvs.x_base, design])
+        evaluations = self.evaluate_points([self.dvs.point(x) for x in population])
+        ended = self._initial_point(self.dvs.point(population[0]), evaluations[0])
+        if ended is not None:
+            return ended
+        values = np.array([self._scalar(e, 'Differential evolution') for e in evaluations])
+        best = 0
+        for i in range(1, self.population_size):
+            self.record_evaluation(0, -1, self.dvs.point(population[i]), evaluations[i], values[best])
+            if values[i] < values[best]:
+                best = i
+
+        members = np.arange(self.population_size)
+        for generation in range(1, self.project.max_iterations + 1):
+
+            self.log.write(self.project.verbose, 'generation = ' + str(generation))
+
+            if self.cancel_token.cancelled:
+                return self._cancelled(self.dvs.to_dictionary(population[best]), float(values[best]))
+
+            trials = self._trials(population, best, generator, members)
+            # a trial can only replace its own member, so one that is worse than every member is of no interest
+            bound = float(values.max()) if np.isfinite(values).all() else None
+            evaluations = self.evaluate_points([self.dvs.point(x) for x in trials], bound=bound)
+            for i, evaluation in enumerate(evaluations):
+                self.record_evaluation(generation, -1, self.dvs.point(trials[i]), evaluation, values[best])
+                if evaluation.return_state == ReturnStateEnum.UnsuccessfulOther:  # pragma: no cover
+                    self.log.write(True, 'Optimization ended unexpectedly, check all inputs and outputs')
+                    self.log.write(True, 'Error message: ' + str(evaluation.message))
+                    r = SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther)
+                    return self._finish(r)
+                value = self._scalar(evaluation, 'Differential evolution')
+                if value <= values[i]:
+                    population[i] = trials[i]
+                    values[i] = value
+                    if value < values[best]:
+                        best = i
+            if self.cancel_token.cancelled:
+                return self._cancelled(self.dvs.to_dictionary(population[best]), float(values[best]))
+
+            spread = population.max(axis=0) - population.min(axis=0)
+            self.dvs.x_base[:] = population[best]
+            self.dvs.x_new[:] = population[best]
+            self.dvs.delta_x[:] = spread
+            if self.project.verbose:
+                self.log.write(True, 'x_best=' + str(self.dvs.x_base.tolist()))
+                self.log.write(True, 'j_best=' + str(values[best]) + ', population spread=' + str(spread.tolist()))
+
+            if (spread <= self.dvs.convergence_criteria).all():
+                self.log.write(True, '*******Converged*******')
+                converged_values = self.dvs.to_dictionary(self.dvs.x_base)
+                r = SearchReturnType(True, ReturnStateEnum.Successful, converged_values, float(values[best]))
+                return self._finish(r)
+
+            self.report_progress(generation, float(values[best]))
+
+            stop_reason = self.stopping_rule(float(values[best]))
+            if stop_reason is not None:
+                return self._stopped(stop_reason, self.dvs.to_dictionary(self.dvs.x_base), float(values[best]))
+
+        self.log.write(True, 'Maximum iterations reached without converging')
+        r = SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther, self.dvs.to_dictionary(self.dvs.x_base),
+                             float(values[best]), StopReasonEnum.MaxIterations)
+        return self._finish(r)
+
+    def _trials(self, population, best, generator, members):
+        """
+        Builds the trial point of every member of the population for the next generation
+        """
+        import numpy as np
+        size, dimensions = population.shape
+        # three distinct partners for each member, none of them the member itself
+        partners = np.empty((size, 3), dtype=int)
+        for i in members:
+            partners[i] = generator.choice(np.delete(members, i), 3, replace=False)
+        base = population[best] if self.strategy == 'best1bin' else population[partners[:, 0]]
+        scale = generator.uniform(*self.mutation)
+        mutants = base + scale * (population[partners[:, 1]] - population[partners[:, 2]])
+        crossed = generator.random((size, dimensions)) < self.crossover
+        # every trial takes at least one decision variable from its mutant
+        crossed[members, generator.integers(0, dimensions, size)] = True
+        trials = np.where(crossed, mutants, population)
+        lower = self.dvs.value_minimum
+        upper = self.dvs.value_maximum
+        trials = np.where(trials < lower, (population + lower) / 2, trials)
+        return np.where(trials > upper, (population + upper) / 2, trials)
@@ -1,19 +1,24 @@
-import json
-import collections
-import os
+import numbers
 import time
-from typing import Callable, Any, Dict, List, Optional
-import uuid
+from typing import TYPE_CHECKING, Callable, Any, Dict, Generator, List, Optional
 
+from mypyopt.cancel_token import CancelToken
+from mypyopt.checkpoint import Checkpoint
 from mypyopt.decision_variable import DecisionVariable
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluator import Evaluator
 from mypyopt.exceptions import MyPyOptException
 from mypyopt.objective_evaluation import ObjectiveEvaluation
 from mypyopt.optimizer import Optimizer
 from mypyopt.return_state_enum import ReturnStateEnum
 from mypyopt.search_return_type import SearchReturnType
+from mypyopt.stop_reason_enum import StopReasonEnum
 from mypyopt.input_output import InputOutputManager
 from mypyopt.project_structure import ProjectStructure
 
+if TYPE_CHECKING:  # pathlib is slow to import and only needed for the annotations
+    from pathlib import Path
+
 
 class HeuristicSearch(Optimizer):
     """
@@ -31,180 +36,263 @@ class HeuristicSearch(Optimizer):
     4. Continue looping until all decision variables are converged between the current and prior iteration, or maximum
        iterations is reached.
 
+    If the project allows more than one parallel worker, or a batch callback is given, step 2 is done speculatively:
+    the perturbed points for all remaining decision variables are evaluated together, then the results are accepted or
+    rejected in variable order.  Once a move is accepted the rest are re-evaluated from the new point, so the search
+    path is identical to the serial one, but the mostly-rejected moves no longer wait on each other.
+
+    If the simulation callback streams its results, see evaluate_point in the evaluator module, each candidate is
+    simulated only until its partial objective value exceeds the objective value at the base point, since it would be
+    rejected anyway.  This requires an objective that never decreases as results are added, like a sum of squared
+    errors, and leaves the search path unchanged.
     """
     def __init__(
             self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
-            callback_f_of_x: Callable[[Dict[str, float]], Any],
-            callback_objective: Callable[[Any], List[float]],
+            callback_f_of_x: Optional[Callable[[Dict[str, float]], Any]],
+            callback_objective: Optional[Callable[[Any], List[float]]],
             input_output_worker: Optional[InputOutputManager] = None,
             callback_progress: Optional[Callable[[int, float], None]] = None,
-            callback_completed: Optional[Callable[[SearchReturnType], None]] = None
+            callback_completed: Optional[Callable[[SearchReturnType], None]] = None,
+            evaluation_cache: Optional[EvaluationCache] = None,
+            callback_batch: Optional[Callable[[Any], Any]] = None,
+            evaluator: Optional[Evaluator] = None, cancel_token: Optional[CancelToken] = None
     ):
 
         super().__init__(project_settings, decision_variable_array, callback_f_of_x, callback_objective,
-                         input_output_worker, callback_progress, callback_completed)
-
-        # the root project name is created/validated by the sim constructor, set up the folder for this particular run
-        timestamp = time.strftime('%Y-%m-%d-%H-%M-%S')
-        dir_name = os.path.join(self.project.output_dir, timestamp + "_" + self.project.project_name +
-                                "_" + str(uuid.uuid4())[0:8])
-
-        try:
-            os.mkdir(dir_name)
-        except OSError:  # pragma: no cover -- not trying to catch this
-            raise MyPyOptException("Couldn't create project folder, check permissions, aborting...")
-
-        # output optimization information, so we don't have to look in the source
-        project_info_file_name = os.path.join(dir_name, 'project_info.json')
-        with open(project_info_file_name, 'w') as f:
-            project_info = dict()
-            project_info['project_name'] = self.project.project_name
-            project_info['timestamp'] = timestamp
-            project_info['decision_variables'] = [d.to_dictionary() for d in self.dvs]
-            f.write(json.dumps(project_info, indent=2))
-
-        # remove any previous files and open clean versions of the log files
-        self.full_output_file = open(os.path.join(dir_name, 'full_output.log'), 'w')
-        if os.path.exists(self.io.stopFile):  # pragma: no cover -- stop file usage is possibly slated for failure
-            try:
-                os.remove(self.io.stopFile)
-            except OSError:  # pragma: no cover -- not trying to catch this
-                raise MyPyOptException("Found stop file, but couldn't remove it, check permissions, aborting...")
-
-        # check the dv array for duplicate names, as this would be invalid
-        var_names = [dv.var_name for dv in self.dvs]
-        duplicate_names = [i for i, c in collections.Counter(var_names).items() if c > 1]
-        if duplicate_names:
-            raise MyPyOptException("Found duplicated names within decision variables, give each a unique name.")
+                         input_output_worker, callback_progress, callback_completed, evaluation_cache,
+                         callback_batch, evaluator, cancel_token)
+        # the objective value above which the points currently being evaluated would be rejected
+        self.evaluation_bound: Optional[float] = None
 
     def search(self) -> SearchReturnType:
         """
         This is the main driver function for the optimization.
         It walks the parameter space finding a minimum objective function.
         """
+        self._open_run()
+        return self._drive(self._start_steps())
 
-        self.io.write_line(True, self.full_output_file, '\n*******Optimization Beginning*******')
+    def _drive(self, steps: Generator[List[Dict[str, float]], List[ObjectiveEvaluation], SearchReturnType]):
+        """
+        Runs the search steps to completion, evaluating each batch of points the steps ask for
+
+        :param steps: A generator created by _start_steps or _iteration_steps
+        :return: The SearchReturnType returned by the steps
+        """
+        try:
+            points = next(steps)
+            while True:
+                points = steps.send(self.evaluate_points(points, self.evaluation_bound))
+        except StopIteration as stop:
+            return stop.value
+        except BaseException:
+            self._abandon_run()
+            raise
+        finally:
+            self._stop_watching()
+
+    def _start_steps(self) -> Generator[List[Dict[str, float]], List[ObjectiveEvaluation], SearchReturnType]:
+        """
+        The search steps beginning from the initial point.  Like _iteration_steps, this is a generator which yields each
+        list of points that need to be evaluated and expects the list of their evaluations to be sent back, so that the
+        search logic is shared by the blocking and the asyncio drivers.
+        """
+        self.log.write(True, '\n*******Optimization Beginning*******')
 
         # evaluate starting point
-        base_values = {dv.var_name: dv.x_base for dv in self.dvs}
-        obj_base = self.f_of_x(base_values)
-        j_base = obj_base.value
-        if obj_base.return_state == ReturnStateEnum.UserAborted:  # pragma: no cover -- stop file may be deprecated
-            self.io.write_line(True, self.full_output_file,
-                               'User aborted simulation via stop signal file...')
-            r = SearchReturnType(False, ReturnStateEnum.UserAborted)
-            if self.callback_completed:
-                self.callback_completed(r)
-            self.full_output_file.close()
-            return r
-        elif not obj_base.return_state == ReturnStateEnum.Successful:
-            self.io.write_line(True, self.full_output_file,
-                               'Initial point is infeasible or invalid, cannot begin iterations.  Aborting...')
-            r = SearchReturnType(False, ReturnStateEnum.InvalidInitialPoint)
-            if self.callback_completed:
-                self.callback_completed(r)
-            self.full_output_file.close()
-            return r
-
-        # begin iteration loop
-        for iteration in range(1, self.project.max_iterations + 1):
-
-            self.io.write_line(self.project.verbose, self.full_output_file, 'iter = ' + str(iteration))
-
-            if os.path.exists(self.io.stopFile):  # pragma: no cover -- not covering stop file stuff
-                self.io.write_line(True, self.full_output_file,
-                                   'Found stop signal file in run directory; stopping now...')
-                r = SearchReturnType(False, ReturnStateEnum.UserAborted)
-                if self.callback_completed:
-                    self.callback_completed(r)
-                self.full_output_file.close()
-                return r
-
-            # begin DV loop
-            for dv in self.dvs:
-
-                # set up a new point
-                dv.x_new = dv.x_base + dv.delta_x
-                new_values = {dv.var_name: dv.x_new for dv in self.dvs}
-
-                if dv.x_new > dv.value_maximum or dv.x_new < dv.value_minimum:  # pragma: no cover
+        self.evaluation_bound = None
+        base_values = self.dvs.point()
+        obj_base = (yield [base_values])[0]
+        ended = self._initial_point(base_values, obj_base)
+        if ended is not None:
+            return ended
+
+        return (yield from self._iteration_steps(1, obj_base.value))
+
+    def resume(self, checkpoint_path: Optional['Path'] = None) -> SearchReturnType:
+        """
+        This is an alternate driver function which continues an interrupted search from a checkpoint instead of
+        starting over from the initial values of the decision variables.  The continued search writes into the new
+        run directory of this instance.
+
+        :param checkpoint_path: The path to a checkpoint file or the run directory containing one; if not given, the
+                                most recent checkpoint written by any run of this project is used
+        :raises MyPyOptException: If no checkpoint is found, or it does not match the decision variables
+        """
+        self._open_run()
+        checkpoint = self._restore_checkpoint(checkpoint_path)
+        return self._drive(self._iteration_steps(checkpoint.iteration + 1, checkpoint.j_base))
+
+    def _restore_checkpoint(self, checkpoint_path: Optional['Path']) -> Checkpoint:
+        """
+        Reads a checkpoint and moves the decision variables and random number generator to the state it describes
+
+        :param checkpoint_path: The path to a checkpoint file or run directory, or None for the most recent checkpoint
+        :return: The Checkpoint instance that was restored
+        """
+        if checkpoint_path is None:
+            checkpoint_path = Checkpoint.find_latest(self.project.output_dir, self.project.project_name)
+            if checkpoint_path is None:
+                raise MyPyOptException("Couldn't find a checkpoint to resume for this project, aborting...")
+        checkpoint = Checkpoint.read(checkpoint_path)
+        if [d['var_name'] for d in checkpoint.decision_variables] != self.dvs.names:
+            raise MyPyOptException("Checkpoint decision variables do not match this search, aborting...")
+        self.dvs.x_base[:] = [saved['x_base'] for saved in checkpoint.decision_variables]
+        self.dvs.x_new[:] = self.dvs.x_base
+        self.dvs.delta_x[:] = [saved['delta_x'] for saved in checkpoint.decision_variables]
+        if checkpoint.rng_state is not None:
+            self.rng.setstate(checkpoint.rng_state)
+
+        self.log.write(True, '\n*******Optimization Resuming*******')
+        self.log.write(True, 'Resuming after iteration ' + str(checkpoint.iteration) + ' from ' + str(checkpoint_path))
+        return checkpoint
+
+    def _iteration_steps(
+            self, first_iteration: int, j_base: Any
+    ) -> Generator[List[Dict[str, float]], List[ObjectiveEvaluation], SearchReturnType]:
+        """
+        The search steps of the iteration loop from a base point that has already been evaluated
+
+        :param first_iteration: The iteration number to begin with
+        :param j_base: The objective value at the current base point of the decision variables
+        """
+        for iteration in range(first_iteration, self.project.max_iterations + 1):
+
+            self.log.write(self.project.verbose, 'iter = ' + str(iteration))
+
+            if self.cancel_token.cancelled:
+                return self._cancelled(self.dvs.to_dictionary(self.dvs.x_base), j_base)
+
+            # begin DV loop; with parallel workers or a batch callback, the candidates for all remaining variables are
+            # evaluated at once speculatively, then processed in variable order exactly as the serial loop would.  Once
+            # a move is accepted, the remaining candidates were built from a stale base point, so they are re-evaluated.
+            pending = list(range(len(self.dvs)))
+            while pending:
+
+                # set up the new points, stopping at the first infeasible one so that it is reported in order
+                batch = list()
+                feasible = self.dvs.within_bounds(self.dvs.x_base + self.dvs.delta_x)
+                for k in pending if self.evaluates_in_batches() else pending[:1]:
+                    if not feasible[k]:  # pragma: no cover
+                        break
+                    batch.append(k)
+
+                if not batch:  # pragma: no cover
                     # arranging the unit test to cover this condition is too much for now
                     # if we wanted to do it, we could have the objective function be a generator that yields a bad value
-                    self.io.write_line(True, self.full_output_file,
-                                       'infeasible DV, name=' + dv.var_name)
-                    r = SearchReturnType(False, ReturnStateEnum.InfeasibleDV)
-                    if self.callback_completed:
-                        self.callback_completed(r)
-                    self.full_output_file.close()
-                    return r
-
-                # then evaluate the new point
-                obj_new = self.f_of_x(new_values)
-                j_new = obj_new.value
-
-                w = self.io.write_line
-                w(self.project.verbose, self.full_output_file, 'iter=' + str(iteration))
-                w(self.project.verbose, self.full_output_file, 'var=' + str(dv))
-                w(self.project.verbose, self.full_output_file, 'x_base=' + str([x.x_base for x in self.dvs]))
-                w(self.project.verbose, self.full_output_file, 'j_base=' + str(j_base))
-                w(self.project.verbose, self.full_output_file, 'x_new=' + str([x.x_new for x in self.dvs]))
-                w(self.project.verbose, self.full_output_file, 'j_new=' + str(j_new))
-
-                if obj_new.return_state == ReturnStateEnum.UnsuccessfulOther:  # pragma: no cover
-                    # not covering this either, this is kind of a dumping ground for unexpected errors to fail nicely
-                    self.io.write_line(True, self.full_output_file,
-                                       'Optimization ended unexpectedly, check all inputs and outputs')
-                    self.io.write_line(True, self.full_output_file,
-                                       'Error message: ' + str(obj_new.message))
-                    r = SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther)
-                    if self.callback_completed:
-                        self.callback_completed(r)
-                    self.full_output_file.close()
-                    return r
-                elif (not obj_new.return_state == ReturnStateEnum.Successful) or (j_new > j_base):
-                    dv.delta_x = -self.project.coefficient_contract * dv.delta_x
-                    dv.x_new = dv.x_base
-                    self.io.write_line(self.project.verbose, self.full_output_file,
-                                       '## Unsuccessful objective evaluation, or worse result, going back ##')
-                else:
-                    j_base = j_new
-                    dv.x_base = dv.x_new
-                    dv.delta_x = self.project.coefficient_expand * dv.delta_x
-                    self.io.write_line(self.project.verbose, self.full_output_file,
-                                       '## Improved result, accepting and continuing forward ##')
-
-            converged = True
-            for dv in self.dvs:
-                if abs(dv.delta_x) > dv.convergence_criteria:
-                    converged = False
-                    break
-
-            if converged:
-                self.io.write_line(True, self.full_output_file, '*******Converged*******')
-                converged_values = {x.var_name: x.x_new for x in self.dvs}
-                r = SearchReturnType(True, ReturnStateEnum.Successful, converged_values)
-                if self.callback_completed:
-                    self.callback_completed(r)
-                self.full_output_file.close()
-                return r
-
-            if self.callback_progress:
-                self.callback_progress(iteration, j_base)
-
-    def f_of_x(self, parameter_hash: Dict[str, float]):
-        """
-        This function calls the "f_of_x" callback function, getting outputs for the current parameter space;
-        then passes those outputs into the objective function callback as an array, which usually returns the sum-sq-err
-        between known values and current outputs.
-        """
-
-        # run the simulation function
-        simulation_results = self.callback_f_of_x(parameter_hash)
-
-        # the sim function should return None if it failed (for now)
-        if simulation_results:
-            error_to_minimize = self.callback_objective(simulation_results)
-            return ObjectiveEvaluation(ReturnStateEnum.Successful, error_to_minimize)
-        else:
-            return ObjectiveEvaluation(ReturnStateEnum.InfeasibleObj, -999999,
-                                       'Function f(x) failed, probably infeasible output')
+                    self.log.write(True, 'infeasible DV, name=' + self.dvs[pending[0]].var_name)
+                    r = SearchReturnType(False, ReturnStateEnum.InfeasibleDV, self.dvs.to_dictionary(self.dvs.x_base),
+                                         j_base)
+                    return self._finish(r)
+
+                # then evaluate the new points, any that are worse than the base point will be rejected
+                points = [self.dvs.perturbed(k) for k in batch]
+                self.evaluation_bound = self.bound_for(j_base)
+                results = yield points
+                if self.cancel_token.cancelled:
+                    # the evaluations still in flight were given up on, so this batch is left unprocessed
+                    return self._cancelled(self.dvs.to_dictionary(self.dvs.x_base), j_base)
+
+                pending = pending[len(batch):]
+                for i, (k, obj_new) in enumerate(zip(batch, results)):
+                    dvs = self.dvs
+                    dvs.x_new[k] = dvs.x_base[k] + dvs.delta_x[k]
+                    j_new = obj_new.value
+
+                    self.record_evaluation(iteration, k, points[i], obj_new, j_base)
+                    if self.project.verbose:
+                        # the detailed text is only formatted when it will be shown, the record above has it all
+                        w = self.log.write
+                        w(True, 'iter=' + str(iteration))
+                        w(True, 'var=' + dvs.names[k])
+                        w(True, 'x_base=' + str(self.dvs.x_base.tolist()))
+                        w(True, 'j_base=' + str(j_base))
+                        w(True, 'x_new=' + str(self.dvs.x_new.tolist()))
+                        w(True, 'j_new=' + str(j_new))
+
+                    if obj_new.return_state == ReturnStateEnum.UnsuccessfulOther:  # pragma: no cover
+                        # not covering this either, this is kind of a dumping ground for unexpected errors
+                        self.log.write(True, 'Optimization ended unexpectedly, check all inputs and outputs')
+                        self.log.write(True, 'Error message: ' + str(obj_new.message))
+                        r = SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther)
+                        return self._finish(r)
+                    elif (not obj_new.return_state == ReturnStateEnum.Successful) or (j_new > j_base):
+                        dvs.delta_x[k] = -self.project.coefficient_contract * dvs.delta_x[k]
+                        dvs.x_new[k] = dvs.x_base[k]
+                        if self.project.verbose:
+                            self.log.write(True, '## Unsuccessful objective evaluation, or worse result, going back ##')
+                    else:
+                        j_base = j_new
+                        dvs.x_base[k] = dvs.x_new[k]
+                        dvs.delta_x[k] = self.project.coefficient_expand * dvs.delta_x[k]
+                        if self.project.verbose:
+                            self.log.write(True, '## Improved result, accepting and continuing forward ##')
+                        # any later candidates in this batch were built from the old base point
+                        pending = batch[i + 1:] + pending
+                        break
+
+            j_base = yield from self._after_sweep(iteration, j_base)
+            if self.cancel_token.cancelled:
+                return self._cancelled(self.dvs.to_dictionary(self.dvs.x_base), j_base)
+
+            if self.dvs.converged():
+                self.log.write(True, '*******Converged*******')
+                converged_values = self.dvs.to_dictionary(self.dvs.x_new)
+                r = SearchReturnType(True, ReturnStateEnum.Successful, converged_values, j_base)
+                return self._finish(r)
+
+            checkpoint_due = self.project.checkpoint_interval and iteration % self.project.checkpoint_interval == 0
+            if checkpoint_due and self.run_dir is not None:
+                start = time.perf_counter()
+                Checkpoint(iteration, j_base, self._checkpoint_variables(), self.rng.getstate()).write(self.run_dir)
+                self.timers.add('checkpoint', time.perf_counter() - start)
+                self.log.flush()
+                self.history.flush()
+
+            self.report_progress(iteration, j_base)
+
+            stop_reason = self.stopping_rule(j_base)
+            if stop_reason is not None:
+                return self._stopped(stop_reason, self.dvs.to_dictionary(self.dvs.x_base), j_base)
+
+        self.log.write(True, 'Maximum iterations reached without converging')
+        r = SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther, self.dvs.to_dictionary(self.dvs.x_base), j_base,
+                             StopReasonEnum.MaxIterations)
+        return self._finish(r)
+
+    @staticmethod
+    def bound_for(j_base: Any) -> Optional[float]:
+        """
+        Gives the objective value above which a candidate point is rejected, so that streaming simulations of rejected
+        candidates can be terminated early
+
+        :param j_base: The objective value at the current base point
+        :return: The objective value at the base point, or None if it is not a single number
+        """
+        return j_base if isinstance(j_base, numbers.Real) else None
+
+    def _after_sweep(
+            self, iteration: int, j_base: Any
+    ) -> Generator[List[Dict[str, float]], List[ObjectiveEvaluation], Any]:
+        """
+        A hook for derived searches to take extra steps once every decision variable has been tried in an iteration,
+        before convergence is checked.  Like _iteration_steps it yields any points it needs evaluated; this base
+        version takes no steps.
+
+        :param iteration: The current iteration number
+        :param j_base: The objective value at the current base point
+        :return: The objective value at the base point after the extra steps
+        """
+        yield from ()
+        return j_base
+
+    def _checkpoint_variables(self) -> List[Dict[str, Any]]:
+        """
+        Builds the per decision variable search state stored in a checkpoint
+
+        :return: A list of dictionaries, one per decision variable, with the keys var_name, x_base and delta_x
+        """
+        return [
+            {'var_name': name, 'x_base': x_base, 'delta_x': delta_x} for name, x_base, delta_x in
+            zip(self.dvs.names, self.dvs.x_base.tolist(), self.dvs.delta_x.tolist())
+        ]
@@ -0,0 +1,212 @@
+import asyncio
+import inspect
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Generator, List, Optional, Tuple
+
+from mypyopt.cancel_token import CancelToken
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluator import aborted_evaluation, has_results
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.input_output import InputOutputManager
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.optimizer_heuristic_search import HeuristicSearch
+from mypyopt.project_structure import ProjectStructure
+from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.search_return_type import SearchReturnType
+
+
+async def run_subprocess(*command: str, cwd: Optional[Path] = None) -> Tuple[int, bytes]:
+    """
+    A small convenience for coroutine f(x) callbacks that launch a simulation program.  The program runs as an asyncio
+    subprocess, so waiting on it does not block the event loop or tie up a thread.
+
+    :param command: The program to run followed by its arguments
+    :param cwd: An optional working directory for the program, such as a per-evaluation scratch folder
+    :return: A tuple of the program exit code and everything it wrote to standard output; if the search is cancelled
+             while the program runs, the program is killed
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=None if cwd is None else str(cwd), stdout=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, _ = await process.communicate()
+    except asyncio.CancelledError:
+        # the search was cancelled, so the simulation is of no more use
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, stdout
+
+
+class AsyncHeuristicSearch(HeuristicSearch):
+    """
+    This class runs the same heuristic search as HeuristicSearch, but is driven from an asyncio event loop, for
+    simulation backends that spend their time waiting on files and subprocesses rather than computing in Python.
+
+    The f(x) callback is a coroutine function, and the objective, progress and completed callbacks may each be either
+    a plain function or a coroutine function.  Every sweep is evaluated speculatively, as in the parallel mode of
+    HeuristicSearch, with at most parallel_workers evaluations in flight at once.  A semaphore can be shared between
+    several searches running on the same loop to bound the total number of simulations across all of them, along with
+    the number of evaluations it allows, as asyncio semaphores do not expose their size.
+    """
+    def __init__(
+            self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
+            callback_f_of_x: Optional[Callable[[Dict[str, float]], Awaitable[Any]]],
+            callback_objective: Optional[Callable[[Any], Any]],
+            input_output_worker: Optional[InputOutputManager] = None,
+            callback_progress: Optional[Callable[[int, float], Any]] = None,
+            callback_completed: Optional[Callable[[SearchReturnType], Any]] = None,
+            evaluation_cache: Optional[EvaluationCache] = None,
+            callback_batch: Optional[Callable[[Any], Any]] = None,
+            concurrency_limit: Optional[asyncio.Semaphore] = None, cancel_token: Optional[CancelToken] = None,
+            concurrency: Optional[int] = None
+    ):
+        """
+        The constructor for the class, the arguments match HeuristicSearch except for the following
+
+        :param callback_f_of_x: A coroutine function that accepts the parameter dictionary, awaits the simulation, and
+                                returns its results, or None if it failed
+        :param concurrency_limit: An optional semaphore bounding the number of evaluations in flight; if not given,
+                                  one is created allowing concurrency evaluations at once
+        :param concurrency: The number of evaluations that may be in flight at once, which is what concurrency_limit
+                            allows, if given, and decides whether sweeps are evaluated speculatively; defaults to
+                            project_settings.parallel_workers
+        :raises MyPyOptException: If concurrency is less than 1
+        """
+        super().__init__(project_settings, decision_variable_array, callback_f_of_x, callback_objective,
+                         input_output_worker, callback_progress, callback_completed, evaluation_cache,
+                         callback_batch, cancel_token=cancel_token)
+        if concurrency is not None and concurrency < 1:
+            raise MyPyOptException("concurrency must be at least 1, aborting...")
+        self.concurrency_limit = concurrency_limit
+        self.concurrency = project_settings.parallel_workers if concurrency is None else concurrency
+        self._limit: Optional[asyncio.Semaphore] = None
+        self._awaiting: List[Awaitable[Any]] = list()
+
+    def search(self) -> SearchReturnType:
+        """
+        A blocking convenience which runs search_async in a new event loop
+        """
+        return asyncio.run(self.search_async())
+
+    async def search_async(self) -> SearchReturnType:
+        """
+        This is the main driver function for the optimization, to be awaited from a running event loop.
+        It walks the parameter space finding a minimum objective function.
+        """
+        self._open_run()
+        return await self._drive_async(self._start_steps())
+
+    async def resume_async(self, checkpoint_path: Optional[Path] = None) -> SearchReturnType:
+        """
+        Continues an interrupted search from a checkpoint, see HeuristicSearch.resume
+
+        :param checkpoint_path: The path to a checkpoint file or the run directory containing one; if not given, the
+                                most recent checkpoint written by any run of this project is used
+        """
+        self._open_run()
+        checkpoint = self._restore_checkpoint(checkpoint_path)
+        return await self._drive_async(self._iteration_steps(checkpoint.iteration + 1, checkpoint.j_base))
+
+    def evaluates_in_batches(self) -> bool:
+        # speculation only pays off when more than one evaluation can be in flight at once, as for HeuristicSearch
+        return self.callback_batch is not None or self.concurrency > 1
+
+    def report_progress(self, iteration: int, objective_value: Any) -> None:
+        if self.callback_progress:
+            self._defer(self.callback_progress(*self._progress_arguments(iteration, objective_value)))
+
+    def report_completed(self, search_return: SearchReturnType) -> None:
+        if self.callback_completed:
+            self._defer(self.callback_completed(search_return))
+
+    def _defer(self, callback_result: Any) -> None:
+        # the search steps are plain generators, so coroutine callbacks are awaited by the driver between steps
+        if inspect.isawaitable(callback_result):
+            self._awaiting.append(callback_result)
+
+    async def _drive_async(
+            self, steps: Generator[List[Dict[str, float]], List[ObjectiveEvaluation], SearchReturnType]
+    ) -> SearchReturnType:
+        self._limit = self.concurrency_limit
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+        try:
+            points = next(steps)
+            while True:
+                await self._flush_callbacks()
+                points = steps.send(await self.evaluate_points_async(points))
+        except StopIteration as stop:
+            await self._flush_callbacks()
+            return stop.value
+        except BaseException:
+            self._abandon_run()
+            raise
+        finally:
+            self._stop_watching()
+
+    async def _flush_callbacks(self) -> None:
+        while self._awaiting:
+            await self._awaiting.pop(0)
+
+    async def evaluate_points_async(self, parameter_hashes: List[Dict[str, float]]) -> List[ObjectiveEvaluation]:
+        """
+        Evaluates a batch of points concurrently, within the concurrency limit, skipping any that are cached
+
+        :param parameter_hashes: A list of parameter dictionaries, one for each point to evaluate
+        :return: A list of ObjectiveEvaluation instances, in the same order as the points
+        """
+        results, to_run = self._cache_lookup(parameter_hashes)
+        start = time.perf_counter()
+        if self.callback_batch is not None:
+            evaluations = self._run_points([parameter_hashes[i] for i in to_run])
+        else:
+            evaluations = await self._gather_cancellable([self.f_of_x_async(parameter_hashes[i]) for i in to_run])
+        self.record_evaluation_times(evaluations, time.perf_counter() - start)
+        return self._cache_store(parameter_hashes, results, to_run, list(evaluations))
+
+    async def _gather_cancellable(self, coroutines: List[Awaitable[ObjectiveEvaluation]]) -> List[ObjectiveEvaluation]:
+        # cancelling the token cancels the evaluation tasks, which raises CancelledError inside the awaited callbacks
+        loop = asyncio.get_running_loop()
+        tasks = [asyncio.ensure_future(c) for c in coroutines]
+        remove_callback = self.cancel_token.add_callback(
+            lambda: loop.call_soon_threadsafe(lambda: [t.cancel() for t in tasks])
+        )
+        try:
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            remove_callback()
+        evaluations = list()
+        for outcome in outcomes:
+            if isinstance(outcome, asyncio.CancelledError):
+                evaluations.append(aborted_evaluation())
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                evaluations.append(outcome)
+        return evaluations
+
+    async def f_of_x_async(self, parameter_hash: Dict[str, float]) -> ObjectiveEvaluation:
+        """
+        Awaits the f(x) callback at a single point and passes the results through the objective callback
+
+        :param parameter_hash: A dictionary of parameters with keys as the variable names, and current variable values
+        """
+        async with self._limit:
+            # with other evaluations in flight, these times include any time the event loop spent on them
+            start = time.perf_counter()
+            simulation_results = await self.callback_f_of_x(parameter_hash)
+            simulated = time.perf_counter()
+        if has_results(simulation_results):
+            error_to_minimize = self.callback_objective(simulation_results)
+            if inspect.isawaitable(error_to_minimize):
+                error_to_minimize = await error_to_minimize
+            evaluation = ObjectiveEvaluation(ReturnStateEnum.Successful, error_to_minimize)
+            evaluation.objective_seconds = time.perf_counter() - simulated
+        else:
+            evaluation = ObjectiveEvaluation(ReturnStateEnum.InfeasibleObj, -999999,
+                                             'Function f(x) failed, probably infeasible output')
+        evaluation.simulate_seconds = simulated - start
+        return evaluation
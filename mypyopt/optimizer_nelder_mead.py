@@ -0,0 +1,216 @@
+from typing import Callable, Any, Dict, List, Optional
+
+from mypyopt.cancel_token import CancelToken
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluator import Evaluator
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.input_output import InputOutputManager
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.optimizer import Optimizer
+from mypyopt.project_structure import ProjectStructure
+from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.search_return_type import SearchReturnType
+from mypyopt.stop_reason_enum import StopReasonEnum
+
+
+class NelderMeadSearch(Optimizer):
+    """
+    This class implements the Nelder-Mead simplex search, a derivative free search that, unlike the heuristic search,
+    moves all of the decision variables together, so it follows valleys where the variables are coupled.  The process
+    is:
+
+    1. Evaluate the initial simplex, made of the initial point and one more vertex for each decision variable, stepped
+       from the initial point by the initial step size of that variable, all at once
+
+    2. Reflect the worst vertex through the centroid of the others; if the reflection is the new best point, try
+       expanding further along the same line, and if it is no better than the second worst vertex, try contracting
+       towards the centroid instead, outside or inside the simplex depending on whether the reflection improved on the
+       worst vertex
+
+    3. Replace the worst vertex with the point the step above chose; if none was good enough, shrink every vertex
+       towards the best one, evaluating all of the shrunk vertices at once
+
+    4. Continue until the simplex spans no more than the convergence criterion of every decision variable, or maximum
+       iterations is reached
+
+    Only one of the expansion and contraction points is needed in each iteration, but which one depends on the value of
+    the reflection.  When the evaluator has more than one parallel worker, or there is a batch callback, the reflection
+    is evaluated along with as many of the expansion, outside contraction and inside contraction, in that order, as
+    there are workers to spare.  That keeps the workers busy even on problems with few decision variables, and an
+    iteration then costs about the wall time of a single evaluation, at the price of evaluations whose results are not
+    used.  Candidate points are clipped to the decision variable bounds.  The decision variables x_base and delta_x are
+    kept at the best vertex and the extent of the simplex around it.
+    """
+
+    def __init__(
+            self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
+            callback_f_of_x: Optional[Callable[[Dict[str, float]], Any]],
+            callback_objective: Optional[Callable[[Any], float]],
+            input_output_worker: Optional[InputOutputManager] = None,
+            callback_progress: Optional[Callable[[int, float], None]] = None,
+            callback_completed: Optional[Callable[[SearchReturnType], None]] = None,
+            evaluation_cache: Optional[EvaluationCache] = None,
+            callback_batch: Optional[Callable[[Any], Any]] = None,
+            evaluator: Optional[Evaluator] = None, cancel_token: Optional[CancelToken] = None,
+            reflection: float = 1.0, expansion: float = 2.0, contraction: float = 0.5, shrink: float = 0.5
+    ):
+        """
+        The constructor for the class, the arguments match HeuristicSearch except for the following
+
+        :param callback_objective: As for HeuristicSearch, but it must return a single number
+        :param reflection: How far past the centroid the worst vertex is reflected, as a multiple of its distance from
+                           the centroid
+        :param expansion: How far past the centroid the expansion point lies, as a multiple of the reflection
+        :param contraction: How far from the centroid the contraction points lie, as a fraction of the distance to the
+                            reflection or to the worst vertex
+        :param shrink: The fraction of its distance from the best vertex each vertex keeps in a shrink
+        :raises MyPyOptException: If the simplex coefficients are invalid
+        """
+        super().__init__(project_settings, decision_variable_array, callback_f_of_x, callback_objective,
+                         input_output_worker, callback_progress, callback_completed, evaluation_cache,
+                         callback_batch, evaluator, cancel_token)
+        if not (reflection > 0 and expansion > 1 and 0 < contraction < 1 and 0 < shrink < 1):
+            raise MyPyOptException("Nelder-Mead needs reflection > 0, expansion > 1, and contraction and shrink "
+                                   "between 0 and 1, aborting...")
+        self.reflection = reflection
+        self.expansion = expansion
+        self.contraction = contraction
+        self.shrink = shrink
+
+    def _search(self) -> SearchReturnType:
+        """
+        This is the main driver function for the optimization.
+        It moves a simplex across the parameter space towards a minimum objective function.
+        """
+        import numpy as np
+
+        self._open_run()
+        self.log.write(True, '\n*******Optimization Beginning*******')
+
+        lower = self.dvs.value_minimum
+        upper = self.dvs.value_maximum
+        batch_size = self.evaluator.workers if self.evaluates_in_batches() else 1
+
+        # one vertex per decision variable, stepped towards whichever bound leaves room; the initial point gates them
+        simplex = np.tile(self.dvs.x_base, (len(self.dvs) + 1, 1))
+        for k, dv in enumerate(self.dvs):
+            step = abs(dv.step_size_initial)
+            simplex[k + 1, k] += step if simplex[k + 1, k] + step <= upper[k] else -step
+        simplex = np.clip(simplex, lower, upper)
+        evaluations = self.evaluate_points([self.dvs.point(x) for x in simplex])
+        ended = self._initial_point(self.dvs.point(simplex[0]), evaluations[0])
+        if ended is not None:
+            return ended
+        values = np.array([self._scalar(e, 'Nelder-Mead search') for e in evaluations])
+        for k in range(1, len(simplex)):
+            self.record_evaluation(0, k - 1, self.dvs.point(simplex[k]), evaluations[k], values[0])
+        failure = self._failure(evaluations)
+        if failure is not None:
+            return failure
+
+        for iteration in range(1, self.project.max_iterations + 1):
+
+            self.log.write(self.project.verbose, 'iter = ' + str(iteration))
+
+            if self.cancel_token.cancelled:
+                best = int(values.argmin())
+                return self._cancelled(self.dvs.to_dictionary(simplex[best]), float(values[best]))
+
+            order = np.argsort(values, kind='stable')
+            simplex = simplex[order]
+            values = values[order]
+            centroid = simplex[:-1].mean(axis=0)
+            reflected = centroid + self.reflection * (centroid - simplex[-1])
+            candidates = {
+                'reflection': reflected,
+                'expansion': centroid + self.expansion * (reflected - centroid),
+                'outside contraction': centroid + self.contraction * (reflected - centroid),
+                'inside contraction': centroid + self.contraction * (simplex[-1] - centroid),
+            }
+            candidates = {name: np.clip(x, lower, upper) for name, x in candidates.items()}
+            tried: Dict[str, float] = dict()
+            failures: List[ObjectiveEvaluation] = list()
+
+            def value_of(name: str) -> float:
+                # evaluates the candidate, along with as many of the later ones as there are workers to spare
+                if name not in tried and not self.cancel_token.cancelled:
+                    names = [name] + [n for n in candidates if n not in tried and n != name][:batch_size - 1]
+                    points = [self.dvs.point(candidates[n]) for n in names]
+                    # a candidate worse than the worst vertex is only ever compared with it, so its value is not needed
+                    batch = self.evaluate_points(points, bound=float(values[-1]))
+                    for n, point, evaluation in zip(names, points, batch):
+                        self.record_evaluation(iteration, -1, point, evaluation, float(values[0]))
+                        tried[n] = self._scalar(evaluation, 'Nelder-Mead search')
+                    failures.extend(batch)
+                return tried.get(name, float('inf'))
+
+            move = None
+            f_reflected = value_of('reflection')
+            if f_reflected < values[0]:
+                move = 'expansion' if value_of('expansion') < f_reflected else 'reflection'
+            elif f_reflected < values[-2]:
+                move = 'reflection'
+            elif f_reflected < values[-1]:
+                if value_of('outside contraction') <= f_reflected:
+                    move = 'outside contraction'
+            elif value_of('inside contraction') < values[-1]:
+                move = 'inside contraction'
+            if self.cancel_token.cancelled:
+                return self._cancelled(self.dvs.to_dictionary(simplex[0]), float(values[0]))
+            failure = self._failure(failures)
+            if failure is not None:
+                return failure
+
+            if move is not None:
+                simplex[-1] = candidates[move]
+                values[-1] = tried[move]
+            else:
+                move = 'shrink'
+                simplex[1:] = simplex[0] + self.shrink * (simplex[1:] - simplex[0])
+                points = [self.dvs.point(x) for x in simplex[1:]]
+                evaluations = self.evaluate_points(points)
+                if self.cancel_token.cancelled:
+                    return self._cancelled(self.dvs.to_dictionary(simplex[0]), float(values[0]))
+                for k, (point, evaluation) in enumerate(zip(points, evaluations)):
+                    self.record_evaluation(iteration, -1, point, evaluation, float(values[0]))
+                    values[k + 1] = self._scalar(evaluation, 'Nelder-Mead search')
+                failure = self._failure(evaluations)
+                if failure is not None:
+                    return failure
+
+            best = int(values.argmin())
+            self.dvs.x_base[:] = simplex[best]
+            self.dvs.x_new[:] = simplex[best]
+            self.dvs.delta_x[:] = abs(simplex - simplex[best]).max(axis=0)
+            if self.project.verbose:
+                self.log.write(True, move + ', x_best=' + str(self.dvs.x_base.tolist()))
+                self.log.write(True, 'j_best=' + str(values[best]) + ', extent=' + str(self.dvs.delta_x.tolist()))
+
+            if self.dvs.converged():
+                self.log.write(True, '*******Converged*******')
+                converged_values = self.dvs.to_dictionary(self.dvs.x_base)
+                r = SearchReturnType(True, ReturnStateEnum.Successful, converged_values, float(values[best]))
+                return self._finish(r)
+
+            self.report_progress(iteration, float(values[best]))
+
+            stop_reason = self.stopping_rule(float(values[best]))
+            if stop_reason is not None:
+                return self._stopped(stop_reason, self.dvs.to_dictionary(self.dvs.x_base), float(values[best]))
+
+        self.log.write(True, 'Maximum iterations reached without converging')
+        r = SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther, self.dvs.to_dictionary(self.dvs.x_base),
+                             float(values.min()), StopReasonEnum.MaxIterations)
+        return self._finish(r)
+
+    def _failure(self, evaluations: List[ObjectiveEvaluation]) -> Optional[SearchReturnType]:
+        """
+        Ends the search if any of the evaluations failed in a way that means the others cannot be trusted either
+        """
+        for evaluation in evaluations:
+            if evaluation.return_state == ReturnStateEnum.UnsuccessfulOther:  # pragma: no cover
+                self.log.write(True, 'Optimization ended unexpectedly, check all inputs and outputs')
+                self.log.write(True, 'Error message: ' + str(evaluation.message))
+                return self._finish(SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther))
+        return None
@@ -0,0 +1,131 @@
+from typing import TYPE_CHECKING, Callable, Any, Dict, Generator, List, Optional
+
+from mypyopt.cancel_token import CancelToken
+from mypyopt.checkpoint import Checkpoint
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluator import Evaluator
+from mypyopt.input_output import InputOutputManager
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.optimizer_heuristic_search import HeuristicSearch
+from mypyopt.project_structure import ProjectStructure
+from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.search_return_type import SearchReturnType
+
+if TYPE_CHECKING:  # pathlib is slow to import and only needed for the annotations
+    from pathlib import Path
+
+
+class PatternSearch(HeuristicSearch):
+    """
+    This class implements a Hooke-Jeeves style pattern search on top of the heuristic search.  Each iteration begins
+    with the same exploratory sweep as HeuristicSearch, stepping each decision variable in turn and expanding or
+    contracting its step with the project coefficients, then follows it with a pattern move:
+
+    1. Take the displacement of the base point since the end of the previous sweep, which includes the previous
+       pattern move if that was accepted
+
+    2. Evaluate the pattern point one displacement further along, clipped to the decision variable bounds
+
+    3. If the objective value reduced, move the base point there, so the next sweep explores around it and the next
+       displacement is longer; otherwise keep the base point and start the next displacement from it
+
+    On problems whose minimum lies along a narrow valley that is not aligned with the decision variables, the sweep
+    alone can only zig-zag along the valley floor with steps no longer than the step sizes, while the pattern moves
+    follow the valley and lengthen with each success.  A pattern move costs one extra evaluation per iteration in
+    which the base point moved.
+    """
+
+    def __init__(
+            self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
+            callback_f_of_x: Optional[Callable[[Dict[str, float]], Any]],
+            callback_objective: Optional[Callable[[Any], List[float]]],
+            input_output_worker: Optional[InputOutputManager] = None,
+            callback_progress: Optional[Callable[[int, float], None]] = None,
+            callback_completed: Optional[Callable[[SearchReturnType], None]] = None,
+            evaluation_cache: Optional[EvaluationCache] = None,
+            callback_batch: Optional[Callable[[Any], Any]] = None,
+            evaluator: Optional[Evaluator] = None, cancel_token: Optional[CancelToken] = None
+    ):
+        """
+        The constructor for the class, the arguments match HeuristicSearch
+        """
+        super().__init__(project_settings, decision_variable_array, callback_f_of_x, callback_objective,
+                         input_output_worker, callback_progress, callback_completed, evaluation_cache,
+                         callback_batch, evaluator, cancel_token)
+        # the base point at the end of the previous sweep, which the pattern moves away from
+        self.x_previous: Any = None
+
+    def _iteration_steps(
+            self, first_iteration: int, j_base: Any
+    ) -> Generator[List[Dict[str, float]], List[ObjectiveEvaluation], SearchReturnType]:
+        """
+        The search steps of the iteration loop, see HeuristicSearch._iteration_steps
+
+        :param first_iteration: The iteration number to begin with
+        :param j_base: The objective value at the current base point of the decision variables
+        """
+        if first_iteration == 1 or self.x_previous is None:
+            self.x_previous = self.dvs.x_base.copy()
+        return (yield from super()._iteration_steps(first_iteration, j_base))
+
+    def _after_sweep(
+            self, iteration: int, j_base: Any
+    ) -> Generator[List[Dict[str, float]], List[ObjectiveEvaluation], Any]:
+        """
+        Tries a pattern move along the displacement of the base point since the previous sweep
+
+        :param iteration: The current iteration number
+        :param j_base: The objective value at the current base point
+        :return: The objective value at the base point after the pattern move
+        """
+        import numpy as np
+        x_sweep = self.dvs.x_base.copy()
+        pattern = np.clip(2.0 * x_sweep - self.x_previous, self.dvs.value_minimum, self.dvs.value_maximum)
+        self.x_previous = x_sweep
+        if np.count_nonzero(pattern != x_sweep) < 2:
+            # a displacement along a single decision variable is already continued by the next sweep
+            return j_base
+
+        point = self.dvs.point(pattern)
+        self.evaluation_bound = self.bound_for(j_base)
+        obj_pattern = (yield [point])[0]
+        if self.cancel_token.cancelled:
+            return j_base
+        self.record_evaluation(iteration, -1, point, obj_pattern, j_base)
+        if self.project.verbose:
+            self.log.write(True, 'pattern x_new=' + str(pattern.tolist()))
+            self.log.write(True, 'pattern j_new=' + str(obj_pattern.value))
+        if obj_pattern.return_state == ReturnStateEnum.Successful and obj_pattern.value < j_base:
+            self.dvs.x_base[:] = pattern
+            self.dvs.x_new[:] = pattern
+            if self.project.verbose:
+                self.log.write(True, '## Pattern move improved result, accepting ##')
+            return obj_pattern.value
+        return j_base
+
+    def _checkpoint_variables(self) -> List[Dict[str, Any]]:
+        """
+        Builds the per decision variable search state stored in a checkpoint, adding the end of the previous sweep
+
+        :return: A list of dictionaries, one per decision variable, with the keys var_name, x_base, delta_x and
+                 x_previous
+        """
+        variables = super()._checkpoint_variables()
+        for d, x_previous in zip(variables, self.x_previous.tolist()):
+            d['x_previous'] = x_previous
+        return variables
+
+    def _restore_checkpoint(self, checkpoint_path: Optional['Path']) -> Checkpoint:
+        """
+        Reads a checkpoint and moves the search to the state it describes, see HeuristicSearch._restore_checkpoint
+
+        :param checkpoint_path: The path to a checkpoint file or run directory, or None for the most recent checkpoint
+        :return: The Checkpoint instance that was restored
+        """
+        import numpy as np
+        checkpoint = super()._restore_checkpoint(checkpoint_path)
+        # a checkpoint written by a plain heuristic search starts the pattern afresh from its base point
+        saved = [d.get('x_previous', d['x_base']) for d in checkpoint.decision_variables]
+        self.x_previous = np.array(saved, dtype=float)
+        return checkpoint
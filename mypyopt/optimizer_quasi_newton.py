@@ -0,0 +1,304 @@
+from typing import Callable, Any, Dict, List, Optional
+
+from mypyopt.cancel_token import CancelToken
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluator import Evaluator
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.input_output import InputOutputManager
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.optimizer import Optimizer
+from mypyopt.project_structure import ProjectStructure
+from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.search_return_type import SearchReturnType
+from mypyopt.stop_reason_enum import StopReasonEnum
+
+
+class QuasiNewtonSearch(Optimizer):
+    """
+    This class implements a bounded quasi-Newton search in the style of L-BFGS-B, for smooth objectives, with the
+    gradient estimated by finite differences.  The process is:
+
+    1. Estimate the gradient at the base point by stepping each decision variable by its difference step, forward or
+       on both sides, evaluating all of the stepped points together
+
+    2. Build a search direction from the gradient and the curvature seen in the last few steps, with the two-loop
+       recursion of L-BFGS, leaving out any decision variable held at a bound by the gradient
+
+    3. Search along the direction, projected back inside the bounds, halving the step until the objective value drops
+       enough, evaluating as many step lengths at once as there are parallel workers
+
+    4. Continue until a step moves every decision variable by no more than its convergence criterion, no step along
+       the direction reduces the objective value, or maximum iterations is reached
+
+    The gradient points need no particular order, so with parallel workers or a batch callback a whole gradient costs
+    about the wall time of a single evaluation.  The difference step of each decision variable is its convergence
+    criterion times the difference scale, so the criterion should be well above the noise of the simulation output.
+    The search works in coordinates scaled by the initial step size of each decision variable, and its first step is
+    one initial step long along the variable with the steepest slope.  The decision variables x_base and delta_x are
+    kept at the best point and the last step.
+    """
+
+    def __init__(
+            self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
+            callback_f_of_x: Optional[Callable[[Dict[str, float]], Any]],
+            callback_objective: Optional[Callable[[Any], float]],
+            input_output_worker: Optional[InputOutputManager] = None,
+            callback_progress: Optional[Callable[[int, float], None]] = None,
+            callback_completed: Optional[Callable[[SearchReturnType], None]] = None,
+            evaluation_cache: Optional[EvaluationCache] = None,
+            callback_batch: Optional[Callable[[Any], Any]] = None,
+            evaluator: Optional[Evaluator] = None, cancel_token: Optional[CancelToken] = None,
+            differences: str = 'central', difference_scale: float = 1.0, memory: int = 10
+    ):
+        """
+        The constructor for the class, the arguments match HeuristicSearch except for the following
+
+        :param callback_objective: As for HeuristicSearch, but it must return a single number
+        :param differences: 'central' to estimate the gradient from points on both sides of the base point, which
+                            costs two evaluations per decision variable, or 'forward' for one side only, which costs
+                            one evaluation per decision variable but is less accurate
+        :param difference_scale: The difference step of each decision variable as a multiple of its convergence
+                                 criterion
+        :param memory: The number of recent steps whose curvature shapes the search direction
+        :raises MyPyOptException: If the gradient arguments are invalid
+        """
+        super().__init__(project_settings, decision_variable_array, callback_f_of_x, callback_objective,
+                         input_output_worker, callback_progress, callback_completed, evaluation_cache,
+                         callback_batch, evaluator, cancel_token)
+        if differences not in ('central', 'forward'):
+            raise MyPyOptException("Quasi-Newton differences must be 'central' or 'forward', aborting...")
+        if difference_scale <= 0 or memory < 1:
+            raise MyPyOptException("Quasi-Newton difference scale must be positive and memory at least 1, aborting...")
+        self.differences = differences
+        self.difference_scale = difference_scale
+        self.memory = memory
+        # an evaluation that failed in a way that ends the search, found while estimating a gradient or searching a line
+        self._failure: Optional[ObjectiveEvaluation] = None
+
+    def _search(self) -> SearchReturnType:
+        """
+        This is the main driver function for the optimization.
+        It follows the estimated gradient of the objective function to a minimum.
+        """
+        import numpy as np
+
+        self._open_run()
+        self.log.write(True, '\n*******Optimization Beginning*******')
+
+        lower = self.dvs.value_minimum
+        upper = self.dvs.value_maximum
+        scale = np.array([abs(dv.step_size_initial) or 1.0 for dv in self.dvs], dtype=float)
+        batch_size = self.evaluator.workers if self.evaluates_in_batches() else 1
+        s_history: List[Any] = list()
+        y_history: List[Any] = list()
+
+        self._failure = None
+        x = self.dvs.x_base.copy()
+        f, gradient = self._value_and_gradient(0, x, None)
+        if f is None:
+            return self._cancelled(None, None)
+        if not np.isfinite(f):
+            return self._invalid_initial_point()
+        if self._failure is not None:
+            return self._failed()
+
+        for iteration in range(1, self.project.max_iterations + 1):
+
+            self.log.write(self.project.verbose, 'iter = ' + str(iteration))
+
+            if self.cancel_token.cancelled:
+                return self._cancelled(self.dvs.to_dictionary(x), f)
+
+            # a variable whose stepped points all failed gets no slope, so the search leaves it where it is for this
+            # step, but a gradient with no slope known at all says nothing about whether this is a minimum
+            known = np.isfinite(gradient)
+            if not known.any():
+                return self._no_gradient(x, f)
+            gradient = np.where(known, gradient, 0.0)
+            # variables at a bound with the gradient pushing them further out are held there for this step
+            held = ((x <= lower) & (gradient > 0)) | ((x >= upper) & (gradient < 0))
+            direction = self._direction(gradient * scale, held, s_history, y_history) * scale
+            if not direction.any():
+                if not known.all():
+                    return self._no_gradient(x, f)
+                return self._converged(x, f, 'the projected gradient is zero')
+
+            x_new, f_new = self._line_search(iteration, x, f, gradient, direction, batch_size)
+            if self.cancel_token.cancelled:
+                return self._cancelled(self.dvs.to_dictionary(x), f)
+            if self._failure is not None:
+                return self._failed()
+            if x_new is None:
+                return self._converged(x, f, 'no step along the search direction reduces the objective value')
+
+            step = x_new - x
+            self.dvs.x_base[:] = x_new
+            self.dvs.x_new[:] = x_new
+            self.dvs.delta_x[:] = step
+            if self.project.verbose:
+                self.log.write(True, 'x_best=' + str(x_new.tolist()))
+                self.log.write(True, 'j_best=' + str(f_new))
+            if self.dvs.converged():
+                return self._converged(x_new, f_new, 'the last step was within the convergence criteria')
+
+            _, gradient_new = self._value_and_gradient(iteration, x_new, f_new)
+            if gradient_new is None:
+                return self._cancelled(self.dvs.to_dictionary(x_new), f_new)
+            if self._failure is not None:
+                return self._failed()
+            s = step / scale
+            y = (gradient_new - gradient) * scale
+            # only steps that saw positive curvature keep the direction a descent direction, and a step with a slope
+            # missing at either end tells nothing about the curvature
+            if np.isfinite(y).all() and s.dot(y) > 1e-10 * s.dot(s):
+                s_history.append(s)
+                y_history.append(y)
+                if len(s_history) > self.memory:
+                    s_history.pop(0)
+                    y_history.pop(0)
+            x, f, gradient = x_new, f_new, gradient_new
+
+            self.report_progress(iteration, f)
+
+            stop_reason = self.stopping_rule(f)
+            if stop_reason is not None:
+                return self._stopped(stop_reason, self.dvs.to_dictionary(x), f)
+
+        self.log.write(True, 'Maximum iterations reached without converging')
+        r = SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther, self.dvs.to_dictionary(x), f,
+                             StopReasonEnum.MaxIterations)
+        return self._finish(r)
+
+    def _converged(self, x, f: float, why: str) -> SearchReturnType:
+        self.log.write(True, '*******Converged*******')
+        self.log.write(self.project.verbose, 'Converged because ' + why)
+        return self._finish(SearchReturnType(True, ReturnStateEnum.Successful, self.dvs.to_dictionary(x), f))
+
+    def _no_gradient(self, x, f: float) -> SearchReturnType:
+        self.log.write(True, 'No finite difference could be formed, since the stepped points failed.  Aborting...')
+        return self._finish(SearchReturnType(False, ReturnStateEnum.InfeasibleObj, self.dvs.to_dictionary(x), f))
+
+    def _value_and_gradient(self, iteration: int, x, f: Optional[float]):
+        """
+        Estimates the gradient at a point by finite differences, evaluating all of the stepped points at once, along
+        with the point itself if its objective value is not known yet
+
+        :return: A tuple of the objective value at the point and the gradient, with nan for each variable whose stepped
+                 points all failed, or of None and None if the search was cancelled
+        """
+        import numpy as np
+        dimensions = len(self.dvs)
+        lower = self.dvs.value_minimum
+        upper = self.dvs.value_maximum
+        h = self.dvs.convergence_criteria * self.difference_scale
+        # a step that would leave the bounds is taken on the other side instead
+        forward = np.where(x + h <= upper, h, -h)
+        if self.differences == 'central':
+            both = (x + h <= upper) & (x - h >= lower)
+            steps = [forward] + [np.where(both, -h, np.nan)]
+        else:
+            steps = [forward]
+        points = list()
+        owners = list()
+        for side, step in enumerate(steps):
+            for k in range(dimensions):
+                if not np.isnan(step[k]):
+                    p = x.copy()
+                    p[k] += step[k]
+                    points.append(p)
+                    owners.append((side, k))
+        if f is None:
+            points.insert(0, x.copy())
+        evaluations = self.evaluate_points([self.dvs.point(p) for p in points])
+        if self.cancel_token.cancelled:
+            return None, None
+        if f is None:
+            initial = evaluations.pop(0)
+            f = self._scalar(initial, 'Quasi-Newton search')
+            self.record_evaluation(iteration, -1, self.dvs.point(points.pop(0)), initial, initial.value)
+            if not np.isfinite(f):
+                return f, None
+        values = np.full((2, dimensions), np.nan)
+        for (side, k), p, evaluation in zip(owners, points, evaluations):
+            self.record_evaluation(iteration, k, self.dvs.point(p), evaluation, f)
+            self._note_failure(evaluation)
+            values[side, k] = self._scalar(evaluation, 'Quasi-Newton search')
+        values[~np.isfinite(values)] = np.nan
+        central = (values[0] - values[1]) / (2 * h)
+        one_sided = (values[0] - f) / forward
+        return f, np.where(np.isfinite(central), central, one_sided)
+
+    def _direction(self, gradient, held, s_history, y_history):
+        """
+        Builds the search direction in scaled coordinates with the L-BFGS two-loop recursion over the free variables
+        """
+        import numpy as np
+        q = np.where(held, 0.0, gradient)
+        if not s_history:
+            # without any curvature yet, take one initial step along the steepest variable
+            largest = abs(q).max()
+            return -q / largest if largest > 0 else q
+        free = ~held
+        alphas = list()
+        for s, y in zip(reversed(s_history), reversed(y_history)):
+            rho = 1.0 / y[free].dot(s[free]) if y[free].dot(s[free]) > 0 else 0.0
+            alpha = rho * s[free].dot(q[free])
+            q[free] -= alpha * y[free]
+            alphas.append((rho, alpha))
+        s, y = s_history[-1], y_history[-1]
+        q *= s.dot(y) / y.dot(y)
+        for (s, y), (rho, alpha) in zip(zip(s_history, y_history), reversed(alphas)):
+            beta = rho * y[free].dot(q[free])
+            q[free] += (alpha - beta) * s[free]
+        direction = np.where(held, 0.0, -q)
+        if direction.dot(gradient) >= 0:
+            # the curvature pairs no longer describe the objective, so start afresh from the steepest descent
+            s_history.clear()
+            y_history.clear()
+            return self._direction(gradient, held, s_history, y_history)
+        return direction
+
+    def _line_search(self, iteration: int, x, f: float, gradient, direction, batch_size: int):
+        """
+        Halves the step along the direction, projected inside the bounds, until the objective value drops enough,
+        evaluating batch_size step lengths at a time
+
+        :return: A tuple of the new point and its objective value, or of None and None if no step was good enough
+        """
+        import numpy as np
+        lower = self.dvs.value_minimum
+        upper = self.dvs.value_maximum
+        alpha = 1.0
+        while True:
+            candidates = list()
+            for _ in range(batch_size):
+                candidate = np.clip(x + alpha * direction, lower, upper)
+                # once the steps are within the convergence criteria, the search has nowhere left to go
+                if (abs(candidate - x) <= self.dvs.convergence_criteria).all():
+                    break
+                candidates.append(candidate)
+                alpha /= 2
+            if not candidates:
+                return None, None
+            evaluations = self.evaluate_points([self.dvs.point(c) for c in candidates], bound=f)
+            if self.cancel_token.cancelled:
+                return None, None
+            accepted = None
+            for candidate, evaluation in zip(candidates, evaluations):
+                self.record_evaluation(iteration, -1, self.dvs.point(candidate), evaluation, f)
+                self._note_failure(evaluation)
+                value = self._scalar(evaluation, 'Quasi-Newton search')
+                if accepted is None and value <= f + 1e-4 * gradient.dot(candidate - x):
+                    accepted = (candidate, value)
+            if accepted is not None or self._failure is not None:
+                return accepted if accepted is not None else (None, None)
+
+    def _note_failure(self, evaluation: ObjectiveEvaluation) -> None:
+        if evaluation.return_state == ReturnStateEnum.UnsuccessfulOther and self._failure is None:
+            self._failure = evaluation
+
+    def _failed(self) -> SearchReturnType:
+        self.log.write(True, 'Optimization ended unexpectedly, check all inputs and outputs')
+        self.log.write(True, 'Error message: ' + str(self._failure.message))
+        return self._finish(SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther))
@@ -0,0 +1,282 @@
+from typing import Callable, Any, Dict, List, Optional
+
+from mypyopt.cancel_token import CancelToken
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.decision_variable_set import ParameterView
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluator import Evaluator
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.input_output import InputOutputManager
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.optimizer import Optimizer
+from mypyopt.project_structure import ProjectStructure
+from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.search_return_type import SearchReturnType
+from mypyopt.stop_reason_enum import StopReasonEnum
+
+
+class SurrogateSearch(Optimizer):
+    """
+    This class implements a surrogate model assisted search, for objectives that are expensive to evaluate.
+    Instead of walking the parameter space one step at a time, it fits a cheap model to every point evaluated so far
+    and only calls the real f(x) at the points the model considers most promising.  The process is:
+
+    1. Evaluate the initial point and a Latin hypercube design spread across the decision variable bounds
+
+    2. Fit a cubic radial basis function interpolant, with a linear tail, to all successful evaluations
+
+    3. Generate random candidate points around the best point so far, with a sampling radius that is a fraction of the
+       range of each decision variable, and score them on a weighted mix of the predicted objective value and the
+       distance from points already evaluated, cycling the weights between exploring and exploiting
+
+    4. Evaluate the best scoring candidates with the real f(x); after repeated failures to improve, halve the sampling
+       radius, and after repeated successes, double it
+
+    5. Continue until the sampling radius of every decision variable is below its convergence criterion, or maximum
+       iterations is reached
+
+    Since the initial design and the candidates span the whole range between each variable minimum and maximum, those
+    bounds should describe the plausible region of the parameter space rather than being left at their defaults.
+    If the project allows more than one parallel worker, or a batch callback is given, each iteration evaluates as many
+    candidates as there are workers at once.  The decision variables x_base and delta_x are kept at the best point and
+    current sampling radius.
+    """
+
+    def __init__(
+            self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
+            callback_f_of_x: Optional[Callable[[Dict[str, float]], Any]],
+            callback_objective: Optional[Callable[[Any], float]],
+            input_output_worker: Optional[InputOutputManager] = None,
+            callback_progress: Optional[Callable[[int, float], None]] = None,
+            callback_completed: Optional[Callable[[SearchReturnType], None]] = None,
+            evaluation_cache: Optional[EvaluationCache] = None,
+            callback_batch: Optional[Callable[[Any], Any]] = None,
+            evaluator: Optional[Evaluator] = None, initial_samples: Optional[int] = None,
+            candidates_per_variable: int = 100, cancel_token: Optional[CancelToken] = None
+    ):
+        """
+        The constructor for the class, the arguments match HeuristicSearch except for the following
+
+        :param callback_objective: As for HeuristicSearch, but it must return a single number
+        :param initial_samples: The number of points in the initial design, in addition to the initial point;
+                                defaults to twice the number of decision variables plus one
+        :param candidates_per_variable: The number of random candidate points scored on the surrogate model in each
+                                        iteration, per decision variable
+        :raises MyPyOptException: If the sampling arguments are invalid
+        """
+        super().__init__(project_settings, decision_variable_array, callback_f_of_x, callback_objective,
+                         input_output_worker, callback_progress, callback_completed, evaluation_cache,
+                         callback_batch, evaluator, cancel_token)
+        dimensions = len(self.dvs)
+        if initial_samples is None:
+            initial_samples = 2 * dimensions + 1
+        if initial_samples < dimensions + 1:
+            raise MyPyOptException("Surrogate search needs at least one more initial sample than decision variables.")
+        if candidates_per_variable < 1:
+            raise MyPyOptException("Surrogate search needs at least one candidate per decision variable.")
+        self.initial_samples = initial_samples
+        self.candidates_per_variable = candidates_per_variable
+
+    def _search(self) -> SearchReturnType:
+        """
+        This is the main driver function for the optimization.
+        It walks the parameter space finding a minimum objective function.
+        """
+        import numpy as np
+
+        self._open_run()
+        self.log.write(True, '\n*******Optimization Beginning*******')
+
+        lower = self.dvs.value_minimum
+        upper = self.dvs.value_maximum
+        span = np.where(upper > lower, upper - lower, 1.0)
+        tolerance = self.dvs.convergence_criteria / span
+        batch_size = self.evaluator.workers if self.evaluates_in_batches() else 1
+        weights = [0.3, 0.5, 0.8, 0.95]
+        generator = np.random.default_rng(self.rng.getrandbits(64))
+
+        # evaluate the starting point along with a Latin hypercube design; the initial point gates the whole search
+        dimensions = len(self.dvs)
+        u_initial = np.array([(dv.value_initial - dv.value_minimum) for dv in self.dvs], dtype=float) / span
+        strata = np.array([generator.permutation(self.initial_samples) for _ in range(dimensions)], dtype=float).T
+        jitter = generator.random((self.initial_samples, dimensions))
+        u_design = np.vstack([u_initial, (strata + jitter) / self.initial_samples])
+        evaluations = self._evaluate_normalized(u_design, lower, span)
+        ended = self._initial_point(self._to_parameters(u_initial, lower, span), evaluations[0])
+        if ended is not None:
+            return ended
+
+        u_points = u_design
+        values = np.array([self._scalar(e, 'Surrogate search') for e in evaluations])
+        best = 0
+        for i in range(1, len(evaluations)):
+            self.record_evaluation(0, -1, self._to_parameters(u_design[i], lower, span), evaluations[i], values[best])
+            if values[i] < values[best]:
+                best = i
+
+        sigma = 0.2
+        successes = 0
+        failures = 0
+        failure_tolerance = max(dimensions, 3)
+        for iteration in range(1, self.project.max_iterations + 1):
+
+            self.log.write(self.project.verbose, 'iter = ' + str(iteration))
+
+            if self.cancel_token.cancelled:
+                best_values = self.dvs.to_dictionary(lower + u_points[best] * (upper - lower))
+                return self._cancelled(best_values, float(values[best]))
+
+            u_new = self._select_candidates(u_points, values, best, sigma, batch_size, weights, iteration,
+                                            generator)
+            evaluations = self._evaluate_normalized(u_new, lower, span)
+            improved = False
+            for u, evaluation in zip(u_new, evaluations):
+                value = self._scalar(evaluation, 'Surrogate search')
+                self.record_evaluation(iteration, -1, self._to_parameters(u, lower, span), evaluation, values[best])
+                if evaluation.return_state == ReturnStateEnum.UnsuccessfulOther:  # pragma: no cover
+                    self.log.write(True, 'Optimization ended unexpectedly, check all inputs and outputs')
+                    self.log.write(True, 'Error message: ' + str(evaluation.message))
+                    r = SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther)
+                    return self._finish(r)
+                u_points = np.vstack([u_points, u])
+                values = np.append(values, value)
+                if value < values[best] - 1e-6 * abs(values[best]):
+                    improved = True
+                if value < values[best]:
+                    best = len(values) - 1
+            if self.cancel_token.cancelled:
+                best_values = self.dvs.to_dictionary(lower + u_points[best] * (upper - lower))
+                return self._cancelled(best_values, float(values[best]))
+
+            # a whole batch counts as a single success or failure, so the radius shrinks at the same pace per iteration
+            if improved:
+                successes += 1
+                failures = 0
+            else:
+                failures += 1
+                successes = 0
+
+            if successes >= 3:
+                sigma = min(2 * sigma, 0.2)
+                successes = 0
+            elif failures >= failure_tolerance:
+                sigma /= 2
+                failures = 0
+
+            self.dvs.x_base[:] = lower + u_points[best] * (upper - lower)
+            self.dvs.x_new[:] = self.dvs.x_base
+            self.dvs.delta_x[:] = sigma * (upper - lower)
+            if self.project.verbose:
+                self.log.write(True, 'x_best=' + str(self.dvs.x_base.tolist()))
+                self.log.write(True, 'j_best=' + str(values[best]) + ', sampling radius=' + str(sigma))
+
+            if (sigma <= tolerance).all():
+                self.log.write(True, '*******Converged*******')
+                converged_values = self.dvs.to_dictionary(self.dvs.x_base)
+                r = SearchReturnType(True, ReturnStateEnum.Successful, converged_values, float(values[best]))
+                return self._finish(r)
+
+            self.report_progress(iteration, float(values[best]))
+
+            stop_reason = self.stopping_rule(float(values[best]))
+            if stop_reason is not None:
+                return self._stopped(stop_reason, self.dvs.to_dictionary(self.dvs.x_base), float(values[best]))
+
+        self.log.write(True, 'Maximum iterations reached without converging')
+        r = SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther, self.dvs.to_dictionary(self.dvs.x_base),
+                             float(values[best]), StopReasonEnum.MaxIterations)
+        return self._finish(r)
+
+    def _to_parameters(self, u, lower, span) -> ParameterView:
+        return self.dvs.point(lower + u * span)
+
+    def _evaluate_normalized(self, u_points, lower, span) -> List[ObjectiveEvaluation]:
+        return self.evaluate_points([self._to_parameters(u, lower, span) for u in u_points])
+
+    def _select_candidates(self, u_points, values, best, sigma, batch_size, weights, iteration, generator):
+        """
+        Fits the surrogate model and picks the next points to evaluate, all in coordinates normalized to [0, 1]
+        """
+        import numpy as np
+
+        dimensions = u_points.shape[1]
+        # the model is fitted to the feasible points nearest the best one, which keeps it local and cheap to fit
+        feasible = np.flatnonzero(np.isfinite(values))
+        nearest = np.argsort(((u_points[feasible] - u_points[best]) ** 2).sum(axis=1))
+        local = feasible[nearest[:max(20 * (dimensions + 1), self.initial_samples + 1)]]
+        model = self._fit(u_points[local], values[local])
+
+        # perturb the best point, only a subset of the coordinates when there are many of them
+        count = self.candidates_per_variable * dimensions
+        perturb = generator.random((count, dimensions)) < min(1.0, 20.0 / dimensions)
+        perturb[~perturb.any(axis=1), generator.integers(dimensions)] = True
+        steps = generator.normal(0.0, sigma, (count, dimensions))
+        candidates = np.clip(u_points[best] + np.where(perturb, steps, 0.0), 0.0, 1.0)
+
+        predicted = model(candidates)
+        distances = self._distances(candidates, u_points).min(axis=1)
+        selected = list()
+        for k in range(batch_size):
+            weight = weights[(iteration * batch_size + k) % len(weights)]
+            value_score = self._rescale(predicted)
+            distance_score = 1.0 - self._rescale(distances)
+            score = weight * value_score + (1.0 - weight) * distance_score
+            score[distances < 1e-12] = np.inf
+            choice = int(np.argmin(score))
+            if not np.isfinite(score[choice]):
+                break
+            selected.append(candidates[choice])
+            distances = np.minimum(distances, self._distances(candidates, candidates[choice:choice + 1])[:, 0])
+        if not selected:
+            # every candidate coincided with an evaluated point, so the radius is far below the tolerance anyway
+            selected.append(candidates[0])
+        return np.array(selected)
+
+    @staticmethod
+    def _distances(a, b):
+        """
+        The Euclidean distance between every row of a and every row of b, expanded so no three dimensional temporary
+        array is needed
+        """
+        import numpy as np
+        squared = (a ** 2).sum(axis=1)[:, None] + (b ** 2).sum(axis=1)[None, :] - 2.0 * (a @ b.T)
+        return np.sqrt(np.maximum(squared, 0.0))
+
+    @staticmethod
+    def _rescale(a):
+        import numpy as np
+        spread = a.max() - a.min()
+        if not np.isfinite(spread) or spread <= 0:
+            return np.ones_like(a)
+        return (a - a.min()) / spread
+
+    @staticmethod
+    def _fit(u_points, values):
+        """
+        Fits a cubic radial basis function interpolant with a linear tail
+
+        :return: A function predicting the objective at an array of normalized points
+        """
+        import numpy as np
+
+        # large values dominate an interpolant, so everything above the median is clipped to the median
+        values = np.minimum(values, np.median(values))
+        count, dimensions = u_points.shape
+        phi = SurrogateSearch._distances(u_points, u_points) ** 3
+        tail = np.hstack([np.ones((count, 1)), u_points])
+        system = np.zeros((count + dimensions + 1, count + dimensions + 1))
+        system[:count, :count] = phi
+        system[:count, count:] = tail
+        system[count:, :count] = tail.T
+        rhs = np.concatenate([values, np.zeros(dimensions + 1)])
+        try:
+            coefficients = np.linalg.solve(system, rhs)
+        except np.linalg.LinAlgError:  # pragma: no cover -- only for degenerate point sets
+            coefficients = np.linalg.lstsq(system, rhs, rcond=None)[0]
+        weights, polynomial = coefficients[:count], coefficients[count:]
+
+        def predict(u):
+            r = SurrogateSearch._distances(u, u_points)
+            return (r ** 3) @ weights + polynomial[0] + u @ polynomial[1:]
+
+        return predict
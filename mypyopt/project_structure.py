@@ -1,9 +1,11 @@
-from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 import os
 
 from mypyopt.exceptions import MyPyOptException
 
+if TYPE_CHECKING:  # pathlib is slow to import and only needed for the annotations
+    from pathlib import Path
+
 
 class ProjectStructure:
     """
@@ -11,7 +13,13 @@ class ProjectStructure:
     """
     def __init__(
             self, expansion: float = 1.2, contraction: float = 0.85, max_iterations: int = 2000,
-            project_name: str = 'project_name', output_dir_path: Optional[Path] = None, verbose: bool = False
+            project_name: str = 'project_name', output_dir_path: Optional['Path'] = None, verbose: bool = False,
+            parallel_workers: int = 1, parallel_executor: str = 'thread', checkpoint_interval: int = 0,
+            random_seed: Optional[int] = None, write_output: bool = True, profile_cpu: bool = False,
+            profile_memory: bool = False, handle_signals: bool = False, stall_iterations: Optional[int] = None,
+            stall_relative_tolerance: float = 0.0, stall_absolute_tolerance: float = 0.0,
+            target_objective: Optional[float] = None, evaluation_budget: Optional[int] = None,
+            time_budget: Optional[float] = None, evaluation_timeout: Optional[float] = None
     ):
         """
         Constructor for this class
@@ -20,27 +28,87 @@ class ProjectStructure:
         :param contraction: The contraction coefficient for walking through the parameter space in a poor direction
         :param max_iterations: The maximum number of iterations to sweep the entire parameter space
         :param project_name: A descriptive name for this project
-        :param output_dir_path: The root output directory to use for writing output data as a pathlib.Path
+        :param output_dir_path: The root output directory to use for writing output data as a pathlib.Path; it is
+                                only created once a search starts writing into it
         :param verbose: A boolean to decide whether to write a lot to the command line or not
+        :param parallel_workers: The number of f(x) evaluations that may run concurrently; 1 evaluates serially
+        :param parallel_executor: The kind of worker pool used when parallel_workers is greater than 1, either
+                                  'thread' or 'process'; process pools require picklable callback functions.  With
+                                  'isolated', every evaluation runs in one of parallel_workers warm worker processes,
+                                  even with a single worker, see IsolatedEvaluator.
+        :param checkpoint_interval: The number of iterations between checkpoints written to the run directory so that
+                                    an interrupted search can be resumed; the default 0 disables checkpoints, as each
+                                    one flushes the log and history to disk, so long searches should use an interval
+                                    of tens of iterations or more
+        :param random_seed: An optional seed for the random number generator used by stochastic optimizers
+        :param write_output: Whether searches write a run directory at all; with False nothing is written to disk,
+                             log lines marked for the console are still printed, and checkpoints are disabled, which
+                             suits short-lived searches whose results are only used in memory
+        :param profile_cpu: Whether to profile searches with cProfile, writing profile.pstats into the run directory
+        :param profile_memory: Whether to trace the memory allocations of searches with tracemalloc, writing the
+                               largest allocation sites into memory.txt in the run directory
+        :param handle_signals: Whether SIGINT and SIGTERM stop searches gracefully, with the UserAborted reason and the
+                               best values found so far, rather than interrupting them; a second signal interrupts as
+                               usual.  This only applies to searches run from the main thread.
+        :param stall_iterations: The number of iterations over which a search must improve its objective value to
+                                 keep going, or None to never stop a search for stalling
+        :param stall_relative_tolerance: The improvement over the stall iterations, as a fraction of the objective
+                                         value at their start, at or below which the search has stalled
+        :param stall_absolute_tolerance: The improvement over the stall iterations at or below which the search has
+                                         stalled, whichever of the two tolerances is larger applies
+        :param target_objective: An objective value at or below which searches stop, as good enough
+        :param evaluation_budget: The number of evaluations after which searches stop, not counting those found in
+                                  the evaluation cache
+        :param time_budget: The number of seconds after which searches stop
+        :param evaluation_timeout: The number of seconds an evaluation may run before its worker process is killed and
+                                   the point counted as infeasible, which needs the 'isolated' parallel executor
+
+        The stopping rules are checked after each iteration, so a search can overrun its budgets by up to one
+        iteration, and the stall and target rules only apply to objectives that return a single number.
         """
         if output_dir_path is None:
-            output_dir = Path(__file__).resolve().parent.parent / 'projects'
+            output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'projects')
         else:
             output_dir = str(output_dir_path)
-        if not os.path.exists(output_dir):
-            try:
-                os.makedirs(output_dir)
-            except os.error:  # pragma: no cover -- not trying to catch this
-                raise MyPyOptException("Couldn't create root folder, aborting...")
         if expansion <= 1.0:
             raise MyPyOptException("Expansion coefficient is less than or equal to 1 (={0}), must be greater than 1.")
         if contraction >= 1.0:
             raise MyPyOptException("Contraction coefficient is greater than or equal to 1 (={0}), must be less than 1.")
         if max_iterations < 1:
             raise MyPyOptException("Max iterations is extremely small, likely an erroneous condition, aborting...")
+        if parallel_workers < 1:
+            raise MyPyOptException("Parallel workers must be at least 1, aborting...")
+        if parallel_executor not in ('thread', 'process', 'isolated'):
+            raise MyPyOptException("Parallel executor must be 'thread', 'process' or 'isolated', aborting...")
+        if evaluation_timeout is not None and (evaluation_timeout <= 0 or parallel_executor != 'isolated'):
+            raise MyPyOptException("Evaluation timeout must be positive, and only works with the 'isolated' parallel "
+                                   "executor, since threads and pool processes cannot be stopped, aborting...")
+        if checkpoint_interval < 0:
+            raise MyPyOptException("Checkpoint interval cannot be negative, use 0 to disable checkpoints, aborting...")
+        if stall_iterations is not None and stall_iterations < 1:
+            raise MyPyOptException("Stall iterations must be at least 1, use None to disable the rule, aborting...")
+        if stall_relative_tolerance < 0 or stall_absolute_tolerance < 0:
+            raise MyPyOptException("Stall tolerances cannot be negative, aborting...")
+        if (evaluation_budget is not None and evaluation_budget < 1) or (time_budget is not None and time_budget <= 0):
+            raise MyPyOptException("Evaluation and time budgets must be positive, use None for no budget, aborting...")
         self.coefficient_expand = expansion
         self.coefficient_contract = contraction
         self.max_iterations = max_iterations
         self.project_name = project_name
         self.output_dir = output_dir
         self.verbose = verbose
+        self.parallel_workers = parallel_workers
+        self.parallel_executor = parallel_executor
+        self.checkpoint_interval = checkpoint_interval
+        self.random_seed = random_seed
+        self.write_output = write_output
+        self.profile_cpu = profile_cpu
+        self.profile_memory = profile_memory
+        self.handle_signals = handle_signals
+        self.stall_iterations = stall_iterations
+        self.stall_relative_tolerance = stall_relative_tolerance
+        self.stall_absolute_tolerance = stall_absolute_tolerance
+        self.target_objective = target_objective
+        self.evaluation_budget = evaluation_budget
+        self.time_budget = time_budget
+        self.evaluation_timeout = evaluation_timeout
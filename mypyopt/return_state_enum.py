@@ -21,6 +21,15 @@ class ReturnStateEnum(object):
     InvalidInitialPoint = -4
     """Search failed because the initial point was invalid"""
 
+    Cancelled = -5
+    """Search was stopped early by whatever was driving it, such as a multi-start search dropping a dominated run"""
+
+    Terminated = -6
+    """Evaluation was stopped part way through, because its partial objective value was already worse than needed"""
+
+    BudgetExhausted = -7
+    """Search was stopped because it used up the evaluation or time budget of the project"""
+
     UserAborted = -9
     """Search was stopped because the user forced it to stop"""
 
@@ -32,6 +41,9 @@ class ReturnStateEnum(object):
             ReturnStateEnum.InfeasibleObj,
             ReturnStateEnum.UnsuccessfulOther,
             ReturnStateEnum.InvalidInitialPoint,
+            ReturnStateEnum.Cancelled,
+            ReturnStateEnum.Terminated,
+            ReturnStateEnum.BudgetExhausted,
             ReturnStateEnum.UserAborted,
         ]
 
@@ -53,5 +65,11 @@ class ReturnStateEnum(object):
             return "UnsuccessfulOther"
         elif enum == ReturnStateEnum.InvalidInitialPoint:
             return "InvalidInitialPoint"
+        elif enum == ReturnStateEnum.Cancelled:
+            return "Cancelled"
+        elif enum == ReturnStateEnum.Terminated:
+            return "Terminated"
+        elif enum == ReturnStateEnum.BudgetExhausted:
+            return "BudgetExhausted"
         elif enum == ReturnStateEnum.UserAborted:
             return "UserAborted"
@@ -0,0 +1,126 @@
+from collections.abc import Mapping
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from mypyopt.decision_variable_set import ParameterView
+from mypyopt.run_timers import RunTimers
+
+
+def _json_default(value: Any) -> Any:
+    # points may be ParameterView mappings rather than dictionaries, anything else unexpected is written as a string
+    if isinstance(value, ParameterView):
+        return value.to_dictionary()
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+class RunLog:
+    """
+    This class collects the output of a single optimization run.  Text lines go to full_output.log, as they did with
+    InputOutputManager.write_line, and a machine-readable record of every objective evaluation goes to
+    evaluations.jsonl, one JSON object per line.  Both are buffered in memory and written out in batches, so logging
+    costs very little even when the objective function itself is cheap.  A log without a run directory writes no
+    files at all, it only prints the lines meant for the console.
+    """
+
+    text_file_name = 'full_output.log'
+    """The name of the text log file written inside each run directory"""
+
+    record_file_name = 'evaluations.jsonl'
+    """The name of the evaluation record file written inside each run directory"""
+
+    def __init__(self, run_dir: Optional[str], buffer_size: int = 256, timers: Optional[RunTimers] = None):
+        """
+        The constructor for this class, which opens clean versions of both log files
+
+        :param run_dir: The run directory to write the log files into, or None to write no files
+        :param buffer_size: The number of text lines or records to hold in memory before writing them out
+        :param timers: An optional RunTimers instance, which the time spent logging is added to
+        """
+        self.buffer_size = buffer_size
+        self.timers = timers
+        self._text_file = None
+        self._record_file = None
+        if run_dir is not None:
+            self._text_file = open(os.path.join(run_dir, self.text_file_name), 'w')
+            self._record_file = open(os.path.join(run_dir, self.record_file_name), 'w')
+        self._lines: List[str] = list()
+        self._records: List[Dict[str, Any]] = list()
+
+    def write(self, console: bool, string: str) -> None:
+        """
+        Reports a line of text, the buffered equivalent of InputOutputManager.write_line
+
+        :param console: A boolean for whether to also report the string to standard output
+        :param string: The string to report; a newline is appended to the end if it doesn't have one already
+        """
+        start = time.perf_counter()
+        if console:
+            print(string)
+        if self._text_file is not None:
+            if not string.endswith('\n'):
+                string += '\n'
+            self._lines.append(string)
+            if len(self._lines) >= self.buffer_size:
+                self.flush()
+        if self.timers is not None:
+            self.timers.add('logging', time.perf_counter() - start)
+
+    def record(self, **fields: Any) -> None:
+        """
+        Adds a record to the evaluation stream.  The fields are kept as given and only converted to JSON when the
+        buffer is written out; mappings are written as objects, and other values that are not JSON types are written
+        using their string representation.
+
+        :param fields: The named values making up the record, such as iteration, point, and objective value
+        """
+        if self._record_file is None:
+            return
+        start = time.perf_counter()
+        self._records.append(fields)
+        if len(self._records) >= self.buffer_size:
+            self.flush()
+        if self.timers is not None:
+            self.timers.add('logging', time.perf_counter() - start)
+
+    def flush(self) -> None:
+        """
+        Writes out all buffered lines and records
+        """
+        if self._text_file is None:
+            sys.stdout.flush()
+            return
+        if self._lines:
+            self._text_file.write(''.join(self._lines))
+            self._lines.clear()
+        if self._records:
+            self._record_file.write(''.join(json.dumps(r, default=_json_default) + '\n' for r in self._records))
+            self._records.clear()
+        self._text_file.flush()
+        self._record_file.flush()
+        sys.stdout.flush()
+
+    def close(self) -> None:
+        """
+        Writes out anything still buffered and closes both log files
+        """
+        if self._text_file is None or self._text_file.closed:
+            return
+        self.flush()
+        self._text_file.close()
+        self._record_file.close()
+
+    @staticmethod
+    def read_records(run_dir: str) -> List[Dict[str, Any]]:
+        """
+        Reads back the evaluation records of a run
+
+        :param run_dir: The run directory of a completed run
+        :return: A list of dictionaries, one per objective evaluation, in the order they were evaluated
+        """
+        with open(os.path.join(run_dir, RunLog.record_file_name)) as f:
+            return [json.loads(line) for line in f if line.strip()]
@@ -0,0 +1,143 @@
+import os
+import time
+from typing import Any, Dict, Optional
+
+
+class RunTimers:
+    """
+    This class accumulates the time an optimization run spends in each of its phases, along with the number of times
+    each phase was entered, so that a run can be split into the time spent in the user callbacks and the time spent
+    on the optimizer itself.  The phases are:
+
+    - evaluate: waiting for evaluations, which covers simulate and objective but overlaps them with parallel workers
+    - simulate: inside the simulation callback, summed over all evaluations, wherever they ran
+    - objective: inside the objective callback, summed over all evaluations, wherever they ran
+    - logging: writing the run log
+    - history: recording the evaluation history
+    - cache: looking up and storing points in the evaluation cache
+    - checkpoint: writing checkpoints
+    - callbacks: inside the progress and completed callbacks
+
+    The time left over once the phases outside of evaluate are taken from the total is the optimizer bookkeeping.
+    The phases are timed with explicit calls to add rather than context managers, to keep the cost of timing a cheap
+    evaluation small.
+
+    A run can also be profiled: with profile_cpu a cProfile profiler is enabled for the run, which only sees the
+    thread driving the search, and with profile_memory allocations are traced with tracemalloc.  Both slow the run
+    down noticeably, so they are off unless the project asks for them.
+    """
+
+    phases = ('evaluate', 'simulate', 'objective', 'logging', 'history', 'cache', 'checkpoint', 'callbacks')
+    """The names of the timed phases, in the order they are reported"""
+
+    file_name = 'timings.json'
+    """The name of the timing summary file written inside each run directory"""
+
+    def __init__(self):
+        """
+        The constructor for this class, which starts all phases at zero
+        """
+        self.seconds: Dict[str, float] = dict.fromkeys(self.phases, 0.0)
+        self.counts: Dict[str, int] = dict.fromkeys(self.phases, 0)
+        self.profiler: Optional[Any] = None
+        self.memory_snapshot: Optional[Any] = None
+        self.peak_memory: Optional[int] = None
+        self._started: Optional[float] = None
+        self._elapsed = 0.0
+        self._profile_memory = False
+        self._tracing = False
+
+    def add(self, phase: str, seconds: float, count: int = 1) -> None:
+        """
+        Adds time to a phase
+
+        :param phase: One of the names in phases
+        :param seconds: The number of seconds to add
+        :param count: The number of times the phase was entered during those seconds
+        """
+        self.seconds[phase] += seconds
+        self.counts[phase] += count
+
+    def start(self, profile_cpu: bool = False, profile_memory: bool = False) -> None:
+        """
+        Starts the total run time, and the profilers that were asked for
+
+        :param profile_cpu: Whether to profile the run with cProfile
+        :param profile_memory: Whether to trace memory allocations with tracemalloc
+        """
+        self._started = time.perf_counter()
+        if profile_cpu:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self._profile_memory = profile_memory
+        if profile_memory:
+            import tracemalloc
+            # tracing that was already started by the caller is left running at the end
+            self._tracing = not tracemalloc.is_tracing()
+            if self._tracing:
+                tracemalloc.start()
+            elif hasattr(tracemalloc, 'reset_peak'):
+                # before Python 3.9 there is no reset_peak, so the peak of tracing the caller started may be older
+                tracemalloc.reset_peak()
+
+    def stop(self) -> None:
+        """
+        Stops the total run time and any profilers, keeping the profiler and memory snapshot for inspection
+        """
+        if self._started is None:
+            return
+        self._elapsed += time.perf_counter() - self._started
+        self._started = None
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self._profile_memory:
+            import tracemalloc
+            self.memory_snapshot = tracemalloc.take_snapshot()
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+
+    @property
+    def total(self) -> float:
+        """
+        The total run time in seconds so far
+        """
+        if self._started is None:
+            return self._elapsed
+        return self._elapsed + time.perf_counter() - self._started
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarizes the timers
+
+        :return: A dictionary with the total and optimizer bookkeeping seconds, a dictionary of seconds and count for
+                 each phase, and the peak traced memory in bytes if memory was profiled
+        """
+        total = self.total
+        outside = sum(self.seconds[p] for p in self.phases if p not in ('simulate', 'objective'))
+        summary: Dict[str, Any] = dict()
+        summary['total_seconds'] = total
+        summary['optimizer_seconds'] = max(total - outside, 0.0)
+        summary['phases'] = {p: {'seconds': self.seconds[p], 'count': self.counts[p]} for p in self.phases}
+        if self.peak_memory is not None:
+            summary['peak_memory_bytes'] = self.peak_memory
+        return summary
+
+    def write(self, run_dir: str) -> None:
+        """
+        Writes the summary into a run directory, along with the cProfile statistics as profile.pstats and the largest
+        memory allocation sites as memory.txt, if those were captured
+
+        :param run_dir: The run directory to write into
+        """
+        import json
+        with open(os.path.join(run_dir, self.file_name), 'w') as f:
+            f.write(json.dumps(self.summary(), indent=2))
+        if self.profiler is not None:
+            self.profiler.dump_stats(os.path.join(run_dir, 'profile.pstats'))
+        if self.memory_snapshot is not None:
+            with open(os.path.join(run_dir, 'memory.txt'), 'w') as f:
+                for statistic in self.memory_snapshot.statistics('lineno')[:25]:
+                    f.write(str(statistic) + '\n')
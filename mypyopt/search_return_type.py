@@ -2,14 +2,22 @@ class SearchReturnType(object):
     """
     This class defines a response structure for a given project search
     """
-    def __init__(self, success, error_reason, values=None):
+    def __init__(self, success, error_reason, values=None, objective_value=None, stop_reason=None):
         """
         This is the constructor for this class
 
         :param success: A boolean value specifying whether the search was successful or not
         :param error_reason: A descriptive message of the search response
         :param values: A hash of converged values where the keys are the original variable_names from the DVs
+        :param objective_value: The objective function value at the returned values, if the search knows it
+        :param stop_reason: A StopReasonEnum constant for why the search stopped; if not given, the search fills it
+                            in from the error reason as it finishes
+
+        The timings attribute is filled in with the RunTimers summary of the search as it finishes.
         """
         self.success = success
         self.reason = error_reason
         self.values = values
+        self.objective_value = objective_value
+        self.stop_reason = stop_reason
+        self.timings = None
@@ -0,0 +1,296 @@
+from typing import Callable, Any, Dict, List, Optional
+
+from mypyopt.cancel_token import CancelToken
+from mypyopt.decision_variable import DecisionVariable
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluator import Evaluator
+from mypyopt.exceptions import MyPyOptException
+from mypyopt.input_output import InputOutputManager
+from mypyopt.optimizer import Optimizer
+from mypyopt.project_structure import ProjectStructure
+from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.search_return_type import SearchReturnType
+
+
+class FixedValues:
+    """
+    A simulation callback wrapper that adds the values of frozen decision variables to every point before passing it
+    on, so that a search over the remaining decision variables can use a simulation written for all of them.  It is a
+    module level class, so the wrapped callback can still be sent to worker processes if the callback itself can.
+    """
+
+    def __init__(self, callback_f_of_x: Callable[[Dict[str, float]], Any], fixed_values: Dict[str, float]):
+        """
+        The constructor for the class
+
+        :param callback_f_of_x: The user simulation function, as passed to the Optimizer
+        :param fixed_values: A dictionary of the frozen decision variable names and their values
+        """
+        self.callback_f_of_x = callback_f_of_x
+        self.fixed_values = dict(fixed_values)
+
+    def __call__(self, parameter_hash: Dict[str, float]) -> Any:
+        point = dict(parameter_hash)
+        point.update(self.fixed_values)
+        return self.callback_f_of_x(point)
+
+
+class FixedColumns:
+    """
+    A batch callback wrapper that inserts the columns of frozen decision variables into every array of points before
+    passing it on, so that a search over the remaining decision variables can use a batch callback written for all of
+    them.  Like FixedValues, it is a module level class, so the wrapped callback can be sent to worker processes.
+    """
+
+    def __init__(self, callback_batch: Callable[[Any], Any], variable_names: List[str],
+                 fixed_values: Dict[str, float]):
+        """
+        The constructor for the class
+
+        :param callback_batch: The user batch callback, as passed to the Optimizer, taking columns in the order of
+                               variable_names
+        :param variable_names: The names of all of the decision variables, frozen or not, in the column order the
+                               batch callback expects
+        :param fixed_values: A dictionary of the frozen decision variable names and their values
+        """
+        self.callback_batch = callback_batch
+        self.variable_names = list(variable_names)
+        self.fixed_values = dict(fixed_values)
+
+    def __call__(self, x: Any) -> Any:
+        import numpy as np
+        x = np.asarray(x, dtype=float)
+        full = np.empty((x.shape[0], len(self.variable_names)))
+        free = [i for i, name in enumerate(self.variable_names) if name not in self.fixed_values]
+        full[:, free] = x
+        for i, name in enumerate(self.variable_names):
+            if name in self.fixed_values:
+                full[:, i] = self.fixed_values[name]
+        return self.callback_batch(full)
+
+
+class SensitivityScreening(Optimizer):
+    """
+    This class screens the decision variables for their influence on the objective function with the Morris method of
+    elementary effects, so that variables with almost no effect can be left out of, or treated coarsely by, the search
+    that follows.  The HeuristicSearch spends one evaluation per decision variable in each sweep, so on models with
+    dozens of candidate parameters, of which only a few matter, this can cut the cost of every sweep several fold.
+
+    The screening is run with search, which is not an optimization, but it shares the evaluator, batch callback,
+    evaluation cache, cancel token and output folder conventions of the optimizers.  The process is:
+
+    1. Build a number of trajectories through a grid of levels spanning the bounds of every decision variable; each
+       trajectory starts from a random grid point and moves one decision variable at a time, in a random order, by
+       a fixed fraction of its range
+
+    2. Evaluate the points of all of the trajectories at once, which runs them on all the parallel workers, or through
+       the batch callback, together
+
+    3. Take the change in the objective value along each move as an elementary effect of the decision variable that
+       moved, and measure the influence of each variable by the mean of the absolute values of its effects, mu_star,
+       along with their standard deviation, sigma, which is large when the variable interacts with others or acts
+       nonlinearly
+
+    4. Mark a decision variable as negligible when its mu_star is no more than the threshold fraction of the largest
+       mu_star
+
+    The screening costs trajectories times one more than the number of decision variables evaluations, regardless of
+    the outcome.  The grid spans the bounds of each decision variable, so, as for the differential evolution, those
+    bounds should describe the plausible region of the parameter space.  Points that fail to evaluate leave out the
+    effects they would have contributed.  After the screening, screened_variables gives the decision variables for
+    the main search, and with_fixed_values, or with_fixed_columns for a batch callback, wraps the callback to supply
+    the values of any frozen ones.
+    """
+
+    actions = ('freeze', 'coarsen')
+    """What happens to negligible decision variables: freeze leaves them out of the main search at their initial values,
+    and coarsen keeps them in it with their convergence criterion multiplied by the coarsen factor"""
+
+    def __init__(
+            self, project_settings: ProjectStructure, decision_variable_array: List[DecisionVariable],
+            callback_f_of_x: Optional[Callable[[Dict[str, float]], Any]],
+            callback_objective: Optional[Callable[[Any], float]],
+            input_output_worker: Optional[InputOutputManager] = None,
+            callback_progress: Optional[Callable[[int, float], None]] = None,
+            callback_completed: Optional[Callable[[SearchReturnType], None]] = None,
+            evaluation_cache: Optional[EvaluationCache] = None,
+            callback_batch: Optional[Callable[[Any], Any]] = None,
+            evaluator: Optional[Evaluator] = None, cancel_token: Optional[CancelToken] = None,
+            trajectories: int = 10, levels: int = 4, threshold: float = 0.05, action: str = 'freeze',
+            coarsen_factor: float = 10.0
+    ):
+        """
+        The constructor for the class, the arguments match HeuristicSearch except for the following
+
+        :param callback_objective: As for HeuristicSearch, but it must return a single number
+        :param callback_progress: As for HeuristicSearch; the screening has a single step, so it is called once, with
+                                  iteration 1 and the best objective value evaluated
+        :param trajectories: The number of trajectories; more give a more reliable ranking, at the cost of one more
+                             than the number of decision variables evaluations each
+        :param levels: The number of grid levels across the range of each decision variable, an even number of at
+                       least 2; each move spans levels / (2 * (levels - 1)) of the range
+        :param threshold: The fraction of the largest mu_star at or below which a decision variable is negligible
+        :param action: One of the names in actions
+        :param coarsen_factor: The factor the convergence criterion of a negligible decision variable is multiplied by
+                               with the coarsen action
+        :raises MyPyOptException: If the screening arguments are invalid
+        """
+        super().__init__(project_settings, decision_variable_array, callback_f_of_x, callback_objective,
+                         input_output_worker, callback_progress, callback_completed, evaluation_cache,
+                         callback_batch, evaluator, cancel_token)
+        if trajectories < 2:
+            raise MyPyOptException("Sensitivity screening needs at least 2 trajectories, aborting...")
+        if levels < 2 or levels % 2:
+            raise MyPyOptException("Sensitivity screening levels must be an even number of at least 2, aborting...")
+        if not 0 <= threshold < 1 or coarsen_factor < 1:
+            raise MyPyOptException("Sensitivity screening threshold must be in [0, 1) and coarsen_factor at least 1.")
+        if action not in self.actions:
+            raise MyPyOptException("Sensitivity screening action must be one of " + ', '.join(self.actions))
+        self.trajectories = trajectories
+        self.levels = levels
+        self.threshold = threshold
+        self.action = action
+        self.coarsen_factor = coarsen_factor
+        self.mu_star: Dict[str, float] = dict()
+        self.sigma: Dict[str, float] = dict()
+        self.negligible: List[str] = list()
+
+    def _search(self) -> SearchReturnType:
+        """
+        This is the main driver function for the screening.
+        It evaluates the trajectories and ranks the decision variables by their influence on the objective function.
+
+        :return: A SearchReturnType with the best point evaluated during the screening
+        """
+        import json
+        import os
+        import numpy as np
+
+        self._open_run()
+        self.log.write(True, '\n*******Screening Beginning*******')
+
+        dimensions = len(self.dvs)
+        lower = self.dvs.value_minimum
+        upper = self.dvs.value_maximum
+        generator = np.random.default_rng(self.rng.getrandbits(64))
+        delta = self.levels / (2.0 * (self.levels - 1))
+
+        # every trajectory is its start followed by one point per decision variable, each one move from the last
+        starts = generator.integers(0, self.levels, (self.trajectories, dimensions)) / (self.levels - 1)
+        orders = np.array([generator.permutation(dimensions) for _ in range(self.trajectories)])
+        moves = np.where(starts + delta <= 1, delta, -delta)
+        unit = np.repeat(starts[:, np.newaxis, :], dimensions + 1, axis=1)
+        for step in range(dimensions):
+            moved = orders[:, step]
+            rows = np.arange(self.trajectories)
+            unit[rows, step + 1:, moved] += moves[rows, moved][:, np.newaxis]
+        design = (lower + unit * (upper - lower)).reshape(-1, dimensions)
+
+        evaluations = self.evaluate_points([self.dvs.point(x) for x in design])
+        if self.cancel_token.cancelled:
+            return self._cancelled(None, None)
+        for i, evaluation in enumerate(evaluations):
+            step = i % (dimensions + 1)
+            moved = -1 if step == 0 else int(orders[i // (dimensions + 1), step - 1])
+            self.record_evaluation(0, moved, self.dvs.point(design[i]), evaluation, None)
+            if evaluation.return_state == ReturnStateEnum.UnsuccessfulOther:  # pragma: no cover
+                self.log.write(True, 'Screening ended unexpectedly, check all inputs and outputs')
+                self.log.write(True, 'Error message: ' + str(evaluation.message))
+                return self._finish(SearchReturnType(False, ReturnStateEnum.UnsuccessfulOther))
+        values = np.array([self._scalar(e, 'Sensitivity screening', float('nan')) for e in evaluations])
+        values = values.reshape(self.trajectories, dimensions + 1)
+        if not np.isfinite(values).any():
+            self.log.write(True, 'No point of the screening design could be evaluated.  Aborting...')
+            return self._finish(SearchReturnType(False, ReturnStateEnum.InvalidInitialPoint))
+
+        # elementary effects in units of the objective per unit of each variable range, so that they are comparable
+        effects = np.full((self.trajectories, dimensions), np.nan)
+        with np.errstate(invalid='ignore'):
+            changes = np.diff(values, axis=1) / moves[np.arange(self.trajectories)[:, np.newaxis], orders]
+        effects[np.arange(self.trajectories)[:, np.newaxis], orders] = changes
+        effects[~np.isfinite(effects)] = np.nan
+        counts = np.isfinite(effects).sum(axis=0)
+        mu_star = np.array([np.nanmean(abs(e)) if c else 0.0 for e, c in zip(effects.T, counts)])
+        sigma = np.array([np.nanstd(e) if c else 0.0 for e, c in zip(effects.T, counts)])
+        self.mu_star = dict(zip(self.dvs.names, mu_star.tolist()))
+        self.sigma = dict(zip(self.dvs.names, sigma.tolist()))
+        # an objective that none of the decision variables move says nothing about which ones matter
+        if mu_star.max() > 0:
+            self.negligible = [name for name, m in self.mu_star.items() if m <= self.threshold * mu_star.max()]
+        else:
+            self.negligible = list()
+
+        for name in self.ranking():
+            self.log.write(self.project.verbose, 'var=' + name + ', mu_star=' + str(self.mu_star[name]) +
+                           ', sigma=' + str(self.sigma[name]) + (', negligible' if name in self.negligible else ''))
+        self.log.write(True, 'Negligible decision variables: ' + (', '.join(self.negligible) or 'none'))
+        if self.run_dir is not None:
+            with open(os.path.join(self.run_dir, 'screening.json'), 'w') as f:
+                f.write(json.dumps({'mu_star': self.mu_star, 'sigma': self.sigma, 'negligible': self.negligible,
+                                    'action': self.action}, indent=2))
+
+        flat = values.reshape(-1)
+        best = int(np.nanargmin(flat))
+        self.report_progress(1, float(flat[best]))
+        self.log.write(True, '*******Screening Complete*******')
+        r = SearchReturnType(True, ReturnStateEnum.Successful, self.dvs.to_dictionary(design[best]), float(flat[best]))
+        return self._finish(r)
+
+    def ranking(self) -> List[str]:
+        """
+        Lists the decision variable names from the most influential to the least, by mu_star
+
+        :return: A list of decision variable names, empty before the screening has run
+        """
+        return sorted(self.mu_star, key=lambda name: -self.mu_star[name])
+
+    def screened_variables(self) -> List[DecisionVariable]:
+        """
+        Builds the decision variables for the main search from the screening results: the influential ones as they
+        were given, and the negligible ones either left out or with a coarser convergence criterion, depending on the
+        action.  New instances are returned, since the ones given to the screening belong to its own search.
+
+        :return: A list of DecisionVariable instances in the original order
+        """
+        variables = list()
+        for dv in self.dvs:
+            criterion = dv.convergence_criteria
+            if dv.var_name in self.negligible:
+                if self.action == 'freeze':
+                    continue
+                criterion *= self.coarsen_factor
+            variables.append(DecisionVariable(dv.var_name, dv.value_minimum, dv.value_maximum, dv.value_initial,
+                                              dv.step_size_initial, criterion))
+        return variables
+
+    def fixed_values(self) -> Dict[str, float]:
+        """
+        Gives the values of the decision variables the freeze action leaves out of the main search
+
+        :return: A dictionary of frozen decision variable names and their initial values
+        """
+        if self.action != 'freeze':
+            return dict()
+        return {dv.var_name: dv.value_initial for dv in self.dvs if dv.var_name in self.negligible}
+
+    def with_fixed_values(self, callback_f_of_x: Callable[[Dict[str, float]], Any]) -> Callable[..., Any]:
+        """
+        Wraps a simulation callback written for all of the decision variables for use by the main search, adding the
+        values of the frozen decision variables to each point
+
+        :param callback_f_of_x: The user simulation function
+        :return: The callback itself if no decision variable is frozen, otherwise a FixedValues wrapper around it
+        """
+        fixed = self.fixed_values()
+        return FixedValues(callback_f_of_x, fixed) if fixed else callback_f_of_x
+
+    def with_fixed_columns(self, callback_batch: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """
+        Wraps a batch callback written for all of the decision variables for use by the main search, inserting the
+        columns of the frozen decision variables into each array of points
+
+        :param callback_batch: The user batch callback
+        :return: The callback itself if no decision variable is frozen, otherwise a FixedColumns wrapper around it
+        """
+        fixed = self.fixed_values()
+        return FixedColumns(callback_batch, self.dvs.names, fixed) if fixed else callback_batch
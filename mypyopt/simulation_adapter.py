@@ -0,0 +1,248 @@
+from contextlib import contextmanager
+import os
+import re
+import shutil
+import tempfile
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from mypyopt.exceptions import MyPyOptException
+
+if TYPE_CHECKING:  # pathlib is slow to import and only needed for the annotations
+    from pathlib import Path
+
+
+class SimulationAdapter:
+    """
+    This class collects the file handling around an external simulation program, such as EnergyPlus, so that a
+    simulation callback does not have to repeat it for every evaluation:
+
+    - The input template is read and split around its placeholders once, when the adapter is created, and each
+      point is rendered by joining the pieces with the formatted parameter values, instead of re-reading the template
+      and calling str.replace once per parameter.  Placeholders are parameter names in braces, {wall_resistance}
+      for example, and braces around anything that is not a name, such as JSON objects, are left alone.
+
+    - Each evaluation runs in a scratch directory, which is emptied and handed back to a pool when the evaluation is
+      done and reused by a later one, so directories are not created and deleted for every point.  Support files,
+      such as a weather file, are placed in each scratch directory once, when it is created, and kept when it is
+      emptied.  The directories live under
+      /dev/shm where that is available, which keeps the files in memory, and are all removed when the adapter is
+      cleaned up or garbage collected.
+
+    - Output CSV files are read in one call and only the requested columns are converted to numbers.
+
+    The adapter is safe to share between the threads of a parallel search.  With a process pool, each worker process
+    receives its own copy, and with it its own scratch directories.
+    """
+
+    placeholder = re.compile(r'{([A-Za-z_][A-Za-z0-9_]*)}')
+    """The pattern of a placeholder in the template, with the parameter name as its only group"""
+
+    def __init__(self, template: str, input_file_name: str = 'in.idf', support_files: Sequence[Union[str, 'Path']] = (),
+                 scratch_root: Optional[Union[str, 'Path']] = None, value_format: Callable[[Any], str] = str):
+        """
+        The constructor for this class
+
+        :param template: The contents of the input file template; use from_file to read it from disk
+        :param input_file_name: The name of the input file write_input renders into each scratch directory
+        :param support_files: Paths of files to place in every scratch directory, hard linked where possible and
+                              copied otherwise
+        :param scratch_root: The directory to create the scratch directories in, by default /dev/shm if it is
+                             available and the system temporary directory if not
+        :param value_format: The function that turns a parameter value into the text that replaces its placeholder
+        """
+        pieces = self.placeholder.split(template)
+        # the split alternates literal text and placeholder names, always starting and ending with literal text
+        self._literals: List[str] = pieces[0::2]
+        self._names: List[str] = pieces[1::2]
+        self.parameter_names = sorted(set(self._names))
+        self.input_file_name = input_file_name
+        self.support_files = [os.path.abspath(str(f)) for f in support_files]
+        self.scratch_root = None if scratch_root is None else str(scratch_root)
+        self.value_format = value_format
+        self._lock = threading.Lock()
+        self._root: Optional[str] = None
+        self._free: List[str] = list()
+        self._count = 0
+        self._finalizer: Optional[Any] = None
+
+    @classmethod
+    def from_file(cls, template_path: Union[str, 'Path'], **kwargs) -> 'SimulationAdapter':
+        """
+        Creates an adapter from a template file, which is read once, here
+
+        :param template_path: The path of the input file template
+        :param kwargs: Any other arguments of the constructor
+        :return: A new SimulationAdapter instance
+        """
+        with open(str(template_path)) as f:
+            return cls(f.read(), **kwargs)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # a copy sent to a worker process makes its own scratch directories rather than sharing these
+        state = self.__dict__.copy()
+        for name in ('_lock', '_root', '_finalizer'):
+            state[name] = None
+        state['_free'] = list()
+        state['_count'] = 0
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def render(self, parameter_hash: Dict[str, Any]) -> str:
+        """
+        Fills the template with the values of a point
+
+        :param parameter_hash: A dictionary of parameters with keys as the variable names, and current variable values
+        :return: The input file contents
+        :raises MyPyOptException: If the template has a placeholder that is not in the parameter dictionary
+        """
+        try:
+            values = [self.value_format(parameter_hash[name]) for name in self._names]
+        except KeyError as e:
+            raise MyPyOptException('Simulation input template uses parameter ' + str(e) + ' which was not given')
+        pieces = [None] * (len(self._literals) + len(values))
+        pieces[0::2] = self._literals
+        pieces[1::2] = values
+        return ''.join(pieces)
+
+    def write_input(self, directory: Union[str, 'Path'], parameter_hash: Dict[str, Any]) -> str:
+        """
+        Renders a point and writes it to the input file in a directory, with a single write
+
+        :param directory: The directory to write into, usually a scratch directory
+        :param parameter_hash: A dictionary of parameters with keys as the variable names, and current variable values
+        :return: The path of the input file
+        """
+        path = os.path.join(str(directory), self.input_file_name)
+        with open(path, 'w') as f:
+            f.write(self.render(parameter_hash))
+        return path
+
+    @contextmanager
+    def scratch_directory(self) -> Iterator['Path']:
+        """
+        Lends out a scratch directory for one evaluation, for use in a with statement.  The directory goes back to the
+        pool once the with block ends, emptied of everything but the support files, so that an output file one
+        evaluation wrote and the next did not, because its simulation failed part way for example, cannot be mistaken
+        for the output of the next.  If the block raises an exception, the directory is removed instead.
+
+        :return: The path of the scratch directory
+        """
+        from pathlib import Path
+        directory = self._acquire()
+        try:
+            yield Path(directory)
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+        self._empty(directory)
+        with self._lock:
+            # a directory lent out before a cleanup was removed along with the rest
+            if self._root is not None and os.path.dirname(directory) == self._root:
+                self._free.append(directory)
+
+    def run(self, parameter_hash: Dict[str, Any], simulate: Callable[['Path'], Any]) -> Any:
+        """
+        Runs one evaluation in a scratch directory: writes the input file for the point, then calls the simulation
+
+        :param parameter_hash: A dictionary of parameters with keys as the variable names, and current variable values
+        :param simulate: A function that runs the simulation in the scratch directory it is given and returns its
+                         results, read from the output files with read_csv for example
+        :return: Whatever simulate returned
+        """
+        with self.scratch_directory() as directory:
+            self.write_input(directory, parameter_hash)
+            return simulate(directory)
+
+    def _acquire(self) -> str:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            if self._root is None:
+                import weakref
+                self._root = tempfile.mkdtemp(prefix='mypyopt_', dir=self.scratch_root or self._default_root())
+                self._finalizer = weakref.finalize(self, shutil.rmtree, self._root, True)
+            self._count += 1
+            directory = os.path.join(self._root, 'run' + str(self._count))
+        os.mkdir(directory)
+        self._place_support_files(directory)
+        return directory
+
+    def _place_support_files(self, directory: str) -> None:
+        for source in self.support_files:
+            target = os.path.join(directory, os.path.basename(source))
+            if os.path.exists(target):
+                continue
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+
+    def _empty(self, directory: str) -> None:
+        """
+        Removes everything an evaluation left in a scratch directory except the support files, putting back any
+        support file the evaluation removed
+        """
+        keep = {os.path.basename(source) for source in self.support_files}
+        for entry in os.scandir(directory):
+            if entry.name in keep and entry.is_file(follow_symlinks=False):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+        self._place_support_files(directory)
+
+    @staticmethod
+    def _default_root() -> Optional[str]:
+        shared_memory = '/dev/shm'
+        if os.path.isdir(shared_memory) and os.access(shared_memory, os.W_OK):
+            return shared_memory
+        return None
+
+    def cleanup(self) -> None:
+        """
+        Removes all of the scratch directories; the adapter can still be used afterwards, and makes new ones
+        """
+        with self._lock:
+            if self._finalizer is not None:
+                self._finalizer()
+            self._root = None
+            self._finalizer = None
+            self._free = list()
+
+    @staticmethod
+    def read_csv(path: Union[str, 'Path'], columns: Sequence[Union[int, str]], header_rows: int = 1,
+                 delimiter: str = ',') -> List[List[float]]:
+        """
+        Reads columns of numbers from a CSV file, such as the time series output of a simulation.  The file is read
+        in one call, and only the requested columns are converted, which is several times faster than the csv module
+        for the plain numeric files simulation programs write.  Quoted fields containing the delimiter are not
+        supported.
+
+        :param path: The path of the CSV file
+        :param columns: The columns to read, each either a zero based index or a name from the first header row, which
+                        is matched after stripping surrounding whitespace
+        :param header_rows: The number of rows before the data starts
+        :param delimiter: The delimiter between fields
+        :return: A list of values for each requested column, in the order requested
+        :raises MyPyOptException: If a named column is not in the header or a value is not a number
+        """
+        with open(str(path)) as f:
+            lines = f.read().splitlines()
+        header = [h.strip() for h in lines[0].split(delimiter)] if header_rows > 0 and lines else []
+        indices = list()
+        for column in columns:
+            if isinstance(column, str):
+                if column not in header:
+                    raise MyPyOptException('Column ' + column + ' was not found in the header of ' + str(path))
+                column = header.index(column)
+            indices.append(column)
+        rows = [line.split(delimiter) for line in lines[header_rows:] if line]
+        try:
+            return [[float(row[i]) for row in rows] for i in indices]
+        except (ValueError, IndexError) as e:
+            raise MyPyOptException('Could not read numbers from ' + str(path) + ': ' + str(e))
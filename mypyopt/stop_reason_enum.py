@@ -0,0 +1,69 @@
+from typing import List
+
+
+class StopReasonEnum(object):
+    """
+    This class defines constants for why a search stopped, which SearchReturnType reports alongside its return state
+    """
+
+    Converged = 0
+    """Search stopped because the step sizes of all decision variables fell below their convergence criteria"""
+
+    TargetReached = 1
+    """Search stopped because the objective value reached the target objective of the project"""
+
+    Stalled = 2
+    """Search stopped because the objective value did not improve enough over the stall window of the project"""
+
+    MaxIterations = 3
+    """Search stopped because it ran the maximum number of iterations of the project"""
+
+    EvaluationBudget = 4
+    """Search stopped because it used up the evaluation budget of the project"""
+
+    TimeBudget = 5
+    """Search stopped because it used up the time budget of the project"""
+
+    Cancelled = 6
+    """Search stopped because its cancel token was cancelled, by the user or by whatever was driving it"""
+
+    Failed = 7
+    """Search stopped because of an error, such as an invalid initial point or an infeasible decision variable"""
+
+    @staticmethod
+    def all_enums() -> List[int]:
+        return [
+            StopReasonEnum.Converged,
+            StopReasonEnum.TargetReached,
+            StopReasonEnum.Stalled,
+            StopReasonEnum.MaxIterations,
+            StopReasonEnum.EvaluationBudget,
+            StopReasonEnum.TimeBudget,
+            StopReasonEnum.Cancelled,
+            StopReasonEnum.Failed,
+        ]
+
+    @staticmethod
+    def enum_to_string(enum):
+        """
+        This static function converts an enumerated constant integer into a string representation
+
+        :param enum: A constant as defined in this class
+        :return: A string description of the constant
+        """
+        if enum == StopReasonEnum.Converged:
+            return "Converged"
+        elif enum == StopReasonEnum.TargetReached:
+            return "TargetReached"
+        elif enum == StopReasonEnum.Stalled:
+            return "Stalled"
+        elif enum == StopReasonEnum.MaxIterations:
+            return "MaxIterations"
+        elif enum == StopReasonEnum.EvaluationBudget:
+            return "EvaluationBudget"
+        elif enum == StopReasonEnum.TimeBudget:
+            return "TimeBudget"
+        elif enum == StopReasonEnum.Cancelled:
+            return "Cancelled"
+        elif enum == StopReasonEnum.Failed:
+            return "Failed"
@@ -0,0 +1,36 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from mypyopt.benchmarks.benchmark_problems import all_problems, pretend_energyplus, rosenbrock, sphere
+from mypyopt.benchmarks.run_benchmarks import main, run
+
+
+class TestBenchmarks(TestCase):
+    def test_problems(self):
+        self.assertAlmostEqual(0.0, sphere([0.0, 0.0, 0.0]))
+        self.assertAlmostEqual(0.0, rosenbrock([1.0, 1.0, 1.0]))
+        for problem in all_problems():
+            dvs = problem.decision_variables(4)
+            self.assertEqual(problem.dimensions or 4, len(dvs))
+        energyplus = [p for p in all_problems() if p.name == 'pretend_energyplus'][0]
+        self.assertLessEqual(energyplus.optimum, pretend_energyplus([2.0, 20.0]))
+
+    def test_run(self):
+        results = run(['sphere', 'quadratic'], ['heuristic', 'surrogate'], [2])
+        self.assertEqual(4, len(results))
+        for result in results:
+            self.assertTrue(result['success'])
+            self.assertGreater(result['evaluations'], 0)
+            self.assertGreater(result['wall_time'], 0.0)
+            self.assertLess(result['final_error'], 0.01)
+        self.assertEqual(3, results[-1]['dimensions'])
+
+    def test_main(self):
+        output_path = os.path.join(tempfile.mkdtemp(), 'results.json')
+        self.assertEqual(0, main(['--problems', 'sphere', '--optimizers', 'heuristic', '--dimensions', '2', '3',
+                                  '--output', output_path]))
+        with open(output_path) as f:
+            results = json.loads(f.read())
+        self.assertEqual([2, 3], [r['dimensions'] for r in results])
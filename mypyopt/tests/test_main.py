@@ -1,14 +1,46 @@
+import asyncio
+from functools import partial
+import json
+import math
+import multiprocessing
+import os
+import pickle
 from pathlib import Path
+import subprocess
+import sys
 from tempfile import mkdtemp
+import time
 import unittest
 
 from mypyopt.project_structure import ProjectStructure
+from mypyopt.cancel_token import CancelToken
 from mypyopt.input_output import InputOutputManager
+from mypyopt.isolated_evaluator import IsolatedEvaluator
+from mypyopt.checkpoint import Checkpoint
 from mypyopt.decision_variable import DecisionVariable
+from mypyopt.decision_variable_set import DecisionVariableSet, ParameterView
+from mypyopt.distributed_evaluator import DistributedEvaluator, _BrokerManager, run_worker
+from mypyopt.evaluation_cache import EvaluationCache
+from mypyopt.evaluation_history import EvaluationHistory
+from mypyopt.evaluator import Evaluator, LocalEvaluator, evaluate_point
+from mypyopt.objective_evaluation import ObjectiveEvaluation
+from mypyopt.objectives import CalibrationObjective
 from mypyopt.optimizer import Optimizer
+from mypyopt.optimizer_differential_evolution import DifferentialEvolution
 from mypyopt.optimizer_heuristic_search import HeuristicSearch
+from mypyopt.optimizer_nelder_mead import NelderMeadSearch
+from mypyopt.optimizer_pattern_search import PatternSearch
+from mypyopt.optimizer_quasi_newton import QuasiNewtonSearch
+from mypyopt.optimizer_surrogate_search import SurrogateSearch
+from mypyopt.multi_start_search import MultiStartSearch
+from mypyopt.optimizer_heuristic_search_async import AsyncHeuristicSearch, run_subprocess
 from mypyopt.exceptions import MyPyOptException
 from mypyopt.return_state_enum import ReturnStateEnum
+from mypyopt.run_log import RunLog
+from mypyopt.run_timers import RunTimers
+from mypyopt.sensitivity_screening import FixedColumns, FixedValues, SensitivityScreening
+from mypyopt.simulation_adapter import SimulationAdapter
+from mypyopt.stop_reason_enum import StopReasonEnum
 
 
 class TestQuadratic(unittest.TestCase):
@@ -69,13 +101,209 @@ class TestQuadratic(unittest.TestCase):
         self.assertAlmostEqual(2.0, response.values['b'], 3)
         self.assertAlmostEqual(3.0, response.values['c'], 3)
 
+    def test_shared_decision_variables(self):
+        # a second optimizer built from the same decision variables must not take them away from the first one
+        first = HeuristicSearch(self.sim, self.dvs, self.sim_quadratic, self.sum_squared_error_quadratic)
+        HeuristicSearch(self.sim, self.dvs, self.sim_quadratic, self.sum_squared_error_quadratic)
+        response = first.search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(1.0, response.values['a'], 3)
+        self.assertAlmostEqual(2.0, response.values['b'], 3)
+        self.assertEqual(0.5, self.dvs[0].x_base)
+
+    def test_quadratic_parallel_matches_serial(self):
+        serial = HeuristicSearch(self.sim, self.dvs, self.sim_quadratic, self.sum_squared_error_quadratic).search()
+        for executor in ['thread', 'process']:
+            dvs = [DecisionVariable(dv.var_name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                    convergence_criterion=0.000001) for dv in self.dvs]
+            sim = ProjectStructure(project_name='TestProject', output_dir_path=Path(self.sim.output_dir),
+                                   parallel_workers=3, parallel_executor=executor)
+            parallel = HeuristicSearch(sim, dvs, self.sim_quadratic, self.sum_squared_error_quadratic).search()
+            self.assertTrue(parallel.success)
+            self.assertEqual(serial.values, parallel.values)
+
+    @staticmethod
+    def batch_quadratic(x):
+        import numpy as np
+        x_values = np.arange(-5, 6, dtype=float)
+        actual_values = 1 + 2 * x_values + 3 * x_values ** 2
+        sim_values = x[:, 0:1] + x[:, 1:2] * x_values + x[:, 2:3] * x_values ** 2
+        return ((sim_values - actual_values) ** 2).sum(axis=1)
+
+    def test_quadratic_batch_callback(self):
+        searcher = HeuristicSearch(self.sim, self.dvs, None, None, callback_batch=self.batch_quadratic)
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(1.0, response.values['a'], 3)
+        self.assertAlmostEqual(2.0, response.values['b'], 3)
+        self.assertAlmostEqual(3.0, response.values['c'], 3)
+
+    def test_batch_callback_failures(self):
+        searcher = HeuristicSearch(self.sim, self.dvs, None, None, callback_batch=lambda x: [float('nan')] * len(x))
+        self.assertEqual(ReturnStateEnum.InvalidInitialPoint, searcher.search().reason)
+        searcher = HeuristicSearch(self.sim, self.dvs, None, None, callback_batch=lambda x: [1.0, 2.0])
+        with self.assertRaises(MyPyOptException):
+            searcher.search()
+        with self.assertRaises(MyPyOptException):
+            HeuristicSearch(self.sim, self.dvs, None, None)
+
+    def test_quadratic_resume_from_checkpoint(self):
+        def fresh_dvs():
+            return [DecisionVariable(dv.var_name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                     convergence_criterion=0.000001) for dv in self.dvs]
+
+        output_dir = Path(mkdtemp())
+        searcher = HeuristicSearch(ProjectStructure(project_name='Resumable', output_dir_path=output_dir),
+                                   fresh_dvs(), self.sim_quadratic, self.sum_squared_error_quadratic)
+        uninterrupted = searcher.search()
+        # checkpoints are only written when asked for
+        self.assertFalse(os.path.exists(os.path.join(searcher.run_dir, Checkpoint.file_name)))
+        interrupted = HeuristicSearch(
+            ProjectStructure(project_name='Resumable', output_dir_path=output_dir, max_iterations=40,
+                             checkpoint_interval=10),
+            fresh_dvs(), self.sim_quadratic, self.sum_squared_error_quadratic
+        )
+        interrupted.search()
+        checkpoint = Checkpoint.read(Path(interrupted.run_dir))
+        self.assertEqual(40, checkpoint.iteration)
+        self.assertEqual(Checkpoint.find_latest(str(output_dir), 'Resumable'),
+                         Path(interrupted.run_dir) / Checkpoint.file_name)
+        # a newer checkpoint of a project whose name only starts the same way belongs to that project
+        other_run = output_dir / (os.path.basename(interrupted.run_dir).replace('Resumable', 'Resumable_2'))
+        other_run.mkdir()
+        (other_run / Checkpoint.file_name).write_text('{}')
+        self.assertEqual(Checkpoint.find_latest(str(output_dir), 'Resumable'),
+                         Path(interrupted.run_dir) / Checkpoint.file_name)
+        self.assertEqual(Checkpoint.find_latest(str(output_dir), 'Resumable_2'), other_run / Checkpoint.file_name)
+        resumed = HeuristicSearch(ProjectStructure(project_name='Resumable', output_dir_path=output_dir),
+                                  fresh_dvs(), self.sim_quadratic, self.sum_squared_error_quadratic).resume()
+        self.assertTrue(resumed.success)
+        self.assertEqual(uninterrupted.values, resumed.values)
+
+    def test_resume_bad_checkpoints(self):
+        output_dir = Path(mkdtemp())
+        searcher = HeuristicSearch(ProjectStructure(project_name='Resumable', output_dir_path=output_dir),
+                                   self.dvs, self.sim_quadratic, self.sum_squared_error_quadratic)
+        with self.assertRaises(MyPyOptException):
+            searcher.resume()
+        with self.assertRaises(MyPyOptException):
+            searcher.resume(output_dir)
+        Checkpoint(1, 1.0, [{'var_name': 'z', 'x_base': 0.0, 'delta_x': 0.1}]).write(str(output_dir))
+        with self.assertRaises(MyPyOptException):
+            searcher.resume(output_dir)
+
+    def test_quadratic_async(self):
+        in_flight = [0, 0]
+        progress = list()
+
+        async def sim_quadratic_async(parameter_hash):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            await asyncio.sleep(0)
+            in_flight[0] -= 1
+            return self.sim_quadratic(parameter_hash)
+
+        async def progress_async(iteration, j):
+            progress.append(iteration)
+
+        async def run_two_searches():
+            limit = asyncio.Semaphore(2)
+            searches = list()
+            for _ in range(2):
+                dvs = [DecisionVariable(dv.var_name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                        convergence_criterion=0.000001) for dv in self.dvs]
+                searches.append(AsyncHeuristicSearch(self.sim, dvs, sim_quadratic_async,
+                                                     self.sum_squared_error_quadratic, callback_progress=progress_async,
+                                                     concurrency_limit=limit, concurrency=2).search_async())
+            return await asyncio.gather(*searches)
+
+        serial = HeuristicSearch(self.sim, self.dvs, self.sim_quadratic, self.sum_squared_error_quadratic).search()
+        responses = asyncio.run(run_two_searches())
+        for response in responses:
+            self.assertTrue(response.success)
+            self.assertEqual(serial.values, response.values)
+        self.assertEqual(2, in_flight[1])
+        self.assertGreater(len(progress), 0)
+        with self.assertRaises(MyPyOptException):
+            AsyncHeuristicSearch(self.sim, self.dvs, sim_quadratic_async, self.sum_squared_error_quadratic,
+                                 concurrency=0)
+
+    def test_async_serial_and_array_results(self):
+        import numpy as np
+        calls = list()
+
+        async def sim_array_async(parameter_hash):
+            calls.append(parameter_hash)
+            return np.array(self.sim_quadratic(parameter_hash))
+
+        serial = HeuristicSearch(self.sim, self.dvs, self.sim_quadratic, self.sum_squared_error_quadratic)
+        serial_response = serial.search()
+        dvs = [DecisionVariable(dv.var_name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                convergence_criterion=0.000001) for dv in self.dvs]
+        searcher = AsyncHeuristicSearch(self.sim, dvs, sim_array_async, self.sum_squared_error_quadratic)
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertEqual(serial_response.values, response.values)
+        # with a single evaluation in flight the sweep is not speculative, so it costs no more than the serial one
+        self.assertFalse(searcher.evaluates_in_batches())
+        self.assertEqual(serial.timers.counts['evaluate'], len(calls))
+
+        async def sim_zero_async(_):
+            return np.array([0.0])
+
+        response = AsyncHeuristicSearch(self.sim, dvs, sim_zero_async, lambda x: float(x[0] ** 2)).search()
+        self.assertNotEqual(ReturnStateEnum.InvalidInitialPoint, response.reason)
+
+    def test_async_subprocess(self):
+        async def sim_subprocess(parameter_hash):
+            code, stdout = await run_subprocess(sys.executable, '-c', 'print(' + str(parameter_hash['a']) + ')')
+            return [float(stdout)] if code == 0 else None
+
+        sim = ProjectStructure(project_name='TestProject', output_dir_path=Path(self.sim.output_dir),
+                               parallel_workers=4)
+        dvs = [DecisionVariable('a', initial_value=3, initial_step_size=0.5, convergence_criterion=0.1)]
+        response = AsyncHeuristicSearch(sim, dvs, sim_subprocess, lambda x: (x[0] - 4) ** 2,
+                                        callback_completed=lambda _: None).search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(4.0, response.values['a'], 0)
+
+    def test_evaluation_records(self):
+        calls = list()
+
+        def sim(parameter_hash):
+            calls.append(parameter_hash)
+            return self.sim_quadratic(parameter_hash)
+
+        searcher = HeuristicSearch(self.sim, self.dvs, sim, self.sum_squared_error_quadratic)
+        response = searcher.search()
+        records = RunLog.read_records(searcher.run_dir)
+        self.assertEqual(len(calls), len(records))
+        self.assertEqual(0, records[0]['iteration'])
+        self.assertEqual(calls[-1], records[-1]['point'])
+        self.assertEqual(ReturnStateEnum.Successful, records[-1]['state'])
+        self.assertLessEqual(records[-1]['j_base'], records[1]['j_base'])
+        self.assertTrue(response.success)
+        full_output = (Path(searcher.run_dir) / RunLog.text_file_name).read_text()
+        self.assertIn('*******Converged*******', full_output)
+
+        history = EvaluationHistory.load(searcher.run_dir)
+        self.assertEqual(['a', 'b', 'c'], history['variable_names'])
+        self.assertEqual(len(calls), len(history['objective']))
+        self.assertEqual((len(calls), 3), history['x'].shape)
+        self.assertEqual([calls[-1][name] for name in 'abc'], history['x'][-1].tolist())
+        self.assertEqual([r['iteration'] for r in records], history['iteration'].tolist())
+        self.assertEqual([-1, 0, 1, 2], history['variable_index'][:4].tolist())
+        self.assertAlmostEqual(records[-1]['objective'], history['objective'][-1])
+        self.assertTrue((history['state'] == ReturnStateEnum.Successful).all())
+
     def test_quadratic_bad_folder(self):
         # same settings except output dir changed
         sim2 = self.sim
         sim2.output_dir = '/usr'
+        searcher = HeuristicSearch(sim2, self.dvs, self.sim_quadratic,
+                                   self.sum_squared_error_quadratic, self.io, self.progress, self.completed)
         with self.assertRaises(MyPyOptException):
-            HeuristicSearch(sim2, self.dvs, self.sim_quadratic,
-                            self.sum_squared_error_quadratic, self.io, self.progress, self.completed)
+            searcher.search()
 
     def test_duplicated_dv_names(self):
         these_dvs = self.dvs
@@ -94,6 +322,844 @@ class TestQuadratic(unittest.TestCase):
         self.assertEqual(ReturnStateEnum.InvalidInitialPoint, response.reason)
 
 
+class TestSurrogateSearch(unittest.TestCase):
+    def setUp(self):
+        self.dvs = [DecisionVariable(name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                     convergence_criterion=0.0001) for name in ['a', 'b', 'c']]
+        self.sim = ProjectStructure(project_name='TestProject', random_seed=1,
+                                    output_dir_path=Path(__file__).resolve().parent.parent.parent / 'projects')
+
+    def test_quadratic(self):
+        calls = list()
+
+        def sim(parameter_hash):
+            calls.append(parameter_hash)
+            return TestQuadratic.sim_quadratic(parameter_hash)
+
+        searcher = SurrogateSearch(self.sim, self.dvs, sim, TestQuadratic.sum_squared_error_quadratic)
+        response = searcher.search()
+        self.assertTrue(response.success)
+        # the objective is far less sensitive to a than to c, so a is only pinned down loosely
+        self.assertAlmostEqual(1.0, response.values['a'], 1)
+        self.assertAlmostEqual(2.0, response.values['b'], 2)
+        self.assertAlmostEqual(3.0, response.values['c'], 2)
+        self.assertEqual(len(calls), len(EvaluationHistory.load(searcher.run_dir)['objective']))
+
+    def test_quadratic_parallel_batch(self):
+        sim = ProjectStructure(project_name='TestProject', random_seed=1, parallel_workers=4,
+                               output_dir_path=Path(self.sim.output_dir))
+        response = SurrogateSearch(sim, self.dvs, None, None, callback_batch=TestQuadratic.batch_quadratic).search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(1.0, response.values['a'], 1)
+        self.assertAlmostEqual(3.0, response.values['c'], 2)
+
+    def test_bad_inputs(self):
+        with self.assertRaises(MyPyOptException):
+            SurrogateSearch(self.sim, self.dvs, TestQuadratic.sim_quadratic, sum, initial_samples=2)
+        with self.assertRaises(MyPyOptException):
+            SurrogateSearch(self.sim, self.dvs, TestQuadratic.sim_quadratic, sum, candidates_per_variable=0)
+        searcher = SurrogateSearch(self.sim, self.dvs, lambda _: None, sum)
+        self.assertEqual(ReturnStateEnum.InvalidInitialPoint, searcher.search().reason)
+        searcher = SurrogateSearch(self.sim, self.dvs, TestQuadratic.sim_quadratic, lambda x: x)
+        self.assertEqual(ReturnStateEnum.UnsuccessfulOther, searcher.search().reason)
+
+
+class TestDifferentialEvolution(unittest.TestCase):
+    def setUp(self):
+        self.project = ProjectStructure(project_name='TestEvolution', output_dir_path=Path(mkdtemp()), random_seed=2)
+
+    def test_rastrigin(self):
+        progress = list()
+        dvs = TestMultiStartSearch.dvs()
+        single = HeuristicSearch(self.project, TestMultiStartSearch.dvs(), TestMultiStartSearch.sim_point,
+                                 TestMultiStartSearch.rastrigin).search()
+        searcher = DifferentialEvolution(self.project, dvs, TestMultiStartSearch.sim_point,
+                                         TestMultiStartSearch.rastrigin,
+                                         callback_progress=lambda i, j: progress.append((i, j)))
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertLess(response.objective_value, single.objective_value)
+        self.assertAlmostEqual(0.0, response.values['a'], 3)
+        self.assertAlmostEqual(0.0, response.values['b'], 3)
+        self.assertEqual(list(range(1, len(progress) + 1)), [i for i, _ in progress])
+        best_values = [j for _, j in progress]
+        self.assertEqual(sorted(best_values, reverse=True), best_values)
+        history = EvaluationHistory.load(searcher.run_dir)
+        self.assertEqual(searcher.population_size * (len(progress) + 2), len(history['objective']))
+        self.assertTrue(((history['x'] >= -5.12) & (history['x'] <= 5.12)).all())
+
+    def test_generations_are_batched(self):
+        batches = list()
+
+        def batch(x):
+            batches.append(len(x))
+            return TestQuadratic.batch_quadratic(x)
+
+        dvs = [DecisionVariable(name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                convergence_criterion=0.0001) for name in ['a', 'b', 'c']]
+        project = ProjectStructure(write_output=False, random_seed=2, parallel_workers=4)
+        response = DifferentialEvolution(project, dvs, None, None, callback_batch=batch, population_size=12,
+                                         strategy='best1bin').search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(3.0, response.values['c'], 3)
+        self.assertEqual({12}, set(batches))
+
+    def test_bad_inputs(self):
+        dvs = TestMultiStartSearch.dvs()
+        for arguments in [{'population_size': 3}, {'mutation': (1.0, 0.5)}, {'mutation': (0.0, 1.0)},
+                          {'crossover': 1.5}, {'strategy': 'current2best'}]:
+            with self.assertRaises(MyPyOptException):
+                DifferentialEvolution(self.project, dvs, TestMultiStartSearch.sim_point, sum, **arguments)
+        searcher = DifferentialEvolution(self.project, dvs, lambda _: None, sum)
+        self.assertEqual(ReturnStateEnum.InvalidInitialPoint, searcher.search().reason)
+        searcher = DifferentialEvolution(self.project, dvs, TestMultiStartSearch.sim_point, lambda x: x)
+        self.assertEqual(ReturnStateEnum.UnsuccessfulOther, searcher.search().reason)
+
+
+class TestQuasiNewtonSearch(unittest.TestCase):
+    def setUp(self):
+        self.project = ProjectStructure(project_name='TestQuasiNewton', output_dir_path=Path(mkdtemp()))
+
+    @staticmethod
+    def dvs():
+        return [DecisionVariable(name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                 convergence_criterion=0.000001) for name in ['a', 'b', 'c']]
+
+    def test_quadratic(self):
+        progress = list()
+        heuristic = HeuristicSearch(self.project, self.dvs(), TestQuadratic.sim_quadratic,
+                                    TestQuadratic.sum_squared_error_quadratic)
+        heuristic.search()
+        searcher = QuasiNewtonSearch(self.project, self.dvs(), TestQuadratic.sim_quadratic,
+                                     TestQuadratic.sum_squared_error_quadratic,
+                                     callback_progress=lambda i, j: progress.append((i, j)))
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(1.0, response.values['a'], 4)
+        self.assertAlmostEqual(2.0, response.values['b'], 4)
+        self.assertAlmostEqual(3.0, response.values['c'], 4)
+        self.assertLess(searcher.timers.counts['evaluate'] * 3, heuristic.timers.counts['evaluate'])
+        best_values = [j for _, j in progress]
+        self.assertEqual(sorted(best_values, reverse=True), best_values)
+        history = EvaluationHistory.load(searcher.run_dir)
+        self.assertEqual(searcher.timers.counts['evaluate'], len(history['objective']))
+
+    def test_evaluations_are_batched(self):
+        batches = list()
+
+        def batch(x):
+            batches.append(len(x))
+            return TestQuadratic.batch_quadratic(x)
+
+        project = ProjectStructure(write_output=False, parallel_workers=4)
+        response = QuasiNewtonSearch(project, self.dvs(), None, None, callback_batch=batch).search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(3.0, response.values['c'], 4)
+        # the initial point with both sides of every variable, then line searches of four steps and gradients
+        self.assertEqual(7, batches[0])
+        self.assertEqual(4, batches[1])
+        self.assertEqual(6, batches[2])
+        forward = list()
+        QuasiNewtonSearch(project, self.dvs(), None, None, differences='forward',
+                          callback_batch=lambda x: forward.append(len(x)) or TestQuadratic.batch_quadratic(x)).search()
+        self.assertEqual(4, forward[0])
+        self.assertIn(3, forward)
+
+    def test_bounds(self):
+        dvs = self.dvs()
+        dvs[2] = DecisionVariable('c', minimum=-5, maximum=2.5, initial_value=0.5, initial_step_size=0.1,
+                                  convergence_criterion=0.000001)
+        searcher = QuasiNewtonSearch(self.project, dvs, TestQuadratic.sim_quadratic,
+                                     TestQuadratic.sum_squared_error_quadratic)
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertEqual(2.5, response.values['c'])
+        history = EvaluationHistory.load(searcher.run_dir)
+        self.assertTrue((history['x'][:, 2] <= 2.5).all())
+
+    def test_bad_inputs(self):
+        dvs = TestMultiStartSearch.dvs()
+        for arguments in [{'differences': 'backward'}, {'difference_scale': 0}, {'memory': 0}]:
+            with self.assertRaises(MyPyOptException):
+                QuasiNewtonSearch(self.project, dvs, TestMultiStartSearch.sim_point, sum, **arguments)
+        searcher = QuasiNewtonSearch(self.project, dvs, lambda _: None, sum)
+        self.assertEqual(ReturnStateEnum.InvalidInitialPoint, searcher.search().reason)
+        # only the initial point evaluates, so there is no gradient to follow, which is not convergence
+        searcher = QuasiNewtonSearch(self.project, dvs, lambda p: [2.5, 2.5] if p['a'] == p['b'] == 2.5 else None, sum)
+        response = searcher.search()
+        self.assertFalse(response.success)
+        self.assertEqual(ReturnStateEnum.InfeasibleObj, response.reason)
+        self.assertEqual({'a': 2.5, 'b': 2.5}, response.values)
+        searcher = QuasiNewtonSearch(self.project, dvs, TestMultiStartSearch.sim_point, lambda x: x)
+        self.assertEqual(ReturnStateEnum.UnsuccessfulOther, searcher.search().reason)
+
+
+class TestNelderMeadSearch(unittest.TestCase):
+    def setUp(self):
+        self.project = ProjectStructure(project_name='TestNelderMead', output_dir_path=Path(mkdtemp()))
+
+    def test_quadratic(self):
+        progress = list()
+        heuristic = HeuristicSearch(self.project, TestQuasiNewtonSearch.dvs(), TestQuadratic.sim_quadratic,
+                                    TestQuadratic.sum_squared_error_quadratic)
+        heuristic.search()
+        searcher = NelderMeadSearch(self.project, TestQuasiNewtonSearch.dvs(), TestQuadratic.sim_quadratic,
+                                    TestQuadratic.sum_squared_error_quadratic,
+                                    callback_progress=lambda i, j: progress.append((i, j)))
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(1.0, response.values['a'], 4)
+        self.assertAlmostEqual(2.0, response.values['b'], 4)
+        self.assertAlmostEqual(3.0, response.values['c'], 4)
+        self.assertLess(searcher.timers.counts['evaluate'], heuristic.timers.counts['evaluate'])
+        best_values = [j for _, j in progress]
+        self.assertEqual(sorted(best_values, reverse=True), best_values)
+        history = EvaluationHistory.load(searcher.run_dir)
+        self.assertEqual(searcher.timers.counts['evaluate'], len(history['objective']))
+
+    def test_speculative_candidates(self):
+        batches = list()
+
+        def batch(x):
+            batches.append(len(x))
+            return TestQuadratic.batch_quadratic(x)
+
+        sequential = NelderMeadSearch(ProjectStructure(write_output=False), TestQuasiNewtonSearch.dvs(),
+                                      TestQuadratic.sim_quadratic, TestQuadratic.sum_squared_error_quadratic)
+        expected = sequential.search()
+        project = ProjectStructure(write_output=False, parallel_workers=4)
+        searcher = NelderMeadSearch(project, TestQuasiNewtonSearch.dvs(), None, None, callback_batch=batch)
+        response = searcher.search()
+        # the extra candidates only use spare workers, the simplex moves just as it does one point at a time
+        self.assertEqual(expected.values, response.values)
+        self.assertEqual(4, batches[0])
+        self.assertEqual(4, max(batches))
+        self.assertLess(len(batches), sequential.timers.counts['evaluate'] * 0.7)
+
+    def test_bounds(self):
+        dvs = TestQuasiNewtonSearch.dvs()
+        dvs[2] = DecisionVariable('c', minimum=-5, maximum=2.5, initial_value=2.5, initial_step_size=0.1,
+                                  convergence_criterion=0.000001)
+        searcher = NelderMeadSearch(self.project, dvs, TestQuadratic.sim_quadratic,
+                                    TestQuadratic.sum_squared_error_quadratic)
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(2.5, response.values['c'], 5)
+        history = EvaluationHistory.load(searcher.run_dir)
+        self.assertTrue((history['x'][:, 2] <= 2.5).all())
+
+    def test_bad_inputs(self):
+        dvs = TestMultiStartSearch.dvs()
+        for arguments in [{'reflection': 0}, {'expansion': 1.0}, {'contraction': 1.0}, {'shrink': 0}]:
+            with self.assertRaises(MyPyOptException):
+                NelderMeadSearch(self.project, dvs, TestMultiStartSearch.sim_point, sum, **arguments)
+        searcher = NelderMeadSearch(self.project, dvs, lambda _: None, sum)
+        self.assertEqual(ReturnStateEnum.InvalidInitialPoint, searcher.search().reason)
+        searcher = NelderMeadSearch(self.project, dvs, TestMultiStartSearch.sim_point, lambda x: x)
+        self.assertEqual(ReturnStateEnum.UnsuccessfulOther, searcher.search().reason)
+
+
+class TestSensitivityScreening(unittest.TestCase):
+    weights = [1.0, 2.0, 3.0, 0.001, 0.002, 0.0, 0.001, 0.003]
+    names = ['x' + str(i) for i in range(8)]
+
+    def dvs(self):
+        return [DecisionVariable(name, minimum=-5, maximum=5, initial_value=3.0, initial_step_size=0.5,
+                                 convergence_criterion=0.0001) for name in self.names]
+
+    def objective(self, parameter_hash):
+        return sum(w * (parameter_hash[name] - 1) ** 2 for w, name in zip(self.weights, self.names))
+
+    def test_freeze(self):
+        project = ProjectStructure(project_name='TestScreening', output_dir_path=Path(mkdtemp()), random_seed=1)
+        screening = SensitivityScreening(project, self.dvs(), dict, self.objective)
+        response = screening.search()
+        self.assertTrue(response.success)
+        self.assertEqual(10 * 9, screening.timers.counts['evaluate'])
+        self.assertEqual({'x0', 'x1', 'x2'}, set(screening.ranking()[:3]))
+        self.assertEqual(['x3', 'x4', 'x5', 'x6', 'x7'], screening.negligible)
+        self.assertEqual(0.0, screening.mu_star['x5'])
+        with open(os.path.join(screening.run_dir, 'screening.json')) as f:
+            self.assertEqual(screening.negligible, json.load(f)['negligible'])
+        self.assertEqual(['x0', 'x1', 'x2'], [dv.var_name for dv in screening.screened_variables()])
+        self.assertEqual({name: 3.0 for name in screening.negligible}, screening.fixed_values())
+        callback = screening.with_fixed_values(dict)
+        self.assertIsInstance(pickle.loads(pickle.dumps(callback)), FixedValues)
+        self.assertEqual(8, len(callback({'x0': 1.0, 'x1': 1.0, 'x2': 1.0})))
+        searcher = HeuristicSearch(project, screening.screened_variables(), callback, self.objective)
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(1.0, response.values['x2'], 3)
+        self.assertNotIn('x5', response.values)
+
+    def test_coarsen(self):
+        batches = list()
+
+        def batch(x):
+            batches.append(len(x))
+            return ((x - 1) ** 2).dot(self.weights)
+
+        project = ProjectStructure(write_output=False, random_seed=1)
+        progress = list()
+        # the progress callback keeps its place among the arguments HeuristicSearch takes
+        screening = SensitivityScreening(project, self.dvs(), None, None, None, lambda i, j: progress.append(i),
+                                         callback_batch=batch, trajectories=4, action='coarsen', coarsen_factor=100)
+        screening.search()
+        self.assertEqual([4 * 9], batches)
+        self.assertEqual([1], progress)
+        self.assertEqual({}, screening.fixed_values())
+        criteria = {dv.var_name: dv.convergence_criteria for dv in screening.screened_variables()}
+        self.assertEqual(8, len(criteria))
+        for name in self.names:
+            self.assertAlmostEqual(0.01 if name in screening.negligible else 0.0001, criteria[name])
+        self.assertIn('x5', screening.negligible)
+        self.assertNotIn('x2', screening.negligible)
+
+    def test_freeze_batch(self):
+        def batch(x):
+            self.assertEqual(8, x.shape[1])
+            return ((x - 1) ** 2).dot(self.weights)
+
+        project = ProjectStructure(write_output=False, random_seed=1)
+        screening = SensitivityScreening(project, self.dvs(), None, None, callback_batch=batch)
+        screening.search()
+        callback = screening.with_fixed_columns(batch)
+        self.assertIsInstance(callback, FixedColumns)
+        searcher = HeuristicSearch(project, screening.screened_variables(), None, None, callback_batch=callback)
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertEqual(['x0', 'x1', 'x2'], sorted(response.values))
+        self.assertAlmostEqual(1.0, response.values['x2'], 3)
+
+    def test_bad_inputs(self):
+        project = ProjectStructure(write_output=False)
+        for arguments in [{'trajectories': 1}, {'levels': 3}, {'threshold': 1.0}, {'coarsen_factor': 0.5},
+                          {'action': 'drop'}]:
+            with self.assertRaises(MyPyOptException):
+                SensitivityScreening(project, self.dvs(), dict, self.objective, **arguments)
+        screening = SensitivityScreening(project, self.dvs(), lambda _: None, sum)
+        self.assertEqual(ReturnStateEnum.InvalidInitialPoint, screening.search().reason)
+        screening = SensitivityScreening(project, self.dvs(), dict, lambda x: x)
+        self.assertEqual(ReturnStateEnum.UnsuccessfulOther, screening.search().reason)
+
+
+class TestCalibrationObjective(unittest.TestCase):
+    measured = [20.0, 22.0, 24.0, 26.0]
+    simulated = [21.0, 21.0, 25.0, 27.0]
+
+    def test_metrics(self):
+        errors = [m - s for m, s in zip(self.measured, self.simulated)]
+        sse = sum(e ** 2 for e in errors)
+        mean = sum(self.measured) / 4
+        self.assertAlmostEqual(sse, CalibrationObjective(self.measured)(self.simulated))
+        self.assertAlmostEqual(math.sqrt(sse / 4), CalibrationObjective(self.measured, 'rmse')(self.simulated))
+        self.assertAlmostEqual(100 * math.sqrt(sse / 3) / mean,
+                               CalibrationObjective(self.measured, 'cv_rmse')(self.simulated))
+        self.assertAlmostEqual(100 * abs(sum(errors)) / 3 / mean,
+                               CalibrationObjective(self.measured, 'nmbe')(self.simulated))
+        weighted = CalibrationObjective(self.measured, weights=[1, 0, 0, 2])
+        self.assertAlmostEqual(1 + 2, weighted(self.simulated))
+        # streamed results are compared with the first hours of the measured data
+        self.assertAlmostEqual(1.0, weighted(self.simulated[:2]))
+        self.assertIsInstance(weighted(self.simulated), float)
+
+    def test_streamed_results(self):
+        import numpy as np
+        measured = np.arange(1.0, 13.0).reshape(6, 2)
+        simulated = measured + np.arange(6.0)[:, np.newaxis]
+        for metric in CalibrationObjective.metrics:
+            objective = CalibrationObjective(measured, metric, weights=[1.0, 2.0])
+            accumulator = objective.accumulator()
+            for rows in [2, 3, 6]:
+                self.assertAlmostEqual(objective(simulated[:rows]), accumulator.add(simulated[accumulator.rows:rows]))
+            with self.assertRaises(MyPyOptException):
+                accumulator.add(simulated[:1])
+
+        def stream(parameter_hash):
+            for month in range(3):
+                yield simulated[2 * month:2 * month + 2].tolist()
+
+        objective = CalibrationObjective(measured)
+        self.assertAlmostEqual(objective(simulated), evaluate_point(stream, objective, {}).value)
+        evaluation = evaluate_point(stream, objective, {}, bound=objective(simulated[:4]) - 1)
+        self.assertEqual(ReturnStateEnum.Terminated, evaluation.return_state)
+        self.assertAlmostEqual(objective(simulated[:4]), evaluation.value)
+
+    def test_sensor_table(self):
+        import numpy as np
+        measured = np.arange(1.0, 13.0).reshape(6, 2)
+        objective = CalibrationObjective(measured, 'sse', weights=[1.0, 10.0])
+        self.assertIs(measured, objective.measured)
+        self.assertAlmostEqual(6 * 1 + 6 * 10, objective(measured + 1))
+        self.assertAlmostEqual(0.0, CalibrationObjective(measured, 'cv_rmse')(measured.tolist()))
+        with self.assertRaises(MyPyOptException):
+            objective(measured[:, :1])
+        with self.assertRaises(MyPyOptException):
+            objective(np.ones((7, 2)))
+
+    def test_csv_cache(self):
+        directory = mkdtemp()
+        path = os.path.join(directory, 'measured.csv')
+        with open(path, 'w') as f:
+            f.write('hour,t_in,t_out\n' + ''.join(str(h) + ',' + str(20 + h) + ',' + str(h) + '\n' for h in range(24)))
+        objective = CalibrationObjective.from_csv(path, ['t_in', 't_out'])
+        self.assertEqual((24, 2), objective.measured.shape)
+        self.assertEqual(2, len(os.listdir(directory)))
+        again = CalibrationObjective.from_csv(path, ['t_in', 't_out'], metric='rmse')
+        self.assertEqual(objective.measured_path, again.measured_path)
+        self.assertEqual(0.0, again(objective.measured))
+        copy = pickle.loads(pickle.dumps(CalibrationObjective.from_csv(path, ['t_in'])))
+        self.assertEqual(3, len(os.listdir(directory)))
+        self.assertAlmostEqual(24.0, copy([21.0 + h for h in range(24)]))
+
+    def test_array_results(self):
+        import numpy as np
+        objective = CalibrationObjective(self.measured)
+        evaluation = evaluate_point(lambda p: np.array([]), objective, {})
+        self.assertEqual(ReturnStateEnum.InfeasibleObj, evaluation.return_state)
+        evaluation = evaluate_point(lambda p: np.array(self.simulated), objective, {})
+        self.assertEqual(ReturnStateEnum.Successful, evaluation.return_state)
+        self.assertAlmostEqual(4.0, evaluation.value)
+
+    def test_bad_inputs(self):
+        for arguments in [{'metric': 'mape'}, {'weights': [1, 2]}, {'metric': 'nmbe', 'parameters': 4}]:
+            with self.assertRaises(MyPyOptException):
+                CalibrationObjective(self.measured, **arguments)
+        for measured in [[], [[[1.0]]]]:
+            with self.assertRaises(MyPyOptException):
+                CalibrationObjective(measured)
+        with self.assertRaises(MyPyOptException):
+            CalibrationObjective([1.0, -1.0], 'cv_rmse')
+
+
+class TestPatternSearch(unittest.TestCase):
+    @staticmethod
+    def fresh_dvs():
+        return [DecisionVariable(name, minimum=-5, maximum=5, initial_value=-1.5, initial_step_size=0.1,
+                                 convergence_criterion=0.00001) for name in ['x', 'y']]
+
+    # the Rosenbrock function, whose minimum at (1, 1) lies at the end of a long curved valley
+    @staticmethod
+    def sim_valley(parameter_hash):
+        return [parameter_hash['x'], parameter_hash['y']]
+
+    @staticmethod
+    def valley_error(sim_values):
+        x, y = sim_values
+        return 100.0 * (y - x ** 2) ** 2 + (1.0 - x) ** 2
+
+    def test_valley_needs_fewer_evaluations(self):
+        output_dir = Path(mkdtemp())
+        evaluations = dict()
+        for optimizer in [HeuristicSearch, PatternSearch]:
+            calls = list()
+
+            def sim(parameter_hash):
+                calls.append(parameter_hash)
+                return self.sim_valley(parameter_hash)
+
+            project = ProjectStructure(project_name='Valley', output_dir_path=output_dir, max_iterations=5000)
+            response = optimizer(project, self.fresh_dvs(), sim, self.valley_error).search()
+            self.assertTrue(response.success)
+            self.assertAlmostEqual(1.0, response.values['x'], 2)
+            self.assertAlmostEqual(1.0, response.values['y'], 2)
+            evaluations[optimizer] = len(calls)
+        self.assertLess(evaluations[PatternSearch], evaluations[HeuristicSearch] / 2)
+
+    def test_resume_from_checkpoint(self):
+        output_dir = Path(mkdtemp())
+        uninterrupted = PatternSearch(ProjectStructure(project_name='Resumable', output_dir_path=output_dir),
+                                      self.fresh_dvs(), self.sim_valley, self.valley_error).search()
+        interrupted = PatternSearch(
+            ProjectStructure(project_name='Resumable', output_dir_path=output_dir, max_iterations=40,
+                             checkpoint_interval=10),
+            self.fresh_dvs(), self.sim_valley, self.valley_error
+        )
+        interrupted.search()
+        self.assertIn('x_previous', Checkpoint.read(Path(interrupted.run_dir)).decision_variables[0])
+        resumed = PatternSearch(ProjectStructure(project_name='Resumable', output_dir_path=output_dir),
+                                self.fresh_dvs(), self.sim_valley, self.valley_error).resume()
+        self.assertTrue(resumed.success)
+        self.assertEqual(uninterrupted.values, resumed.values)
+
+
+class TestStreamingObjective(unittest.TestCase):
+    def setUp(self):
+        self.sim = ProjectStructure(project_name='TestProject', write_output=False)
+        self.hours = 0
+
+    @staticmethod
+    def fresh_dvs():
+        return [DecisionVariable('a', minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                 convergence_criterion=0.000001),
+                DecisionVariable('b', minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                 convergence_criterion=0.000001)]
+
+    @staticmethod
+    def sum_squared_error(sim_values):
+        actual_values = [1 + 2 * x for x in range(24)]
+        return sum((a - b) ** 2 for a, b in zip(actual_values, sim_values))
+
+    def sim_full(self, parameter_hash):
+        self.hours += 24
+        return [parameter_hash['a'] + parameter_hash['b'] * x for x in range(24)]
+
+    def sim_streaming(self, parameter_hash):
+        for x in range(24):
+            self.hours += 1
+            yield [parameter_hash['a'] + parameter_hash['b'] * x]
+
+    def test_matches_full_simulation(self):
+        full = HeuristicSearch(self.sim, self.fresh_dvs(), self.sim_full, self.sum_squared_error).search()
+        full_hours, self.hours = self.hours, 0
+        searcher = HeuristicSearch(self.sim, self.fresh_dvs(), self.sim_streaming, self.sum_squared_error)
+        streaming = searcher.search()
+        self.assertTrue(streaming.success)
+        self.assertEqual(full.values, streaming.values)
+        self.assertLess(self.hours, full_hours)
+
+    def test_parallel_matches_serial(self):
+        serial = HeuristicSearch(self.sim, self.fresh_dvs(), self.sim_streaming, self.sum_squared_error).search()
+        sim = ProjectStructure(project_name='TestProject', write_output=False, parallel_workers=2)
+        parallel = HeuristicSearch(sim, self.fresh_dvs(), self.sim_streaming, self.sum_squared_error).search()
+        self.assertEqual(serial.values, parallel.values)
+
+    def test_evaluate_point(self):
+        closed = list()
+
+        def stream(parameter_hash):
+            try:
+                for value in [1.0, 2.0, 3.0]:
+                    yield [value]
+            finally:
+                closed.append(True)
+
+        evaluation = evaluate_point(stream, sum, {})
+        self.assertEqual(ReturnStateEnum.Successful, evaluation.return_state)
+        self.assertEqual(6.0, evaluation.value)
+        self.assertEqual(6.0, evaluate_point(stream, sum, {}, bound=10.0).value)
+        evaluation = evaluate_point(stream, sum, {}, bound=2.5)
+        self.assertEqual(ReturnStateEnum.Terminated, evaluation.return_state)
+        self.assertEqual(3.0, evaluation.value)
+        self.assertEqual(3, len(closed))
+        evaluation = evaluate_point(lambda _: iter([[1.0], None]), sum, {})
+        self.assertEqual(ReturnStateEnum.InfeasibleObj, evaluation.return_state)
+        self.assertEqual(ReturnStateEnum.InfeasibleObj, evaluate_point(lambda _: iter([]), sum, {}).return_state)
+
+    def test_terminated_evaluations_are_not_cached(self):
+        cache = EvaluationCache()
+        searcher = HeuristicSearch(self.sim, self.fresh_dvs(), self.sim_streaming, self.sum_squared_error,
+                                   evaluation_cache=cache)
+        searcher.evaluate_points([{'a': 0.0, 'b': 0.0}], bound=1.0)
+        self.assertIsNone(cache.get({'a': 0.0, 'b': 0.0}))
+        searcher.evaluate_points([{'a': 0.0, 'b': 0.0}])
+        self.assertIsNotNone(cache.get({'a': 0.0, 'b': 0.0}))
+
+
+class TestRunTimers(unittest.TestCase):
+    def setUp(self):
+        self.dvs = [DecisionVariable(name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                     convergence_criterion=0.0001) for name in ['a', 'b', 'c']]
+
+    def test_phases(self):
+        output_dir = Path(mkdtemp())
+        progress = list()
+        project = ProjectStructure(project_name='Timed', output_dir_path=output_dir, checkpoint_interval=5)
+        searcher = HeuristicSearch(project, self.dvs, TestQuadratic.sim_quadratic,
+                                   TestQuadratic.sum_squared_error_quadratic, evaluation_cache=EvaluationCache(),
+                                   callback_progress=lambda i, j, timers: progress.append(timers))
+        response = searcher.search()
+        evaluations = len(EvaluationHistory.load(searcher.run_dir)['objective'])
+        phases = response.timings['phases']
+        self.assertEqual(evaluations, phases['simulate']['count'])
+        self.assertEqual(evaluations, phases['objective']['count'])
+        self.assertGreater(phases['simulate']['seconds'], 0.0)
+        self.assertGreater(phases['logging']['count'], 0)
+        self.assertGreater(phases['cache']['seconds'], 0.0)
+        self.assertGreater(phases['checkpoint']['count'], 0)
+        self.assertLessEqual(response.timings['optimizer_seconds'], response.timings['total_seconds'])
+        self.assertIs(searcher.timers, progress[0])
+        with open(os.path.join(searcher.run_dir, RunTimers.file_name)) as f:
+            self.assertEqual(response.timings['phases'], json.load(f)['phases'])
+
+    def test_two_argument_progress(self):
+        progress = list()
+        project = ProjectStructure(write_output=False)
+        HeuristicSearch(project, self.dvs, TestQuadratic.sim_quadratic, TestQuadratic.sum_squared_error_quadratic,
+                        callback_progress=lambda i, j: progress.append(j)).search()
+        self.assertGreater(len(progress), 0)
+
+    def test_profiling(self):
+        project = ProjectStructure(project_name='Profiled', output_dir_path=Path(mkdtemp()), profile_cpu=True,
+                                   profile_memory=True)
+        searcher = HeuristicSearch(project, self.dvs, TestQuadratic.sim_quadratic,
+                                   TestQuadratic.sum_squared_error_quadratic)
+        response = searcher.search()
+        self.assertGreater(response.timings['peak_memory_bytes'], 0)
+        self.assertTrue(os.path.exists(os.path.join(searcher.run_dir, 'profile.pstats')))
+        self.assertTrue(os.path.exists(os.path.join(searcher.run_dir, 'memory.txt')))
+        import pstats
+        import tracemalloc
+        self.assertGreater(pstats.Stats(searcher.timers.profiler).total_calls, 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+class TestStoppingRules(unittest.TestCase):
+    def setUp(self):
+        self.evaluations = 0
+
+    def dvs(self):
+        return [DecisionVariable(name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                 convergence_criterion=0.000001) for name in ['a', 'b', 'c']]
+
+    def sim(self, parameter_hash):
+        self.evaluations += 1
+        return TestQuadratic.sim_quadratic(parameter_hash)
+
+    def search(self, optimizer=HeuristicSearch, **settings):
+        self.evaluations = 0
+        project = ProjectStructure(write_output=False, random_seed=1, **settings)
+        return optimizer(project, self.dvs(), self.sim, TestQuadratic.sum_squared_error_quadratic).search()
+
+    def test_stall(self):
+        converged = self.search()
+        self.assertEqual(StopReasonEnum.Converged, converged.stop_reason)
+        full_evaluations = self.evaluations
+        response = self.search(stall_iterations=10, stall_absolute_tolerance=0.0001)
+        self.assertTrue(response.success)
+        self.assertEqual(StopReasonEnum.Stalled, response.stop_reason)
+        self.assertLess(self.evaluations, 0.6 * full_evaluations)
+        self.assertAlmostEqual(3.0, response.values['c'], 3)
+
+    def test_target(self):
+        for optimizer in [HeuristicSearch, SurrogateSearch, DifferentialEvolution]:
+            response = self.search(optimizer, target_objective=1.0)
+            self.assertTrue(response.success)
+            self.assertEqual(ReturnStateEnum.Successful, response.reason)
+            self.assertEqual(StopReasonEnum.TargetReached, response.stop_reason)
+            self.assertLessEqual(response.objective_value, 1.0)
+
+    def test_budgets(self):
+        response = self.search(evaluation_budget=50)
+        self.assertFalse(response.success)
+        self.assertEqual(ReturnStateEnum.BudgetExhausted, response.reason)
+        self.assertEqual(StopReasonEnum.EvaluationBudget, response.stop_reason)
+        self.assertIsNotNone(response.values)
+        # the budget is checked after each iteration, which takes at most two evaluations per decision variable
+        self.assertTrue(50 <= self.evaluations < 56)
+        response = self.search(time_budget=1e-9)
+        self.assertEqual(StopReasonEnum.TimeBudget, response.stop_reason)
+
+    def test_max_iterations(self):
+        for optimizer in [HeuristicSearch, SurrogateSearch, DifferentialEvolution]:
+            response = self.search(optimizer, max_iterations=3)
+            self.assertFalse(response.success)
+            self.assertEqual(StopReasonEnum.MaxIterations, response.stop_reason)
+            self.assertEqual(['a', 'b', 'c'], sorted(response.values))
+
+    def test_other_stop_reasons(self):
+        searcher = HeuristicSearch(ProjectStructure(write_output=False), self.dvs(), self.sim,
+                                   TestQuadratic.sum_squared_error_quadratic,
+                                   callback_progress=lambda i, j: searcher.request_stop())
+        self.assertEqual(StopReasonEnum.Cancelled, searcher.search().stop_reason)
+        # the stop only applied to that run, the next one starts with a fresh token
+        searcher.callback_progress = None
+        self.assertTrue(searcher.search().success)
+        searcher = HeuristicSearch(ProjectStructure(write_output=False), self.dvs(), lambda _: None, sum)
+        self.assertEqual(StopReasonEnum.Failed, searcher.search().stop_reason)
+
+    def test_non_scalar_objective(self):
+        # the run is still wrapped up, rather than left open behind an exception
+        for optimizer in [SurrogateSearch, DifferentialEvolution, QuasiNewtonSearch, NelderMeadSearch,
+                          SensitivityScreening]:
+            completed = list()
+            project = ProjectStructure(project_name='TestProject', output_dir_path=Path(mkdtemp()), random_seed=1)
+            searcher = optimizer(project, self.dvs(), TestQuadratic.sim_quadratic, lambda results: results,
+                                 callback_completed=completed.append)
+            response = searcher.search()
+            self.assertEqual(ReturnStateEnum.UnsuccessfulOther, response.reason)
+            self.assertEqual(StopReasonEnum.Failed, response.stop_reason)
+            self.assertEqual([response], completed)
+            self.assertTrue(os.path.exists(os.path.join(searcher.run_dir, 'timings.json')))
+            self.assertIn('single number', Path(searcher.run_dir, RunLog.text_file_name).read_text())
+
+    def test_exception_closes_run(self):
+        def progress(iteration, j):
+            raise RuntimeError('progress callback crashed')
+
+        for optimizer in [HeuristicSearch, NelderMeadSearch]:
+            project = ProjectStructure(project_name='TestProject', output_dir_path=Path(mkdtemp()))
+            searcher = optimizer(project, self.dvs(), TestQuadratic.sim_quadratic,
+                                 TestQuadratic.sum_squared_error_quadratic, callback_progress=progress)
+            with self.assertRaises(RuntimeError):
+                searcher.search()
+            self.assertTrue(searcher.log._text_file.closed)
+            # the evaluations of the first iteration were flushed out of the history buffer
+            self.assertGreater(len(EvaluationHistory.load(searcher.run_dir)['objective']), 1)
+
+
+class TestCancelToken(unittest.TestCase):
+    def setUp(self):
+        self.dvs = [DecisionVariable(name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                     convergence_criterion=0.000001) for name in ['a', 'b', 'c']]
+        self.project = ProjectStructure(write_output=False)
+
+    def test_callbacks(self):
+        token = CancelToken()
+        called = list()
+        remove = token.add_callback(lambda: called.append('first'))
+        token.add_callback(lambda: called.append('second'))
+        remove()
+        self.assertFalse(token.wait(0.01))
+        token.cancel(ReturnStateEnum.Cancelled)
+        token.cancel(ReturnStateEnum.UserAborted)
+        self.assertTrue(token.cancelled)
+        self.assertEqual(ReturnStateEnum.Cancelled, token.reason)
+        self.assertEqual(['second'], called)
+        token.add_callback(lambda: called.append('late'))
+        self.assertEqual(['second', 'late'], called)
+
+    def test_cancel_from_progress(self):
+        token = CancelToken()
+
+        def progress(iteration, j):
+            if iteration == 5:
+                token.cancel()
+
+        searcher = HeuristicSearch(self.project, self.dvs, TestQuadratic.sim_quadratic,
+                                   TestQuadratic.sum_squared_error_quadratic, callback_progress=progress,
+                                   cancel_token=token)
+        response = searcher.search()
+        self.assertFalse(response.success)
+        self.assertEqual(ReturnStateEnum.UserAborted, response.reason)
+        self.assertEqual(['a', 'b', 'c'], sorted(response.values))
+        self.assertIsNotNone(response.objective_value)
+
+    def test_surrogate_cancel(self):
+        searcher = SurrogateSearch(self.project, self.dvs, TestQuadratic.sim_quadratic,
+                                   TestQuadratic.sum_squared_error_quadratic,
+                                   callback_progress=lambda i, j: i == 3 and searcher.request_stop())
+        response = searcher.search()
+        self.assertEqual(ReturnStateEnum.Cancelled, response.reason)
+        self.assertIsNotNone(response.values)
+
+    def test_stop_file(self):
+        io = InputOutputManager()
+        io.stopFile = os.path.join(mkdtemp(), 'stop.stop')
+
+        def progress(iteration, j):
+            if iteration == 3:
+                Path(io.stopFile).touch()
+                # the file is watched in the background, so give the watcher a moment before the next iteration
+                searcher.cancel_token.wait(5.0)
+
+        searcher = HeuristicSearch(self.project, self.dvs, TestQuadratic.sim_quadratic,
+                                   TestQuadratic.sum_squared_error_quadratic, input_output_worker=io,
+                                   callback_progress=progress)
+        response = searcher.search()
+        self.assertEqual(ReturnStateEnum.UserAborted, response.reason)
+
+    def test_in_flight_evaluations_are_abandoned(self):
+        import threading
+        release = threading.Event()
+        token = CancelToken()
+
+        def sim_slow(parameter_hash):
+            if parameter_hash['a'] != 0.5:
+                # every point but the initial one blocks until the test is over
+                threading.Timer(0.1, token.cancel).start()
+                release.wait(30.0)
+            return TestQuadratic.sim_quadratic(parameter_hash)
+
+        project = ProjectStructure(write_output=False, parallel_workers=2)
+        searcher = HeuristicSearch(project, self.dvs, sim_slow, TestQuadratic.sum_squared_error_quadratic,
+                                   cancel_token=token)
+        start = time.perf_counter()
+        response = searcher.search()
+        self.assertLess(time.perf_counter() - start, 10.0)
+        release.set()
+        self.assertEqual(ReturnStateEnum.UserAborted, response.reason)
+
+    def test_async_cancel(self):
+        token = CancelToken()
+        started = list()
+
+        async def sim_forever(parameter_hash):
+            if parameter_hash['a'] == 0.5 and not started:
+                started.append(True)
+                return TestQuadratic.sim_quadratic(parameter_hash)
+            token.cancel()
+            await asyncio.sleep(30.0)
+
+        project = ProjectStructure(write_output=False, parallel_workers=2)
+        response = AsyncHeuristicSearch(project, self.dvs, sim_forever, TestQuadratic.sum_squared_error_quadratic,
+                                        cancel_token=token).search()
+        self.assertEqual(ReturnStateEnum.UserAborted, response.reason)
+
+    def test_handle_signals(self):
+        import signal
+        token = CancelToken()
+        previous = signal.getsignal(signal.SIGINT)
+        restore = token.handle_signals([signal.SIGINT])
+        os.kill(os.getpid(), signal.SIGINT)
+        self.assertTrue(token.wait(5.0))
+        self.assertEqual(ReturnStateEnum.UserAborted, token.reason)
+        restore()
+        self.assertIs(previous, signal.getsignal(signal.SIGINT))
+
+
+class TestSimulationAdapter(unittest.TestCase):
+    def test_render(self):
+        adapter = SimulationAdapter('{"a": {a}, "b": [{b}, {a}], "c": {not a name}}')
+        self.assertEqual(['a', 'b'], adapter.parameter_names)
+        self.assertEqual('{"a": 1.5, "b": [-2, 1.5], "c": {not a name}}', adapter.render({'a': 1.5, 'b': -2}))
+        with self.assertRaises(MyPyOptException):
+            adapter.render({'a': 1.5})
+        self.assertEqual('x', SimulationAdapter('x').render({}))
+
+    def test_scratch_directories(self):
+        support = Path(mkdtemp()) / 'weather.epw'
+        support.write_text('weather')
+        adapter = SimulationAdapter('a={a}', input_file_name='in.txt', support_files=[support],
+                                    scratch_root=mkdtemp())
+        with adapter.scratch_directory() as first:
+            with adapter.scratch_directory() as second:
+                self.assertNotEqual(first, second)
+                (second / 'out.csv').write_text('stale')
+                (second / 'output').mkdir()
+                (second / 'weather.epw').unlink()
+            self.assertEqual('weather', (first / 'weather.epw').read_text())
+        # a directory handed back keeps only the support files
+        self.assertEqual(['weather.epw'], sorted(os.listdir(second)))
+        self.assertEqual('weather', (second / 'weather.epw').read_text())
+        # the directory is reused once it has been handed back, but not after an evaluation failed in it
+        self.assertEqual('a=2', adapter.run({'a': 2}, lambda d: (d / 'in.txt').read_text()))
+        with self.assertRaises(ValueError):
+            adapter.run({'a': 3}, lambda d: float('not a number'))
+        self.assertEqual(1, len(adapter._free))
+        with self.assertRaises(ValueError):
+            adapter.run({'a': 4}, lambda d: float('not a number'))
+        self.assertFalse(first.exists() or second.exists())
+        copy = pickle.loads(pickle.dumps(adapter))
+        self.assertEqual('a=5', copy.run({'a': 5}, lambda d: (d / 'in.txt').read_text()))
+        self.assertFalse(str(first).startswith(copy._root))
+        root = adapter._root
+        adapter.cleanup()
+        copy.cleanup()
+        self.assertFalse(os.path.exists(root))
+        self.assertEqual('a=6', adapter.run({'a': 6}, lambda d: (d / 'in.txt').read_text()))
+        adapter.cleanup()
+
+    def test_read_csv(self):
+        path = Path(mkdtemp()) / 'out.csv'
+        path.write_text('Hour, Temperature [C],Flow\n1,20.5,3\n2,21.25,4\n\n')
+        self.assertEqual([[20.5, 21.25], [1.0, 2.0]], SimulationAdapter.read_csv(path, ['Temperature [C]', 0]))
+        with self.assertRaises(MyPyOptException):
+            SimulationAdapter.read_csv(path, ['Pressure'])
+        with self.assertRaises(MyPyOptException):
+            SimulationAdapter.read_csv(path, [1], header_rows=0)
+
+
 class TestDefaults(unittest.TestCase):
     """
     This unit test class is about testing out the default initializations of parameters passed into constructors
@@ -118,6 +1184,8 @@ class TestDefaults(unittest.TestCase):
         self.assertTrue(response.success)
         self.assertAlmostEqual(1.0, response.values['a'], 2)
         self.assertAlmostEqual(2.0, response.values['b'], 2)
+        # the objective here is a list rather than a scalar, which the history can only store as NaN
+        self.assertTrue(all(v != v for v in EvaluationHistory.load(searcher.run_dir)['objective']))
 
     def test_minimal_minimal(self):
         """
@@ -143,15 +1211,274 @@ class TestDecisionVariables(unittest.TestCase):
             DecisionVariable('var_name', convergence_criterion=-1)
 
 
+class TestDecisionVariableSet(unittest.TestCase):
+    def test_views(self):
+        a = DecisionVariable('a', minimum=0, maximum=2, initial_value=1, initial_step_size=0.5)
+        b = DecisionVariable('b', minimum=0, maximum=2, initial_value=1.5, initial_step_size=1)
+        dvs = DecisionVariableSet([a, b])
+        self.assertEqual(['a', 'b'], dvs.names)
+        self.assertEqual('b', dvs[1].var_name)
+        dvs[0].x_base = 0.25
+        self.assertEqual(0.25, dvs.x_base[0])
+        dvs.delta_x[1] = 0.0001
+        self.assertEqual(0.0001, dvs[1].delta_x)
+        self.assertEqual([True, False], dvs.within_bounds(dvs.x_base + dvs.delta_x * [1, 10000]).tolist())
+        self.assertFalse(dvs.converged())
+        dvs.delta_x[0] = 0.0001
+        self.assertTrue(dvs.converged())
+        # the given variables are copied, so a second set starts from the current values without sharing them
+        self.assertEqual(1.0, b.delta_x)
+        again = DecisionVariableSet([dvs[1]])
+        self.assertEqual(0.0001, again.delta_x[0])
+        again[0].x_new = 2.0
+        self.assertEqual(2.0, again.x_new[0])
+        self.assertEqual(1.5, dvs.x_new[1])
+        with self.assertRaises(MyPyOptException):
+            DecisionVariableSet([a, DecisionVariable('a')])
+
+    def test_parameter_view(self):
+        dvs = DecisionVariableSet([DecisionVariable('a', initial_value=1), DecisionVariable('b', initial_value=2)])
+        point = dvs.perturbed(1)
+        self.assertIsInstance(point, ParameterView)
+        self.assertEqual({'a': 1.0, 'b': 2.1}, dict(point))
+        self.assertEqual({'a': 1.0, 'b': 2.1}, point.to_dictionary())
+        self.assertEqual(2, len(point))
+        with self.assertRaises(KeyError):
+            point['c']
+        # the point is a snapshot, later moves of the base point do not change it
+        dvs.x_base[0] = 5.0
+        self.assertEqual(1.0, point['a'])
+        self.assertEqual(point, pickle.loads(pickle.dumps(point)))
+        self.assertEqual({'a': 5.0, 'b': 2.0}, dict(dvs.point()))
+
+
 class TestBaseOptimizerAbstraction(unittest.TestCase):
     def test_abstraction(self):
         dvs = [DecisionVariable('a'), DecisionVariable('b')]
         sim = ProjectStructure(verbose=True)
-        o = Optimizer(sim, dvs, lambda: None, lambda: [1])
+        o = Optimizer(sim, dvs, lambda p: [p['a'] + p['b']], lambda r: r[0])
         with self.assertRaises(MyPyOptException):
             o.search()
+        # evaluating a point is shared by every derived class
+        self.assertEqual(3.0, o.f_of_x({'a': 1.0, 'b': 2.0}).value)
+        with self.assertRaises(MyPyOptException):
+            Evaluator().evaluate([{}])
+
+
+class TestDistributedEvaluator(unittest.TestCase):
+    authkey = b'mypyopt-test'
+
+    @staticmethod
+    def crashing_quadratic(marker_path, parameter_hash):
+        # the first worker to get here dies without a word, as a worker on a lost host would
+        if not os.path.exists(marker_path):
+            open(marker_path, 'w').close()
+            os._exit(1)
+        return TestQuadratic.sim_quadratic(parameter_hash)
+
+    @staticmethod
+    def failing_quadratic(parameter_hash):
+        raise RuntimeError('simulation crashed')
+
+    def start_workers(self, evaluator, callbacks):
+        workers = list()
+        for callback_f_of_x in callbacks:
+            worker = multiprocessing.Process(target=run_worker, daemon=True,
+                                             args=(evaluator.address, self.authkey, callback_f_of_x,
+                                                   TestQuadratic.sum_squared_error_quadratic, 0.1, 0.1))
+            worker.start()
+            workers.append(worker)
+        return workers
+
+    def stop_workers(self, evaluator, workers):
+        evaluator.close()
+        for worker in workers:
+            worker.join(10)
+            self.assertFalse(worker.is_alive())
+
+    @staticmethod
+    def quadratic_dvs():
+        return [DecisionVariable(name, minimum=-5, maximum=5, initial_value=0.5, initial_step_size=0.1,
+                                 convergence_criterion=0.000001) for name in ['a', 'b', 'c']]
+
+    def test_quadratic_matches_serial(self):
+        sim = ProjectStructure(project_name='TestProject', output_dir_path=Path(mkdtemp()))
+        serial = HeuristicSearch(sim, self.quadratic_dvs(), TestQuadratic.sim_quadratic,
+                                 TestQuadratic.sum_squared_error_quadratic).search()
+        evaluator = DistributedEvaluator(self.authkey, workers=3)
+        workers = self.start_workers(evaluator, [TestQuadratic.sim_quadratic] * 3)
+        distributed = HeuristicSearch(sim, self.quadratic_dvs(), None, None, evaluator=evaluator).search()
+        self.assertTrue(distributed.success)
+        self.assertEqual(serial.values, distributed.values)
+        self.assertEqual(0, evaluator.retries)
+        self.stop_workers(evaluator, workers)
+
+    def test_lost_worker(self):
+        points = [{'a': a, 'b': 2.0, 'c': 3.0} for a in [0.0, 0.5, 1.0, 1.5]]
+        local = LocalEvaluator(TestQuadratic.sim_quadratic, TestQuadratic.sum_squared_error_quadratic)
+        evaluator = DistributedEvaluator(self.authkey, workers=2, worker_timeout=1.0)
+        crashing = partial(self.crashing_quadratic, os.path.join(mkdtemp(), 'crashed'))
+        workers = self.start_workers(evaluator, [crashing, crashing])
+        evaluations = evaluator.evaluate(points)
+        self.assertEqual([e.value for e in local.evaluate(points)], [e.value for e in evaluations])
+        self.assertEqual(1, evaluator.retries)
+        self.stop_workers(evaluator, workers[1:])
+
+    @staticmethod
+    def slow_quadratic(parameter_hash):
+        time.sleep(0.3)
+        return TestQuadratic.sim_quadratic(parameter_hash)
+
+    @staticmethod
+    def take_task(address, authkey):
+        # takes a task off the queue and dies before announcing it
+        manager = _BrokerManager(address=address, authkey=authkey)
+        manager.connect()
+        manager.tasks().get(timeout=10)
+        os._exit(1)
+
+    @staticmethod
+    def late_worker(*args):
+        time.sleep(0.5)
+        run_worker(*args)
+
+    def test_task_lost_before_start(self):
+        evaluator = DistributedEvaluator(self.authkey, worker_timeout=1.0)
+        thief = multiprocessing.Process(target=self.take_task, args=(evaluator.address, self.authkey), daemon=True)
+        thief.start()
+        worker = multiprocessing.Process(target=self.late_worker, daemon=True,
+                                         args=(evaluator.address, self.authkey, TestQuadratic.sim_quadratic,
+                                               TestQuadratic.sum_squared_error_quadratic, 0.1, 0.1))
+        worker.start()
+        evaluation = evaluator.evaluate([{'a': 1.0, 'b': 2.0, 'c': 3.0}])[0]
+        self.assertEqual(ReturnStateEnum.Successful, evaluation.return_state)
+        self.assertEqual(0.0, evaluation.value)
+        self.assertEqual(1, evaluator.retries)
+        thief.join(10)
+        self.stop_workers(evaluator, [worker])
+
+    def test_failing_callback(self):
+        evaluator = DistributedEvaluator(self.authkey, max_retries=1)
+        workers = self.start_workers(evaluator, [self.failing_quadratic])
+        evaluation = evaluator.evaluate([{'a': 1.0, 'b': 2.0, 'c': 3.0}])[0]
+        self.assertEqual(ReturnStateEnum.UnsuccessfulOther, evaluation.return_state)
+        self.assertIn('simulation crashed', evaluation.message)
+        self.assertEqual(1, evaluator.retries)
+        # the abandoned evaluation ends a search through its usual path, so the completed callback still runs
+        completed = list()
+        sim = ProjectStructure(project_name='TestProject', output_dir_path=Path(mkdtemp()))
+        response = HeuristicSearch(sim, self.quadratic_dvs(), None, None, callback_completed=completed.append,
+                                   evaluator=evaluator).search()
+        self.assertEqual(ReturnStateEnum.InvalidInitialPoint, response.reason)
+        self.assertEqual([response], completed)
+        self.stop_workers(evaluator, workers)
+
+    def test_task_timeout_counts_from_start(self):
+        # five queued tasks on one worker wait far longer than the timeout, but each runs well within it
+        points = [{'a': a, 'b': 2.0, 'c': 3.0} for a in [0.0, 0.5, 1.0, 1.5, 2.0]]
+        local = LocalEvaluator(TestQuadratic.sim_quadratic, TestQuadratic.sum_squared_error_quadratic)
+        evaluator = DistributedEvaluator(self.authkey, workers=5, task_timeout=1.0)
+        workers = self.start_workers(evaluator, [self.slow_quadratic])
+        evaluations = evaluator.evaluate(points)
+        self.assertEqual([e.value for e in local.evaluate(points)], [e.value for e in evaluations])
+        self.assertEqual(0, evaluator.retries)
+        self.stop_workers(evaluator, workers)
+
+    def test_bad_inputs(self):
+        with self.assertRaises(MyPyOptException):
+            DistributedEvaluator(self.authkey, workers=0)
+        with self.assertRaises(MyPyOptException):
+            DistributedEvaluator(self.authkey, worker_timeout=0)
+        with self.assertRaises(MyPyOptException):
+            DistributedEvaluator(self.authkey, max_retries=-1)
+
+
+class TestIsolatedEvaluator(unittest.TestCase):
+    @staticmethod
+    def troubled_sim(parameter_hash):
+        if parameter_hash['a'] == -1:
+            time.sleep(60)
+        elif parameter_hash['a'] == -2:
+            os._exit(3)
+        elif parameter_hash['a'] == -3:
+            raise RuntimeError('simulation crashed')
+        elif parameter_hash['a'] == -4:
+            time.sleep(1)
+        return [parameter_hash['a'] + float(os.environ.get('MYPYOPT_TEST_OFFSET', '0')), os.getpid()]
+
+    @staticmethod
+    def first(results):
+        return results[0]
+
+    @staticmethod
+    def set_offset(offset):
+        os.environ['MYPYOPT_TEST_OFFSET'] = str(offset)
+
+    def test_quadratic_matches_serial(self):
+        dvs = TestDistributedEvaluator.quadratic_dvs
+        serial = HeuristicSearch(ProjectStructure(write_output=False), dvs(), TestQuadratic.sim_quadratic,
+                                 TestQuadratic.sum_squared_error_quadratic).search()
+        project = ProjectStructure(write_output=False, parallel_workers=2, parallel_executor='isolated',
+                                   evaluation_timeout=30)
+        searcher = HeuristicSearch(project, dvs(), TestQuadratic.sim_quadratic,
+                                   TestQuadratic.sum_squared_error_quadratic)
+        self.assertIsInstance(searcher.evaluator, IsolatedEvaluator)
+        self.assertEqual(serial.values, searcher.search().values)
         with self.assertRaises(MyPyOptException):
-            o.f_of_x({})
+            ProjectStructure(evaluation_timeout=30)
+
+    def test_timeouts_and_crashes(self):
+        evaluator = IsolatedEvaluator(self.troubled_sim, self.first, workers=2, timeout=0.5,
+                                      initializer=self.set_offset, initargs=(10,))
+        try:
+            start = time.perf_counter()
+            evaluations = evaluator.evaluate([{'a': 1}, {'a': -1}, {'a': 2}, {'a': -2}, {'a': 3}])
+            self.assertLess(time.perf_counter() - start, 20)
+            states = [e.return_state for e in evaluations]
+            self.assertEqual([ReturnStateEnum.Successful, ReturnStateEnum.InfeasibleObj, ReturnStateEnum.Successful,
+                              ReturnStateEnum.UnsuccessfulOther, ReturnStateEnum.Successful], states)
+            # the initializer ran in every worker, including the ones started to replace the lost workers
+            self.assertEqual([11, 12, 13], [evaluations[i].value for i in [0, 2, 4]])
+            self.assertEqual(1, evaluator.timeouts)
+            self.assertEqual(1, evaluator.crashes)
+            # the workers stay warm from one call to the next
+            pids = {evaluator.evaluate([{'a': 4}])[0].value for _ in range(3)}
+            self.assertEqual(1, len(pids))
+            with self.assertRaises(MyPyOptException):
+                evaluator.evaluate([{'a': -3}])
+        finally:
+            evaluator.close()
+
+    def test_error_replaces_busy_workers(self):
+        evaluator = IsolatedEvaluator(self.troubled_sim, self.first, workers=2)
+        try:
+            with self.assertRaises(MyPyOptException):
+                evaluator.evaluate([{'a': -4}, {'a': -3}])
+            # the slow evaluation still running at the error must not be taken as the result of a later point
+            self.assertEqual([1, 2], [e.value for e in evaluator.evaluate([{'a': 1}, {'a': 2}])])
+        finally:
+            evaluator.close()
+
+    def test_failing_initializer(self):
+        evaluator = IsolatedEvaluator(self.troubled_sim, self.first, initializer=self.set_offset, initargs=())
+        with self.assertRaises(MyPyOptException):
+            evaluator.evaluate([{'a': 1}])
+        evaluator.close()
+        with self.assertRaises(MyPyOptException):
+            IsolatedEvaluator(self.troubled_sim, self.first, timeout=0)
+
+    def test_cancel_kills_workers(self):
+        import threading
+        evaluator = IsolatedEvaluator(self.troubled_sim, self.first, workers=2)
+        token = CancelToken()
+        threading.Timer(0.5, token.cancel).start()
+        start = time.perf_counter()
+        evaluations = evaluator.evaluate([{'a': 1}, {'a': -1}], cancel_token=token)
+        self.assertLess(time.perf_counter() - start, 20)
+        self.assertEqual([ReturnStateEnum.Successful, ReturnStateEnum.UserAborted],
+                         [e.return_state for e in evaluations])
+        self.assertEqual(ReturnStateEnum.Successful, evaluator.evaluate([{'a': 2}])[0].return_state)
+        evaluator.close()
 
 
 class TestReturnStateEnums(unittest.TestCase):
@@ -159,15 +1486,156 @@ class TestReturnStateEnums(unittest.TestCase):
         all_enums = ReturnStateEnum.all_enums()
         for e in all_enums:
             self.assertIsInstance(ReturnStateEnum.enum_to_string(e), str)
+        for e in StopReasonEnum.all_enums():
+            self.assertIsInstance(StopReasonEnum.enum_to_string(e), str)
+
+
+class TestEvaluationCache(unittest.TestCase):
+    def test_rounding_and_eviction(self):
+        cache = EvaluationCache(max_entries=2, decimals=3)
+        cache.put({'a': 1.0, 'b': -0.0}, ObjectiveEvaluation(ReturnStateEnum.Successful, 4.0))
+        self.assertEqual(4.0, cache.get({'b': 0.0, 'a': 1.0001}).value)
+        self.assertIsNone(cache.get({'a': 1.01, 'b': 0.0}))
+        cache.put({'a': 2.0}, ObjectiveEvaluation(ReturnStateEnum.Successful, 1.0))
+        cache.put({'a': 3.0}, ObjectiveEvaluation(ReturnStateEnum.Successful, 0.0))
+        self.assertIsNone(cache.get({'a': 1.0, 'b': 0.0}))
+        cache.put({'a': 4.0}, ObjectiveEvaluation(ReturnStateEnum.UnsuccessfulOther, 0.0))
+        self.assertIsNone(cache.get({'a': 4.0}))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(3, cache.misses)
+
+    def test_bad_inputs(self):
+        with self.assertRaises(MyPyOptException):
+            EvaluationCache(max_entries=0)
+
+    def test_search_reuses_persistent_cache(self):
+        calls = list()
+
+        def sim(parameter_hash):
+            calls.append(parameter_hash)
+            return [parameter_hash['a']]
+
+        database = Path(mkdtemp()) / 'cache.sqlite'
+        first_cache = EvaluationCache(database_path=database)
+        sim_settings = ProjectStructure(output_dir_path=database.parent)
+        first = HeuristicSearch(sim_settings, [DecisionVariable('a')], sim, lambda x: (x[0] - 4) ** 2,
+                                evaluation_cache=first_cache).search()
+        first_cache.close()
+        self.assertTrue(first.success)
+        self.assertEqual(first_cache.misses, len(calls))
+
+        calls.clear()
+        second_cache = EvaluationCache(database_path=database)
+        second = HeuristicSearch(sim_settings, [DecisionVariable('a')], sim, lambda x: (x[0] - 4) ** 2,
+                                 evaluation_cache=second_cache).search()
+        second_cache.close()
+        self.assertEqual(first.values, second.values)
+        self.assertEqual(0, len(calls))
+        self.assertEqual(0, second_cache.misses)
+
+    def test_database_values_are_json(self):
+        import numpy as np
+        import sqlite3
+        database = Path(mkdtemp()) / 'cache.sqlite'
+        cache = EvaluationCache(database_path=database)
+        cache.put({'a': 1.0}, ObjectiveEvaluation(ReturnStateEnum.Successful, [1.5, np.float64(2.5)]))
+        cache.put({'a': 2.0}, ObjectiveEvaluation(ReturnStateEnum.Successful, np.array([3.0, 4.0])))
+        cache.close()
+        connection = sqlite3.connect(str(database))
+        self.assertEqual('[3.0, 4.0]', connection.execute("SELECT value FROM evaluations WHERE key LIKE '%2.0%'")
+                         .fetchone()[0])
+        # a pickled value, as written by older versions, is never unpickled but evaluated again
+        connection.execute('UPDATE evaluations SET value = ? WHERE key LIKE ?', (pickle.dumps(1.0), '%1.0%'))
+        connection.commit()
+        connection.close()
+        cache = EvaluationCache(database_path=database)
+        self.assertIsNone(cache.get({'a': 1.0}))
+        self.assertEqual([3.0, 4.0], cache.get({'a': 2.0}).value)
+        cache.close()
+
+
+class TestMultiStartSearch(unittest.TestCase):
+    @staticmethod
+    def sim_point(parameter_hash):
+        return [parameter_hash['a'], parameter_hash['b']]
+
+    @staticmethod
+    def rastrigin(x):
+        return 20 + sum(v ** 2 - 10 * math.cos(2 * math.pi * v) for v in x)
+
+    @staticmethod
+    def dvs():
+        return [DecisionVariable(name, minimum=-5.12, maximum=5.12, initial_value=2.5, initial_step_size=0.5,
+                                 convergence_criterion=0.0001) for name in ['a', 'b']]
+
+    def project(self):
+        return ProjectStructure(project_name='TestMultiStart', output_dir_path=Path(mkdtemp()), random_seed=3)
+
+    def test_rastrigin(self):
+        single = HeuristicSearch(self.project(), self.dvs(), self.sim_point, self.rastrigin).search()
+        searcher = MultiStartSearch(self.project(), self.dvs(), self.sim_point, self.rastrigin, starts=8, workers=1,
+                                    cancel_after=5)
+        ranked = searcher.search()
+        self.assertEqual(8, len(ranked))
+        self.assertEqual([2.5, 2.5], searcher.start_points[0])
+        self.assertEqual(single.values, searcher.results[0].values)
+        self.assertLess(ranked[0].objective_value, single.objective_value)
+        self.assertTrue(ranked[0].success)
+        objective_values = [r.objective_value for r in ranked]
+        self.assertEqual(sorted(objective_values), objective_values)
+        self.assertIn(ReturnStateEnum.Cancelled, [r.reason for r in ranked])
+        # the global minimum is zero, so only an absolute margin keeps close runners up from being dominated
+        searcher = MultiStartSearch(self.project(), self.dvs(), self.sim_point, self.rastrigin, starts=8, workers=1,
+                                    cancel_after=5, absolute_margin=100.0)
+        self.assertNotIn(ReturnStateEnum.Cancelled, [r.reason for r in searcher.search()])
+
+    def test_process_pool_sobol(self):
+        searcher = MultiStartSearch(self.project(), self.dvs(), self.sim_point, self.rastrigin, starts=4, workers=2,
+                                    sampling='sobol', cancel_after=None)
+        ranked = searcher.search()
+        self.assertEqual(4, len(ranked))
+        self.assertTrue(all(r.success for r in ranked))
+        self.assertLessEqual(ranked[0].objective_value, ranked[-1].objective_value)
+        for point in searcher.start_points[1:]:
+            self.assertTrue(all(-4.62 <= x <= 4.62 for x in point))
+
+    def test_bad_inputs(self):
+        for arguments in [{'starts': 0}, {'sampling': 'grid'}, {'workers': 0}, {'cancel_after': 0},
+                          {'dominance_margin': -1}, {'absolute_margin': -1}]:
+            with self.assertRaises(MyPyOptException):
+                MultiStartSearch(self.project(), self.dvs(), self.sim_point, self.rastrigin, **arguments)
+        searcher = MultiStartSearch(self.project(), self.dvs(), self.sim_point, lambda x: x, starts=1, workers=1)
+        with self.assertRaises(MyPyOptException):
+            searcher.search()
 
 
 class TestProjectStructureConstruction(unittest.TestCase):
-    def test_it_creates_output_folder(self):
+    def test_it_creates_output_folder_lazily(self):
         temp_output_dir = Path(mkdtemp())
         temp_output_dir.rmdir()
+        sim = ProjectStructure(output_dir_path=temp_output_dir)
+        searcher = HeuristicSearch(sim, [DecisionVariable('a')], lambda p: [p['a']], lambda x: (x[0] - 2) ** 2)
         self.assertFalse(temp_output_dir.exists())
-        ProjectStructure(output_dir_path=temp_output_dir)
-        self.assertTrue(temp_output_dir.exists())
+        self.assertIsNone(searcher.run_dir)
+        self.assertTrue(searcher.search().success)
+        self.assertTrue((Path(searcher.run_dir) / RunLog.text_file_name).exists())
+
+    def test_no_output(self):
+        temp_output_dir = Path(mkdtemp())
+        sim = ProjectStructure(output_dir_path=temp_output_dir, write_output=False)
+        searcher = HeuristicSearch(sim, [DecisionVariable('a')], lambda p: [p['a']], lambda x: (x[0] - 2) ** 2)
+        response = searcher.search()
+        self.assertTrue(response.success)
+        self.assertAlmostEqual(2.0, response.values['a'], 2)
+        self.assertIsNone(searcher.run_dir)
+        self.assertEqual([], list(temp_output_dir.iterdir()))
+
+    def test_lazy_imports(self):
+        modules = ['numpy', 'sqlite3', 'concurrent.futures', 'multiprocessing', 'asyncio']
+        script = 'import sys, mypyopt.optimizer_heuristic_search; print([m for m in %r if m in sys.modules])' % modules
+        output = subprocess.run([sys.executable, '-c', script], check=True, stdout=subprocess.PIPE,
+                                cwd=str(Path(__file__).resolve().parent.parent.parent)).stdout
+        self.assertEqual('[]', output.decode().strip())
 
     def test_bad_inputs(self):
         with self.assertRaises(MyPyOptException):
@@ -176,3 +1644,13 @@ class TestProjectStructureConstruction(unittest.TestCase):
             ProjectStructure(contraction=2.5)
         with self.assertRaises(MyPyOptException):
             ProjectStructure(max_iterations=0)
+        with self.assertRaises(MyPyOptException):
+            ProjectStructure(parallel_workers=0)
+        with self.assertRaises(MyPyOptException):
+            ProjectStructure(parallel_executor='cluster')
+        with self.assertRaises(MyPyOptException):
+            ProjectStructure(checkpoint_interval=-1)
+        for arguments in [{'stall_iterations': 0}, {'stall_relative_tolerance': -1}, {'evaluation_budget': 0},
+                          {'time_budget': 0}]:
+            with self.assertRaises(MyPyOptException):
+                ProjectStructure(**arguments)
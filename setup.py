@@ -12,7 +12,8 @@ setup(
     url='https://github.com/Myoldmopar/MyPyOpt',
     license='UnlicensedForNow',
     packages=[
-        'mypyopt', 'mypyopt.demos.plot_example', 'mypyopt.demos.pretend_energyplus', 'mypyopt.demos.wall_temperature'
+        'mypyopt', 'mypyopt.benchmarks', 'mypyopt.demos.plot_example', 'mypyopt.demos.pretend_energyplus',
+        'mypyopt.demos.wall_temperature'
     ],
     package_data={
         'mypyopt.demos.pretend_energyplus': ['in_template.json'],
@@ -21,5 +22,6 @@ setup(
     long_description=readme_contents,
     long_description_content_type='text/markdown',
     author="Edwin Lee",
-    install_requires=[],
+    install_requires=['numpy'],
+    extras_require={'sobol': ['scipy']},
 )